@@ -0,0 +1,35 @@
+from django.contrib import admin
+
+from .models import MonthlyAppointmentFact, MonthlySlotFact
+
+
+class ReadOnlyFactAdmin(admin.ModelAdmin):
+    """統計列由訊號與 rebuild_analytics 維護，admin 只供檢視"""
+    date_hierarchy = 'month'
+    list_select_related = ('therapist',)
+    search_fields = ('therapist__name',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(MonthlySlotFact)
+class MonthlySlotFactAdmin(ReadOnlyFactAdmin):
+    list_display = ('month', 'therapist', 'slots_offered', 'updated_at')
+    ordering = ('-month', 'therapist')
+
+
+@admin.register(MonthlyAppointmentFact)
+class MonthlyAppointmentFactAdmin(ReadOnlyFactAdmin):
+    list_display = (
+        'month', 'therapist', 'consultation_type', 'appointments', 'completed',
+        'cancelled', 'no_show', 'withdrawn', 'revenue', 'revenue_completed',
+    )
+    list_filter = ('consultation_type',)
+    ordering = ('-month', 'therapist', 'consultation_type')
@@ -0,0 +1,215 @@
+"""
+月報表的增量維護與重建
+
+每筆預約對所屬的 (心理師, 月份, 諮詢方式) 貢獻固定的數值（contribution()）；
+狀態、金額、時段改變時減去舊貢獻、加上新貢獻，以 UPDATE … SET col = col + n 套用。
+增量在交易提交後（transaction.on_commit）以自動提交各自寫入：同一位心理師、同一個月的預約不會在
+預約交易中排隊等待統計列的鎖，回滾的交易也不會留下增量；提交後、寫入前程序中止時會少算，
+以 rebuild() 修正。只有 save()／delete() 會觸發；批次寫入需自行呼叫
+apply_appointment_changes()（見 appointments/series.py），
+其他 bulk_create、QuerySet.update() 寫入後需執行 rebuild()（或 `python manage.py rebuild_analytics`）。
+"""
+from collections import Counter, defaultdict
+from decimal import Decimal
+from functools import partial
+from typing import NamedTuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from appointments.models import Appointment
+from therapists.models import AvailableSlot
+
+from .models import MonthlyAppointmentFact, MonthlySlotFact
+
+BATCH_SIZE = 2000
+# 計入預期營收的狀態
+REVENUE_STATUSES = ('pending', 'confirmed', 'completed')
+# 刪除時計為「使用者取消」的狀態；已完成、未出席的預約被刪除視為資料清理，不計入
+WITHDRAWN_STATUSES = ('pending', 'confirmed', 'cancelled')
+
+
+class AppointmentState(NamedTuple):
+    therapist_id: int
+    month: object
+    consultation_type: str
+    status: str
+    price: Decimal
+
+
+def month_of(value):
+    """時間所在月份的 1 日（本地時區）"""
+    return timezone.localtime(value).date().replace(day=1)
+
+
+def appointment_state(appointment):
+    return AppointmentState(
+        appointment.therapist_id, month_of(appointment.slot.slot_time),
+        appointment.consultation_type, appointment.status, appointment.price or Decimal('0'),
+    )
+
+
+def stored_appointment_state(pk):
+    """資料庫中目前的狀態（save() 之前取得）；不存在時回傳 None"""
+    row = (
+        Appointment.objects.filter(pk=pk)
+        .values_list('therapist_id', 'slot__slot_time', 'consultation_type', 'status', 'price')
+        .first()
+    )
+    if row is None:
+        return None
+    therapist_id, slot_time, consultation_type, status, price = row
+    return AppointmentState(therapist_id, month_of(slot_time), consultation_type, status, price or Decimal('0'))
+
+
+def contribution(state):
+    values = Counter({'appointments': 1, state.status: 1})
+    if state.status in REVENUE_STATUSES:
+        values['revenue'] = state.price
+    if state.status == 'completed':
+        values['revenue_completed'] = state.price
+    return values
+
+
+def _bucket(state):
+    return state.therapist_id, state.month, state.consultation_type
+
+
+def _bucket_lookup(bucket):
+    therapist_id, month, consultation_type = bucket
+    return {'therapist_id': therapist_id, 'month': month, 'consultation_type': consultation_type}
+
+
+def _increment(model, key, deltas):
+    """交易提交後對單一統計列加上 deltas（不在交易中時立即套用）"""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if deltas:
+        # robust：統計寫入失敗不影響已提交的預約，記錄後略過
+        transaction.on_commit(partial(_apply_increment, model, key, deltas), robust=True)
+
+
+def _apply_increment(model, key, deltas):
+    """列不存在時建立"""
+    changes = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**key).update(**changes, updated_at=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # 併發的交易剛建立同一列
+        model.objects.filter(**key).update(**changes, updated_at=timezone.now())
+
+
+def apply_appointment_change(old, new):
+    """old／new 為 AppointmentState 或 None（新增／刪除）"""
+    apply_appointment_changes([(old, new)])
+
+
+def apply_appointment_changes(changes):
+    """多筆 (old, new) 一次套用（批次預約、改期）：依統計列加總，每列更新一次"""
+    buckets = defaultdict(Counter)
+    for old, new in changes:
+        if old is not None:
+            buckets[_bucket(old)].subtract(contribution(old))
+        if new is not None:
+            buckets[_bucket(new)].update(contribution(new))
+    for bucket, deltas in buckets.items():
+        _increment(MonthlyAppointmentFact, _bucket_lookup(bucket), deltas)
+
+
+def record_withdrawal(state):
+    """預約被刪除：移除其貢獻，並視狀態計為使用者取消"""
+    record_withdrawals([state])
+
+
+def record_withdrawals(states):
+    buckets = defaultdict(Counter)
+    for state in states:
+        buckets[_bucket(state)].subtract(contribution(state))
+        if state.status in WITHDRAWN_STATUSES:
+            buckets[_bucket(state)]['withdrawn'] += 1
+    for bucket, deltas in buckets.items():
+        _increment(MonthlyAppointmentFact, _bucket_lookup(bucket), deltas)
+
+
+def apply_slot_change(old, new):
+    """old／new 為 (therapist_id, month) 或 None"""
+    if old == new:
+        return
+    if old is not None:
+        _increment(MonthlySlotFact, {'therapist_id': old[0], 'month': old[1]}, {'slots_offered': -1})
+    if new is not None:
+        _increment(MonthlySlotFact, {'therapist_id': new[0], 'month': new[1]}, {'slots_offered': 1})
+
+
+def apply_slots_bulk(therapist_id, added=(), removed=()):
+    """不發出訊號的批次新增／刪除時段：依月份加總淨變動，每個月份更新一次"""
+    counts = Counter(month_of(slot_time) for slot_time in added)
+    counts.subtract(month_of(slot_time) for slot_time in removed)
+    for month, count in counts.items():
+        _increment(MonthlySlotFact, {'therapist_id': therapist_id, 'month': month}, {'slots_offered': count})
+
+
+# ───────── 重建 ─────────
+def _batches(queryset, fields, batch_size):
+    """依主鍵分批讀取，每批一個查詢，不會一次載入整張表"""
+    last_pk = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', *fields)[:batch_size]
+        )
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1][0]
+
+
+def rebuild(therapist_ids=None, batch_size=BATCH_SIZE):
+    """
+    由時段與預約重新計算月報表（可限定心理師）；回傳 (時段統計列數, 預約統計列數)。
+    掃描期間寫入的增量會被覆蓋，請於離峰時執行，或執行後再跑一次受影響的心理師。
+    """
+    slots = AvailableSlot.objects.all()
+    appointments = Appointment.objects.all()
+    slot_facts = MonthlySlotFact.objects.all()
+    appointment_facts = MonthlyAppointmentFact.objects.all()
+    if therapist_ids is not None:
+        slots = slots.filter(therapist_id__in=therapist_ids)
+        appointments = appointments.filter(therapist_id__in=therapist_ids)
+        slot_facts = slot_facts.filter(therapist_id__in=therapist_ids)
+        appointment_facts = appointment_facts.filter(therapist_id__in=therapist_ids)
+
+    offered = Counter()
+    for rows in _batches(slots, ('therapist_id', 'slot_time'), batch_size):
+        offered.update((therapist_id, month_of(slot_time)) for _pk, therapist_id, slot_time in rows)
+
+    totals = defaultdict(Counter)
+    fields = ('therapist_id', 'slot__slot_time', 'consultation_type', 'status', 'price')
+    for rows in _batches(appointments, fields, batch_size):
+        for _pk, therapist_id, slot_time, consultation_type, status, price in rows:
+            state = AppointmentState(
+                therapist_id, month_of(slot_time), consultation_type, status, price or Decimal('0'),
+            )
+            totals[_bucket(state)].update(contribution(state))
+
+    with transaction.atomic():
+        # 使用者取消的預約已刪除，只能沿用增量累計的數值
+        for therapist_id, month, consultation_type, withdrawn in (
+            appointment_facts.filter(withdrawn__gt=0)
+            .values_list('therapist_id', 'month', 'consultation_type', 'withdrawn')
+        ):
+            totals[(therapist_id, month, consultation_type)]['withdrawn'] = withdrawn
+
+        slot_facts.delete()
+        appointment_facts.delete()
+        MonthlySlotFact.objects.bulk_create([
+            MonthlySlotFact(therapist_id=therapist_id, month=month, slots_offered=count)
+            for (therapist_id, month), count in offered.items()
+        ], batch_size=batch_size)
+        MonthlyAppointmentFact.objects.bulk_create([
+            MonthlyAppointmentFact(**_bucket_lookup(bucket), **values)
+            for bucket, values in totals.items()
+        ], batch_size=batch_size)
+    return len(offered), len(totals)
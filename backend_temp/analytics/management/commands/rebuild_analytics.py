@@ -0,0 +1,30 @@
+"""
+由時段與預約重新計算月報表（部署 analytics 後執行一次；之後由訊號增量維護）
+
+    python manage.py rebuild_analytics
+    python manage.py rebuild_analytics --therapist 3 8 --batch-size 5000
+
+分批掃描時段與預約，整張統計表在單一交易中替換；
+使用者取消（已刪除）的預約無法重算，沿用既有的 withdrawn 數值。
+bulk_create、QuerySet.update() 等不發出訊號的批次寫入之後也應執行。
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytics.facts import BATCH_SIZE, rebuild
+
+
+class Command(BaseCommand):
+    help = '重新計算心理師時段使用率與營收月報表'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--therapist', type=int, nargs='+', help='只重算指定心理師')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='每批讀取筆數')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        slot_rows, appointment_rows = rebuild(options['therapist'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"已重建 {slot_rows} 筆時段統計、{appointment_rows} 筆預約統計（{time.perf_counter() - start:.1f}s）"
+        ))
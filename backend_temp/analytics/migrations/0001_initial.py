@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('therapists', '0008_slot_open_time_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyAppointmentFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='月份（該月 1 日）')),
+                ('consultation_type', models.CharField(choices=[('online', '線上'), ('offline', '實體')], max_length=20)),
+                ('appointments', models.IntegerField(default=0)),
+                ('pending', models.IntegerField(default=0)),
+                ('confirmed', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('no_show', models.IntegerField(default=0)),
+                ('withdrawn', models.IntegerField(default=0, help_text='使用者取消（刪除）的預約數')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('revenue_completed', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('therapist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='therapists.therapistprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', 'consultation_type'], name='appointment_fact_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('therapist', 'month', 'consultation_type'), name='appointment_fact_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlySlotFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='月份（該月 1 日）')),
+                ('slots_offered', models.IntegerField(default=0, help_text='開放時段數')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('therapist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='therapists.therapistprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month'], name='slot_fact_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('therapist', 'month'), name='slot_fact_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+from django.db import models
+
+from appointments.models import Appointment
+
+
+class MonthlySlotFact(models.Model):
+    """
+    心理師每月開放的時段數（以時段開始時間所在的月份歸類，Asia/Taipei）。
+    由 analytics/signals.py 在時段新增、刪除、改期時增減；bulk_create 等不發出 signal 的寫入
+    需自行呼叫 analytics.facts.rebuild()。
+    """
+    therapist = models.ForeignKey(
+        'therapists.TherapistProfile',
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    month = models.DateField(help_text='月份（該月 1 日）')
+    slots_offered = models.IntegerField(default=0, help_text='開放時段數')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['therapist', 'month'], name='slot_fact_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['month'], name='slot_fact_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.therapist_id} {self.month:%Y-%m}：{self.slots_offered} 個時段"
+
+
+class MonthlyAppointmentFact(models.Model):
+    """
+    心理師每月、每種諮詢方式的預約統計（月份同樣以時段開始時間歸類）。
+
+    - pending … no_show：目前各狀態的預約數，appointments 為其總和
+    - withdrawn：使用者取消（刪除）的預約；資料列已不存在，重建時無法重算，沿用既有數值
+    - revenue：待確認、已確認、已完成預約的金額（預期營收）；revenue_completed 只計已完成
+    """
+    therapist = models.ForeignKey(
+        'therapists.TherapistProfile',
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    month = models.DateField(help_text='月份（該月 1 日）')
+    consultation_type = models.CharField(max_length=20, choices=Appointment.CONSULTATION_CHOICES)
+    appointments = models.IntegerField(default=0)
+    pending = models.IntegerField(default=0)
+    confirmed = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+    no_show = models.IntegerField(default=0)
+    withdrawn = models.IntegerField(default=0, help_text='使用者取消（刪除）的預約數')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    revenue_completed = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['therapist', 'month', 'consultation_type'], name='appointment_fact_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['month', 'consultation_type'], name='appointment_fact_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.therapist_id} {self.month:%Y-%m} {self.consultation_type}：{self.appointments} 筆"
@@ -0,0 +1,86 @@
+"""
+預約、時段異動時增量更新月報表（AnalyticsConfig.ready() 時連接）
+
+- 增量在預約交易提交後才寫入統計列（見 facts.py），不延長預約交易持有的鎖
+- 預約：pre_save 讀出資料庫中的舊狀態，post_save 以「新貢獻 − 舊貢獻」更新；
+  新增預約不需額外查詢，狀態變更多一次查詢
+- 刪除預約：移除貢獻並計為使用者取消（withdrawn）；刪除心理師時統計列隨之刪除，不再更新
+- 時段：新增、刪除、改期（心理師或時間改變）時增減開放時段數；
+  預約流程只以 update_fields=['is_booked', 'updated_at'] 儲存時段，不會觸發額外查詢
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from appointments.models import Appointment
+from therapists.models import AvailableSlot, TherapistProfile
+
+from . import facts
+
+SLOT_KEY_FIELDS = {'therapist', 'therapist_id', 'slot_time'}
+APPOINTMENT_FIELDS = {'therapist', 'therapist_id', 'slot', 'slot_id', 'consultation_type', 'status', 'price'}
+
+
+def _relevant(update_fields, fields):
+    return update_fields is None or not fields.isdisjoint(update_fields)
+
+
+def _therapist_removed(origin):
+    # 刪除心理師時統計列會一併刪除，不需（也不能）再更新
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is TherapistProfile
+
+
+def appointment_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._analytics_previous = None
+    if raw or instance._state.adding or not _relevant(update_fields, APPOINTMENT_FIELDS):
+        return
+    instance._analytics_previous = facts.stored_appointment_state(instance.pk)
+
+
+def appointment_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or not (created or _relevant(update_fields, APPOINTMENT_FIELDS)):
+        return
+    previous = getattr(instance, '_analytics_previous', None)
+    current = facts.appointment_state(instance)
+    if previous != current:
+        facts.apply_appointment_change(previous, current)
+
+
+def appointment_deleted(sender, instance, origin=None, **kwargs):
+    if _therapist_removed(origin):
+        return
+    facts.record_withdrawal(facts.appointment_state(instance))
+
+
+def _slot_key(therapist_id, slot_time):
+    return therapist_id, facts.month_of(slot_time)
+
+
+def slot_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._analytics_previous = None
+    if raw or instance._state.adding or not _relevant(update_fields, SLOT_KEY_FIELDS):
+        return
+    row = AvailableSlot.objects.filter(pk=instance.pk).values_list('therapist_id', 'slot_time').first()
+    instance._analytics_previous = _slot_key(*row) if row else None
+
+
+def slot_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or not (created or _relevant(update_fields, SLOT_KEY_FIELDS)):
+        return
+    previous = getattr(instance, '_analytics_previous', None)
+    facts.apply_slot_change(previous, _slot_key(instance.therapist_id, instance.slot_time))
+
+
+def slot_deleted(sender, instance, origin=None, **kwargs):
+    if _therapist_removed(origin):
+        return
+    facts.apply_slot_change(_slot_key(instance.therapist_id, instance.slot_time), None)
+
+
+def connect():
+    pre_save.connect(appointment_saving, sender=Appointment, dispatch_uid='analytics:appointment:pre_save')
+    post_save.connect(appointment_saved, sender=Appointment, dispatch_uid='analytics:appointment:save')
+    post_delete.connect(appointment_deleted, sender=Appointment, dispatch_uid='analytics:appointment:delete')
+    pre_save.connect(slot_saving, sender=AvailableSlot, dispatch_uid='analytics:slot:pre_save')
+    post_save.connect(slot_saved, sender=AvailableSlot, dispatch_uid='analytics:slot:save')
+    post_delete.connect(slot_deleted, sender=AvailableSlot, dispatch_uid='analytics:slot:delete')
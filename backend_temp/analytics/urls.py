@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .views import RevenueReportView, UtilizationReportView
+
+app_name = 'analytics'
+
+urlpatterns = [
+    path('utilization/', UtilizationReportView.as_view(), name='utilization'),
+    path('revenue/', RevenueReportView.as_view(), name='revenue'),
+]
@@ -0,0 +1,137 @@
+from datetime import date
+
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import MonthlyAppointmentFact, MonthlySlotFact
+
+DEFAULT_MONTHS = 12
+COUNT_FIELDS = ('appointments', 'pending', 'confirmed', 'completed', 'cancelled', 'no_show', 'withdrawn')
+MONEY_FIELDS = ('revenue', 'revenue_completed')
+
+
+def parse_month(value, param):
+    try:
+        year, month = (int(part) for part in value.split('-'))
+        return date(year, month, 1)
+    except ValueError:
+        raise ValidationError({param: '月份格式錯誤，請使用 YYYY-MM，例如 2025-01'})
+
+
+def months_before(month, count):
+    index = month.year * 12 + month.month - 1 - count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _ratio(numerator, denominator):
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def rates(row):
+    """取消率（含使用者取消）、未出席率"""
+    cancellations = row['cancelled'] + row['withdrawn']
+    return {
+        'cancel_rate': _ratio(cancellations, row['appointments'] + row['withdrawn']),
+        'no_show_rate': _ratio(row['no_show'], row['completed'] + row['no_show']),
+    }
+
+
+class MonthlyReportView(APIView):
+    """
+    月報表 API 共用：?from=YYYY-MM&to=YYYY-MM（預設最近 DEFAULT_MONTHS 個月）、?therapist=<id>
+    資料來自預先彙整的月統計表，查詢量與預約數無關；僅限管理員
+    """
+    permission_classes = [IsAdminUser]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        params = request.query_params
+        end = parse_month(params['to'], 'to') if 'to' in params else timezone.localdate().replace(day=1)
+        start = parse_month(params['from'], 'from') if 'from' in params else months_before(end, DEFAULT_MONTHS - 1)
+        if start > end:
+            raise ValidationError({'from': 'from 不可晚於 to'})
+        self.start, self.end = start, end
+
+    def filter_facts(self, queryset):
+        queryset = queryset.filter(month__gte=self.start, month__lte=self.end)
+        therapist = self.request.query_params.get('therapist')
+        if therapist:
+            if not therapist.isdigit():
+                raise ValidationError({'therapist': '請提供心理師 id'})
+            queryset = queryset.filter(therapist_id=therapist)
+        return queryset
+
+    def report(self, results):
+        return Response({'from': self.start.strftime('%Y-%m'), 'to': self.end.strftime('%Y-%m'), 'results': results})
+
+
+class UtilizationReportView(MonthlyReportView):
+    """
+    GET /api/analytics/utilization/   各心理師每月的時段使用率與預約狀態
+    utilization = (預約數 − 已取消) / 開放時段數；rows 依月份、心理師排序
+    """
+
+    def get(self, request):
+        slot_rows = self.filter_facts(MonthlySlotFact.objects.all()).values_list(
+            'therapist_id', 'therapist__name', 'month', 'slots_offered',
+        )
+        appointment_rows = (
+            self.filter_facts(MonthlyAppointmentFact.objects.all())
+            .values('therapist_id', 'therapist__name', 'month')
+            .annotate(**{field: Sum(field) for field in COUNT_FIELDS + MONEY_FIELDS})
+            .order_by()
+        )
+
+        rows = {}
+        for therapist_id, name, month, offered in slot_rows:
+            rows[(month, therapist_id)] = {
+                'therapist': therapist_id, 'therapist_name': name, 'month': month.strftime('%Y-%m'),
+                'slots_offered': offered,
+                **dict.fromkeys(COUNT_FIELDS, 0), **dict.fromkeys(MONEY_FIELDS, '0.00'),
+            }
+        for values in appointment_rows:
+            key = (values['month'], values['therapist_id'])
+            row = rows.setdefault(key, {
+                'therapist': values['therapist_id'], 'therapist_name': values['therapist__name'],
+                'month': values['month'].strftime('%Y-%m'), 'slots_offered': 0,
+            })
+            row.update({field: values[field] for field in COUNT_FIELDS})
+            row.update({field: f'{values[field]:.2f}' for field in MONEY_FIELDS})
+
+        results = []
+        for key in sorted(rows):
+            row = rows[key]
+            row['utilization'] = _ratio(row['appointments'] - row['cancelled'], row['slots_offered'])
+            row.update(rates(row))
+            results.append(row)
+        return self.report(results)
+
+
+class RevenueReportView(MonthlyReportView):
+    """
+    GET /api/analytics/revenue/   每月、每種諮詢方式的營收與取消／未出席率（可加 ?therapist= 限定心理師）
+    revenue 為待確認、已確認、已完成預約的金額；revenue_completed 只計已完成
+    """
+
+    def get(self, request):
+        facts = (
+            self.filter_facts(MonthlyAppointmentFact.objects.all())
+            .values('month', 'consultation_type')
+            .annotate(**{field: Sum(field) for field in COUNT_FIELDS + MONEY_FIELDS})
+            .order_by('month', 'consultation_type')
+        )
+        results = []
+        for values in facts:
+            row = {
+                'month': values['month'].strftime('%Y-%m'),
+                'consultation_type': values['consultation_type'],
+                **{field: values[field] for field in COUNT_FIELDS},
+                **{field: f'{values[field]:.2f}' for field in MONEY_FIELDS},
+            }
+            row.update(rates(row))
+            results.append(row)
+        return self.report(results)
@@ -0,0 +1,47 @@
+from django.contrib import admin
+from django.db import transaction
+from core.paginators import EstimatedCountPaginator
+from .models import Appointment, AppointmentSeries, WaitlistEntry
+
+
+@admin.register(Appointment)
+class AppointmentAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'therapist', 'slot', 'consultation_type', 'price', 'status', 'created_at')
+    list_filter = ('status', 'consultation_type')
+    search_fields = ('user__email', 'therapist__name')
+    ordering = ('-created_at',)
+    list_select_related = ('user', 'therapist', 'slot__therapist')
+    raw_id_fields = ('user', 'slot', 'series')
+    autocomplete_fields = ('therapist',)
+    readonly_fields = ('created_at', 'updated_at')
+    # 預約數量大：估算總筆數，篩選時不另算全表筆數
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        """
+        「刪除所選」預設以 QuerySet.delete() 刪除，不經過 Appointment.delete()，時段會一直是已預約；
+        改為逐筆刪除，與單筆刪除相同地釋出時段（時段訊號重算最近可預約時間並配對候補名單）
+        """
+        for appointment in queryset.select_related('slot'):
+            appointment.delete()
+
+
+@admin.register(AppointmentSeries)
+class AppointmentSeriesAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'therapist', 'consultation_type', 'interval_weeks', 'created_at')
+    search_fields = ('user__email', 'therapist__name')
+    list_select_related = ('user', 'therapist')
+    raw_id_fields = ('user',)
+    autocomplete_fields = ('therapist',)
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'therapist', 'consultation_type', 'status', 'offer_expires_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('user__email', 'therapist__name')
+    list_select_related = ('user', 'therapist')
+    raw_id_fields = ('user', 'offered_slot')
+    autocomplete_fields = ('therapist',)
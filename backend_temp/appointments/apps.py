@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class AppointmentsConfig(AppConfig):
+    name = 'appointments'
+
+    def ready(self):
+        # 時段釋出時通知候補名單
+        from . import signals  # noqa: F401
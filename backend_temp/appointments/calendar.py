@@ -0,0 +1,254 @@
+"""
+預約的 iCalendar 訂閱（GET /api/appointments/calendar/<token>.ics）
+
+心理師與個案各有一個簽章網址（feed_token()，以 django.core.signing 簽章，不需登入），
+網址內含對象的 calendar_token_version；reset_token() 將版本加一，舊網址即回 404（版本號有快取，輪詢不查詢資料庫）。
+行事曆 App 每幾分鐘輪詢一次，因此：
+- 內容以版本號快取（core.response_cache 的 versions()／bump()）：預約新增、改期、狀態變更、取消時
+  invalidate() 換新版本（見 appointments/signals.py；批次寫入見 appointments/series.py），
+  心理師改名等 therapists 異動也會失效。沒有異動的輪詢只讀快取，不查詢資料庫
+- ETag 由版本號決定、Last-Modified 為該版本第一次產生的時間；If-None-Match／If-Modified-Since 相符回 304
+- 未命中時以 iterator() 分批讀取、逐段串流輸出，不一次載入完整歷史；輸出完畢後連同預先壓縮的內容存入快取，
+  超過 ICAL_CACHE_MAX_BYTES 的只存 ETag 等資訊（條件式請求仍回 304，完整請求重新串流）
+
+網址等同密碼，外流時以 POST /api/appointments/calendar/reset/ 重設；心理師的訂閱不含個案的姓名或 email。
+"""
+import hashlib
+import time
+from datetime import timezone as dt_timezone
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from core.response_cache import CACHE_HEADER, build_response, bump, make_entry, versions
+from therapists.models import TherapistProfile
+
+from .models import Appointment
+
+CACHE_TTL = getattr(settings, 'ICAL_CACHE_TTL', 24 * 60 * 60)
+CACHE_MAX_BYTES = getattr(settings, 'ICAL_CACHE_MAX_BYTES', 1024 * 1024)
+REFRESH_MINUTES = getattr(settings, 'ICAL_REFRESH_MINUTES', 15)
+CHUNK_SIZE = 500
+CONTENT_TYPE = 'text/calendar; charset=utf-8'
+
+THERAPIST, CLIENT = 'therapist', 'client'
+STATUSES = {
+    'pending': 'TENTATIVE', 'confirmed': 'CONFIRMED', 'completed': 'CONFIRMED',
+    'cancelled': 'CANCELLED', 'no_show': 'CONFIRMED',
+}
+STATUS_LABELS = dict(Appointment.STATUS_CHOICES)
+CONSULTATION_LABELS = dict(Appointment.CONSULTATION_CHOICES)
+
+_signer = signing.Signer(salt='appointments.calendar', sep='.')
+
+
+def _owners(kind):
+    return TherapistProfile.objects if kind == THERAPIST else get_user_model().objects
+
+
+def _version_key(kind, owner_id):
+    return f'ical:tv:{kind}:{owner_id}'
+
+
+def token_version(kind, owner_id):
+    """目前的網址版本；對象不存在時為 None"""
+    key = _version_key(kind, owner_id)
+    version = cache.get(key)
+    if version is None:
+        version = _owners(kind).filter(pk=owner_id).values_list('calendar_token_version', flat=True).first()
+        if version is not None:
+            cache.set(key, version, CACHE_TTL)
+    return version
+
+
+def reset_token(kind, owner_id):
+    """讓對象現有的訂閱網址失效（之後 feed_token() 產生新網址）"""
+    _owners(kind).filter(pk=owner_id).update(calendar_token_version=F('calendar_token_version') + 1)
+    # 交易提交前讀到的舊版本可能又被寫回快取，提交後再清一次
+    cache.delete(_version_key(kind, owner_id))
+    transaction.on_commit(partial(cache.delete, _version_key(kind, owner_id)))
+
+
+def feed_token(kind, owner_id):
+    return _signer.sign(f'{kind}-{owner_id}-{token_version(kind, owner_id) or 0}')
+
+
+def parse_token(token):
+    """回傳 (kind, owner_id)；簽章不符、網址已重設或對象不存在時為 None"""
+    try:
+        kind, *parts = _signer.unsign(token).split('-')
+    except signing.BadSignature:
+        return None
+    # 加入版本前簽發的網址（kind-owner_id）視為版本 0
+    if kind not in (THERAPIST, CLIENT) or len(parts) not in (1, 2) or not all(part.isdigit() for part in parts):
+        return None
+    owner_id, version = int(parts[0]), int(parts[1]) if len(parts) == 2 else 0
+    if token_version(kind, owner_id) != version:
+        return None
+    return kind, owner_id
+
+
+def _dependency(kind, owner_id):
+    return f'ical:{kind}:{owner_id}'
+
+
+def invalidate(therapist_id, user_id):
+    """預約異動：讓心理師與個案的訂閱內容失效（交易提交後生效）"""
+    bump(_dependency(THERAPIST, therapist_id), _dependency(CLIENT, user_id))
+
+
+# ───────── 產生 iCalendar（RFC 5545） ─────────
+def _escape(text):
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _fold(line):
+    """每行不超過 75 bytes，續行以一個空白開頭；不切開 UTF-8 多位元組字元"""
+    if len(line.encode()) <= 75:
+        return line + '\r\n'
+    parts, current, size = [], [], 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > (74 if parts else 75):
+            parts.append(''.join(current))
+            current, size = [], 0
+        current.append(char)
+        size += width
+    parts.append(''.join(current))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _title(kind, owner_id):
+    """行事曆名稱；對象不存在時為 None"""
+    if kind == THERAPIST:
+        name = TherapistProfile.objects.filter(pk=owner_id).values_list('name', flat=True).first()
+        return name and f'MindCare 預約（{name}）'
+    if get_user_model().objects.filter(pk=owner_id).exists():
+        return 'MindCare 我的諮詢'
+    return None
+
+
+def _calendar_header(title):
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//MindCare//Appointments//ZH-TW',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(title)}',
+        f'X-WR-TIMEZONE:{settings.TIME_ZONE}',
+        f'REFRESH-INTERVAL;VALUE=DURATION:PT{REFRESH_MINUTES}M',
+        f'X-PUBLISHED-TTL:PT{REFRESH_MINUTES}M',
+    ]
+    return ''.join(_fold(line) for line in lines)
+
+
+def _event(row, kind, host):
+    pk, slot_time, ends_at, status, consultation_type, updated_at, therapist_name = row
+    consultation = CONSULTATION_LABELS.get(consultation_type, consultation_type)
+    if kind == THERAPIST:
+        summary = f'{consultation}諮詢（預約 #{pk}）'
+    else:
+        summary = f'{therapist_name} 心理師 {consultation}諮詢'
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:appointment-{pk}@{host}',
+        f'DTSTAMP:{_utc(updated_at)}',
+        f'LAST-MODIFIED:{_utc(updated_at)}',
+        f'DTSTART:{_utc(slot_time)}',
+        f'DTEND:{_utc(ends_at)}',
+        f'SUMMARY:{_escape(summary)}',
+        f'DESCRIPTION:{_escape("狀態：" + STATUS_LABELS.get(status, status))}',
+        f'STATUS:{STATUSES.get(status, "CONFIRMED")}',
+        'END:VEVENT',
+    ]
+    return ''.join(_fold(line) for line in lines)
+
+
+def generate(kind, owner_id, title, host):
+    """逐段產生 .ics 內容（str）；預約依 CHUNK_SIZE 筆分批讀取"""
+    owner = {'therapist_id': owner_id} if kind == THERAPIST else {'user_id': owner_id}
+    rows = (
+        Appointment.objects.filter(**owner).order_by('slot__slot_time', 'pk')
+        .values_list('pk', 'slot__slot_time', 'slot__ends_at', 'status', 'consultation_type',
+                     'updated_at', 'therapist__name')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    yield _calendar_header(title)
+    events = []
+    for row in rows:
+        events.append(_event(row, kind, host))
+        if len(events) == CHUNK_SIZE:
+            yield ''.join(events)
+            events = []
+    yield ''.join(events) + 'END:VCALENDAR\r\n'
+
+
+def _caching(chunks, key, meta):
+    """串流輸出的同時收集內容，完整輸出後存入快取（過大時只存 ETag 等資訊）"""
+    body, size = [], 0
+    for chunk in chunks:
+        data = chunk.encode()
+        size += len(data)
+        if body is not None:
+            body.append(data)
+            if size > CACHE_MAX_BYTES:
+                body = None
+        yield data
+    entry = {**make_entry(b''.join(body), CONTENT_TYPE), **meta} if body is not None else {**meta, 'bodies': None}
+    cache.set(key, entry, CACHE_TTL)
+
+
+# ───────── 回應 ─────────
+def _stream(kind, owner_id, request, key=None, meta=None):
+    """串流產生內容；有 key 時輸出完畢後存入快取"""
+    title = _title(kind, owner_id)
+    if title is None:
+        raise Http404
+    chunks = generate(kind, owner_id, title, request.get_host())
+    chunks = _caching(chunks, key, meta) if key else (chunk.encode() for chunk in chunks)
+    response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPE)
+    response[CACHE_HEADER] = 'MISS'
+    return response
+
+
+def feed_response(request, kind, owner_id):
+    # 先取得版本再產生內容：產生期間若有異動，內容存在舊版本的鍵下，不會被讀到
+    version_list = versions([_dependency(kind, owner_id), 'therapists'])
+    digest = hashlib.sha256('\n'.join([kind, str(owner_id), request.get_host(), *version_list]).encode()).hexdigest()
+    key, etag = f'ical:e:{digest[:40]}', f'"{digest[:32]}"'
+    entry = cache.get(key)
+
+    if entry is None:
+        # 版本沒變、只是快取項目過期時 ETag 相同，仍可直接回 304
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            entry = {'etag': etag, 'last_modified': int(time.time())}
+            response = _stream(kind, owner_id, request, key, entry)
+    else:
+        response = get_conditional_response(request, etag=etag, last_modified=entry['last_modified'])
+        if response is None:
+            if entry['bodies']:
+                response = build_response(request, entry, hit=True)
+            else:
+                response = _stream(kind, owner_id, request)
+
+    if not response.has_header('ETag'):
+        response['ETag'] = etag
+    if entry is not None:
+        response['Last-Modified'] = http_date(entry['last_modified'])
+    # 每次都需以條件式請求確認；內容屬於個人，共用快取不可保存
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,63 @@
+"""
+預約的時段衝突檢查（時段的重疊條件見 AvailableSlotQuerySet.overlapping()）
+
+- 心理師：同一位心理師已被預約的其他時段與本時段重疊（例如兩段重疊的排班各自產生時段）
+- 使用者：同一位使用者進行中的預約（待確認、已確認）時間重疊
+
+預約時檢查（check_booking），另以 `python manage.py audit_slot_overlaps` 稽核既有資料（user_overlaps）。
+檢查與佔用時段不是同一個語句，同時預約兩個重疊時段仍有極小的競態空間，由稽核找出後人工處理。
+"""
+from datetime import timedelta
+
+from django.db.models import F, Max, Window
+from django.db.models.expressions import RowRange
+
+from therapists.models import SLOT_MAX_MINUTES, AvailableSlot
+
+from .models import Appointment
+
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+
+def therapist_conflicts(slot):
+    return (
+        AvailableSlot.objects.filter(therapist_id=slot.therapist_id, is_booked=True)
+        .overlapping(slot.slot_time, slot.ends_at).exclude(pk=slot.pk)
+    )
+
+
+def user_conflicts(user_id, start, end):
+    # 與 overlapping() 相同的條件，改以 join 表示：由使用者的預約出發，不掃描其他人的時段
+    return Appointment.objects.filter(
+        user_id=user_id, status__in=ACTIVE_STATUSES,
+        slot__slot_time__gt=start - timedelta(minutes=SLOT_MAX_MINUTES),
+        slot__slot_time__lt=end, slot__ends_at__gt=start,
+    )
+
+
+def check_booking(slot, user):
+    """回傳衝突說明，沒有衝突為 None"""
+    if therapist_conflicts(slot).exists():
+        return '此時段與心理師其他已預約的時段重疊'
+    if user_conflicts(user.pk, slot.slot_time, slot.ends_at).exists():
+        return '您在此時段已有其他預約'
+    return None
+
+
+def user_overlaps():
+    """
+    時間重疊的進行中預約（每組重疊回報較晚開始的一筆）；
+    依使用者分區、時段開始時間排序，以視窗函數取得前面預約的最晚結束時間，單一查詢
+    """
+    return (
+        Appointment.objects.filter(status__in=ACTIVE_STATUSES)
+        .annotate(previous_end=Window(
+            Max('slot__ends_at'),
+            partition_by=[F('user_id')],
+            order_by=[F('slot__slot_time').asc(), F('id').asc()],
+            frame=RowRange(start=None, end=-1),
+        ))
+        .filter(previous_end__gt=F('slot__slot_time'))
+        .order_by('user_id', 'slot__slot_time')
+        .values_list('id', 'user_id', 'slot__slot_time', 'slot__ends_at', 'previous_end')
+    )
@@ -0,0 +1,85 @@
+"""
+結帳期間的時段保留
+
+使用者選定時段後先取得保留（預設 SLOT_HOLD_MINUTES 分鐘），填寫 email／身分證期間其他人無法預約；
+帶有效 hold_id 的預約保證成功。
+
+保留狀態直接記在 AvailableSlot（hold_id、held_until），取得保留與預約都是單一列的條件式 UPDATE：
+- 過期的保留不需要排程清除，下一次保留或預約時以條件 held_until <= now 直接覆蓋（lazy reclaim）
+- 同一時段的併發請求由資料列鎖序列化，只有一個 UPDATE 會命中
+
+API 取得的保留記錄保留者（held_by），每個用戶端同時持有的有效保留不超過 SLOT_HOLD_MAX_PER_CLIENT 個；
+同一用戶端併發送出時可能略為超過，請求頻率另由 DRF 節流（slot_hold）限制。
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from therapists.events import emit_slot_event
+from therapists.models import AvailableSlot
+
+HOLD_MINUTES = getattr(settings, 'SLOT_HOLD_MINUTES', 10)
+HOLD_MAX_MINUTES = getattr(settings, 'SLOT_HOLD_MAX_MINUTES', 15)
+MAX_PER_CLIENT = getattr(settings, 'SLOT_HOLD_MAX_PER_CLIENT', 3)
+
+
+class HoldLimitReached(Exception):
+    """用戶端持有的有效保留已達 SLOT_HOLD_MAX_PER_CLIENT"""
+
+
+def active_holds(holder, now=None):
+    return AvailableSlot.objects.filter(held_by=holder, held_until__gt=now or timezone.now(), is_booked=False)
+
+
+def acquire_hold(slot, minutes=None, holder=''):
+    """
+    保留時段；時段已被預約或已有有效保留時回傳 None，成功回傳 (hold_id, held_until)。
+    minutes 上限由呼叫端把關（API 為 SLOT_HOLD_MAX_MINUTES，候補通知為 WAITLIST_OFFER_MINUTES）。
+    holder 為 API 的用戶端識別（見 core.idempotency.client_identity），已達上限時拋出 HoldLimitReached；
+    候補通知等系統保留不指定 holder，不受上限限制。
+    """
+    now = timezone.now()
+    if holder and active_holds(holder, now).count() >= MAX_PER_CLIENT:
+        raise HoldLimitReached
+    hold_id, held_until = uuid.uuid4(), now + timedelta(minutes=minutes or HOLD_MINUTES)
+    updated = AvailableSlot.objects.filter(pk=slot.pk).available(now).update(
+        hold_id=hold_id, held_until=held_until, held_by=holder, updated_at=now,
+    )
+    if not updated:
+        return None
+    emit_slot_event('held', slot, held_until=held_until)
+    return hold_id, held_until
+
+
+def release_hold(hold_id):
+    """提前釋放保留；回傳是否有保留被釋放"""
+    slot = AvailableSlot.objects.filter(hold_id=hold_id, is_booked=False).first()
+    if slot is None:
+        return False
+    released = AvailableSlot.objects.filter(pk=slot.pk, hold_id=hold_id, is_booked=False).update(
+        hold_id=None, held_until=None, held_by='', updated_at=timezone.now(),
+    ) == 1
+    if released:
+        emit_slot_event('released', slot)
+    return released
+
+
+def claim_slot(slot, hold_id=None):
+    """
+    將時段標記為已預約並清除保留，回傳是否成功。
+    帶 hold_id 時只要保留尚未被他人覆蓋即成功（即使剛過期）；
+    否則時段必須沒有有效保留。
+    """
+    now = timezone.now()
+    condition = Q(held_until__isnull=True) | Q(held_until__lte=now)
+    if hold_id:
+        condition |= Q(hold_id=hold_id)
+    claimed = AvailableSlot.objects.filter(condition, pk=slot.pk, is_booked=False).update(
+        is_booked=True, hold_id=None, held_until=None, held_by='', updated_at=now,
+    ) == 1
+    if claimed:
+        emit_slot_event('booked', slot)
+    return claimed
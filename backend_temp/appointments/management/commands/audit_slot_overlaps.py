@@ -0,0 +1,50 @@
+"""
+稽核時間重疊的時段與預約（appointments/conflicts.py、therapists/overlaps.py）
+
+    python manage.py audit_slot_overlaps
+    python manage.py audit_slot_overlaps --therapist 3 8 --future
+
+- 心理師：同一位心理師的時段互相重疊（不論是否已預約）
+- 使用者：同一位使用者進行中（待確認、已確認）的預約時間重疊
+各自以單一視窗函數查詢完成，不做兩兩比較。找到重疊時以非零狀態結束（可放進排程告警）。
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from appointments.conflicts import user_overlaps
+from therapists.overlaps import therapist_overlaps
+
+
+def _local(value):
+    return f'{timezone.localtime(value):%Y-%m-%d %H:%M}'
+
+
+class Command(BaseCommand):
+    help = '找出同一心理師重疊的時段，以及同一使用者時間重疊的預約'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--therapist', type=int, nargs='+', help='只檢查指定心理師的時段')
+        parser.add_argument('--future', action='store_true', help='只列出尚未開始的項目')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        slots = list(therapist_overlaps(options['therapist']))
+        appointments = list(user_overlaps())
+        if options['future']:
+            slots = [row for row in slots if row[2] > now]
+            appointments = [row for row in appointments if row[2] > now]
+
+        for slot_id, therapist_id, start, end, previous_end in slots:
+            self.stdout.write(
+                f'  心理師 {therapist_id}  時段 {slot_id}  {_local(start)}–{_local(end)}'
+                f'  與前一時段重疊（至 {_local(previous_end)}）'
+            )
+        for appointment_id, user_id, start, end, previous_end in appointments:
+            self.stdout.write(
+                f'  使用者 {user_id}  預約 {appointment_id}  {_local(start)}–{_local(end)}'
+                f'  與前一預約重疊（至 {_local(previous_end)}）'
+            )
+
+        if slots or appointments:
+            raise CommandError(f'{len(slots)} 個重疊的時段、{len(appointments)} 筆重疊的預約')
+        self.stdout.write(self.style.SUCCESS('沒有重疊的時段或預約'))
@@ -0,0 +1,307 @@
+"""
+預約流程壓力測試：併發搶同一時段／不同時段，統計成功、衝突、錯誤與延遲分佈，並於結束後檢查資料一致性
+
+    # 對執行中的伺服器（需與本指令使用同一個資料庫）
+    python manage.py loadtest_booking --base-url http://127.0.0.1:8000 --scenario hot -n 200 -c 20
+    python manage.py loadtest_booking --base-url http://127.0.0.1:8000 --processes 4 -c 32 --rps 50
+    # 不啟動伺服器，在本行程內以多執行緒呼叫
+    python manage.py loadtest_booking --scenario mixed -n 100 -c 8
+
+情境：
+- hot    所有請求搶 --hot-slots 個時段（每個時段應只有一筆成功）
+- spread 每個請求各自預約不同時段（量測無競爭時的吞吐量）
+- mixed  --hot-ratio 比例的請求搶熱門時段，其餘分散
+
+結束後檢查：
+- 沒有任何時段被預約兩次
+- AvailableSlot.is_booked 與 Appointment 紀錄一致
+- 回報成功（201）的請求在資料庫都有對應預約
+"""
+import http.client
+import json
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.db.models import Count
+from django.urls import reverse
+from django.utils import timezone
+
+from appointments.models import Appointment
+from therapists.availability import refresh as refresh_availability
+from therapists.models import AvailableSlot
+
+User = get_user_model()
+
+LOADTEST_EMAIL_DOMAIN = 'loadtest.example.com'
+LOADTEST_ID_NUMBER = 'A123456789'
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+# ───────── 送出請求（可在子行程中執行，不依賴 Django ORM） ─────────
+class HttpSender:
+    """每個執行緒各自保留一條 keep-alive 連線"""
+
+    def __init__(self, base_url, path):
+        parts = urlsplit(base_url)
+        self.conn_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.path = parts.path.rstrip('/') + path
+        self.local = threading.local()
+
+    def __call__(self, payload):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = self.conn_class(self.netloc, timeout=30)
+        try:
+            conn.request('POST', self.path, body=json.dumps(payload),
+                         headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            return response.status, response.read()[:300]
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self.local.conn = None
+            raise
+
+
+class InProcessSender:
+    """以 django.test.Client 在本行程內呼叫；每個執行緒自己的 Client 與 DB 連線"""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def __call__(self, payload):
+        from django.test import Client
+
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = Client(raise_request_exception=False)
+        try:
+            response = client.post(self.path, data=json.dumps(payload), content_type='application/json')
+            return response.status_code, response.content[:300]
+        finally:
+            close_old_connections()
+
+
+def run_plans(sender, plans, threads, started_at, rps):
+    """
+    以 threads 個執行緒送出 plans；rps > 0 時第 i 個請求排在 started_at + i / rps 送出。
+    回傳 [(index, status, latency_ms, body)]，status 為 None 表示連線錯誤。
+    """
+    def fire(item):
+        index, payload = item
+        if rps:
+            delay = started_at + index / rps - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        start = time.perf_counter()
+        try:
+            status, body = sender(payload)
+        except Exception as exc:  # noqa: BLE001 — 連線錯誤也要計入統計
+            status, body = None, repr(exc).encode()[:300]
+        return index, status, (time.perf_counter() - start) * 1000, body
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(fire, plans))
+
+
+def _run_http_process(base_url, path, plans, threads, started_at, rps):
+    return run_plans(HttpSender(base_url, path), plans, threads, started_at, rps)
+
+
+def classify(status, body):
+    if status == 201:
+        return 'success'
+    # 時段已被預約：序列化器驗證失敗（400，錯誤在 slot 欄位）或 409
+    if status == 409 or (status == 400 and b'slot' in body):
+        return 'conflict'
+    return 'error'
+
+
+class Command(BaseCommand):
+    help = '併發預約壓力測試，統計成功／衝突／錯誤與延遲，並驗證預約資料一致性'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', choices=['hot', 'spread', 'mixed'], default='mixed')
+        parser.add_argument('-n', '--requests', type=int, default=200, help='總請求數')
+        parser.add_argument('-c', '--concurrency', type=int, default=16, help='總併發數（執行緒總數）')
+        parser.add_argument('--processes', type=int, default=1, help='以多個行程送出（僅 --base-url 模式）')
+        parser.add_argument('--rps', type=float, default=0, help='目標每秒請求數（0 = 不限速）')
+        parser.add_argument('--hot-slots', type=int, default=1, help='熱門時段數量')
+        parser.add_argument('--hot-ratio', type=float, default=0.5, help='mixed 情境中搶熱門時段的比例')
+        parser.add_argument('--base-url', help='伺服器位址；未指定時在本行程內呼叫')
+        parser.add_argument('--therapist', type=int, help='只使用指定心理師的時段')
+        parser.add_argument('--seed', type=int, default=42, help='亂數種子')
+        parser.add_argument('--keep', action='store_true', help='保留本次建立的預約（預設結束後清除）')
+
+    def handle(self, *args, **options):
+        if options['processes'] > 1 and not options['base_url']:
+            raise CommandError('--processes 需搭配 --base-url（子行程透過 HTTP 送出請求）')
+
+        rng = random.Random(options['seed'])
+        self.run_id = f"{int(time.time())}-{rng.randrange(10_000):04d}"
+        plans, hot_ids, target_ids = self.build_plans(options, rng)
+
+        path = reverse('appointment-list')
+        # 子行程／執行緒會各自開連線，先關閉主行程的連線
+        connections.close_all()
+        started_at = time.time() + 0.2
+        results = self.fire_requests(plans, path, options, started_at)
+        elapsed = time.time() - started_at
+
+        self.report(results, elapsed)
+        failures = self.verify(results, plans, hot_ids, target_ids)
+        if not options['keep']:
+            self.cleanup(target_ids)
+        if failures:
+            raise CommandError('資料一致性檢查失敗：\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('資料一致性檢查通過'))
+
+    # ───────── 產生請求 ─────────
+    def build_plans(self, options, rng):
+        qs = AvailableSlot.objects.available()
+        if options['therapist']:
+            qs = qs.filter(therapist_id=options['therapist'])
+
+        total = options['requests']
+        hot_count = {'hot': total, 'spread': 0, 'mixed': int(total * options['hot_ratio'])}[options['scenario']]
+        needed = (options['hot_slots'] if hot_count else 0) + (total - hot_count)
+        slots = list(qs.order_by('slot_time', 'id').values_list('id', 'therapist__consultation_modes')[:needed])
+        if len(slots) < needed:
+            raise CommandError(f"可預約時段不足（需要 {needed}，僅有 {len(slots)}）；請先執行 seed_benchmark")
+
+        hot = slots[:options['hot_slots']] if hot_count else []
+        spread = slots[len(hot):]
+        targets = [rng.choice(hot) for _ in range(hot_count)] + spread
+        rng.shuffle(targets)
+
+        plans = [
+            (index, {
+                # 每個請求都是新使用者，走完整的「預約即註冊」流程
+                'email': f'lt-{self.run_id}-{index}@{LOADTEST_EMAIL_DOMAIN}',
+                'id_number': LOADTEST_ID_NUMBER,
+                'slot': slot_id,
+                'consultation_type': modes[0] if modes else 'online',
+            })
+            for index, (slot_id, modes) in enumerate(targets)
+        ]
+        self.stdout.write(
+            f"情境 {options['scenario']}：{len(plans)} 個請求，熱門時段 {len(hot)} 個"
+            f"（{hot_count} 個請求），分散時段 {len(spread)} 個"
+        )
+        return plans, {slot_id for slot_id, _ in hot}, {slot_id for slot_id, _ in slots}
+
+    def fire_requests(self, plans, path, options, started_at):
+        concurrency, rps = options['concurrency'], options['rps']
+        if not options['base_url']:
+            return run_plans(InProcessSender(path), plans, concurrency, started_at, rps)
+        if options['processes'] == 1:
+            return run_plans(HttpSender(options['base_url'], path), plans, concurrency, started_at, rps)
+
+        processes = options['processes']
+        threads = max(1, concurrency // processes)
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [
+                pool.submit(_run_http_process, options['base_url'], path,
+                            plans[i::processes], threads, started_at, rps)
+                for i in range(processes)
+            ]
+            return sorted(item for future in futures for item in future.result())
+
+    # ───────── 統計 ─────────
+    def report(self, results, elapsed):
+        outcomes = {'success': 0, 'conflict': 0, 'error': 0}
+        statuses = {}
+        for _index, status, _latency, body in results:
+            outcomes[classify(status, body)] += 1
+            statuses[status] = statuses.get(status, 0) + 1
+
+        total = len(results)
+        self.stdout.write(f"\n完成 {total} 個請求，耗時 {elapsed:.2f}s（{total / elapsed:.1f} req/s）")
+        for key, label in (('success', '成功'), ('conflict', '衝突'), ('error', '錯誤')):
+            self.stdout.write(f"  {label} {outcomes[key]:>6}  ({outcomes[key] / total:6.1%})")
+        self.stdout.write('  狀態碼：' + ', '.join(
+            f"{status if status is not None else '連線錯誤'}×{count}"
+            for status, count in sorted(statuses.items(), key=lambda kv: str(kv[0]))
+        ))
+
+        latencies = sorted(latency for _i, _s, latency, _b in results)
+        pick = lambda pct: latencies[min(total - 1, int(pct / 100 * (total - 1) + 0.5))]  # noqa: E731
+        self.stdout.write(
+            f"\n延遲 p50 {pick(50):.1f} ms  p90 {pick(90):.1f} ms  p99 {pick(99):.1f} ms  max {latencies[-1]:.1f} ms"
+        )
+        lower = 0
+        for upper in HISTOGRAM_BUCKETS_MS + (float('inf'),):
+            count = sum(1 for latency in latencies if lower <= latency < upper)
+            label = f"{lower:>5}–{upper:<5}" if upper != float('inf') else f"{lower:>5}+     "
+            self.stdout.write(f"  {label} ms {count:>6} {'█' * round(40 * count / total)}")
+            lower = upper
+
+        errors = [body for _i, status, _l, body in results if classify(status, body) == 'error']
+        for body in errors[:3]:
+            self.stdout.write(self.style.WARNING(f"  錯誤範例：{body[:200]!r}"))
+
+    # ───────── 一致性檢查 ─────────
+    def verify(self, results, plans, hot_ids, target_ids):
+        failures = []
+
+        double_booked = list(
+            Appointment.objects.filter(slot_id__in=target_ids)
+            .values('slot_id').annotate(n=Count('id')).filter(n__gt=1)
+        )
+        if double_booked:
+            failures.append(f"  重複預約的時段：{double_booked}")
+
+        flagged_without_appointment = list(
+            AvailableSlot.objects.filter(id__in=target_ids, is_booked=True, appointment__isnull=True)
+            .values_list('id', flat=True)
+        )
+        if flagged_without_appointment:
+            failures.append(f"  is_booked=True 但沒有預約的時段：{flagged_without_appointment}")
+
+        booked_but_free = list(
+            AvailableSlot.objects.filter(id__in=target_ids, is_booked=False, appointment__isnull=False)
+            .values_list('id', flat=True)
+        )
+        if booked_but_free:
+            failures.append(f"  有預約但 is_booked=False 的時段：{booked_but_free}")
+
+        payloads = dict(plans)
+        succeeded = {
+            payloads[index]['email']: payloads[index]['slot']
+            for index, status, _l, body in results if classify(status, body) == 'success'
+        }
+        stored = dict(
+            Appointment.objects.filter(user__email__in=succeeded).values_list('user__email', 'slot_id')
+        )
+        missing = [email for email, slot_id in succeeded.items() if stored.get(email) != slot_id]
+        if missing:
+            failures.append(f"  回報成功但資料庫沒有對應預約：{len(missing)} 筆")
+
+        hot_wins = {}
+        for slot_id in succeeded.values():
+            if slot_id in hot_ids:
+                hot_wins[slot_id] = hot_wins.get(slot_id, 0) + 1
+        over = {slot_id: n for slot_id, n in hot_wins.items() if n > 1}
+        if over:
+            failures.append(f"  熱門時段回報多次成功：{over}")
+        return failures
+
+    def cleanup(self, target_ids):
+        users = User.objects.filter(email__startswith=f'lt-{self.run_id}-', email__endswith=LOADTEST_EMAIL_DOMAIN)
+        Appointment.objects.filter(user__in=users).delete()
+        users.delete()
+        AvailableSlot.objects.filter(id__in=target_ids, appointment__isnull=True).update(
+            is_booked=False, updated_at=timezone.now(),
+        )
+        # 批次刪除／更新不發出訊號，直接重算心理師的最近可預約時間
+        refresh_availability(set(
+            AvailableSlot.objects.filter(id__in=target_ids).values_list('therapist_id', flat=True)
+        ))
+        self.stdout.write('已清除本次壓測建立的預約與使用者')
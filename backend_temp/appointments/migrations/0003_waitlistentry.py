@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_initial'),
+        ('therapists', '0006_availableslot_hold'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('consultation_type', models.CharField(choices=[('online', '線上'), ('offline', '實體')], help_text='諮詢方式：線上或實體', max_length=20)),
+                ('weekdays', models.PositiveSmallIntegerField(default=0, help_text='偏好星期的位元遮罩（週一 = 1 … 週日 = 64），0 表示不限')),
+                ('earliest_time', models.TimeField(blank=True, help_text='偏好最早開始時間（不填表示不限）', null=True)),
+                ('latest_time', models.TimeField(blank=True, help_text='偏好最晚開始時間（不填表示不限）', null=True)),
+                ('status', models.CharField(choices=[('waiting', '候補中'), ('offered', '已通知'), ('booked', '已預約'), ('cancelled', '已取消')], default='waiting', max_length=20)),
+                ('offer_hold_id', models.UUIDField(blank=True, help_text='通知時段的保留識別碼，預約時帶入', null=True)),
+                ('offer_expires_at', models.DateTimeField(blank=True, help_text='保留到期時間', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('offered_slot', models.ForeignKey(blank=True, help_text='目前通知的時段', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='therapists.availableslot')),
+                ('therapist', models.ForeignKey(help_text='候補的心理師', on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='therapists.therapistprofile')),
+                ('user', models.ForeignKey(help_text='候補的使用者', on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['therapist', 'status', 'created_at'], name='waitlist_match_idx'), models.Index(fields=['status', 'offer_expires_at'], name='waitlist_offer_expiry_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0006_appointment_no_show_status'),
+        ('therapists', '0010_availableslot_ends_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('consultation_type', models.CharField(choices=[('online', '線上'), ('offline', '實體')], help_text='諮詢方式：線上或實體', max_length=20)),
+                ('interval_weeks', models.PositiveSmallIntegerField(default=1, help_text='每幾週一次')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('therapist', models.ForeignKey(help_text='預約的心理師', on_delete=django.db.models.deletion.CASCADE, related_name='appointment_series', to='therapists.therapistprofile')),
+                ('user', models.ForeignKey(help_text='預約的使用者', on_delete=django.db.models.deletion.CASCADE, related_name='appointment_series', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '週期預約',
+                'verbose_name_plural': '週期預約',
+            },
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='series',
+            field=models.ForeignKey(blank=True, help_text='所屬的週期預約（單次預約為空）', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='appointments.appointmentseries'),
+        ),
+    ]
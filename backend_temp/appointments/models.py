@@ -13,6 +13,7 @@ class Appointment(models.Model):
         ('confirmed', '已確認'),
         ('completed', '已完成'),
         ('cancelled', '已取消'),
+        ('no_show', '未出席'),
     ]
 
     user = models.ForeignKey(
@@ -50,10 +51,29 @@ class Appointment(models.Model):
         default='pending',
         help_text='預約狀態'
     )
+    series = models.ForeignKey(
+        'AppointmentSeries',
+        null=True, blank=True,
+        on_delete=models.SET_NULL,
+        related_name='appointments',
+        help_text='所屬的週期預約（單次預約為空）'
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         help_text='建立時間'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        help_text='最後修改時間，供增量同步（?updated_since=）使用'
+    )
+
+    class Meta:
+        indexes = [
+            # 使用者／心理師的預約列表：WHERE user_id／therapist_id = ? ORDER BY created_at DESC
+            models.Index(fields=['user', '-created_at'], name='appt_user_created_idx'),
+            models.Index(fields=['therapist', '-created_at'], name='appt_therapist_created_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if self.price in (None, Decimal('0'), ''):
@@ -63,13 +83,110 @@ class Appointment(models.Model):
 
         if not self.slot.is_booked:
             self.slot.is_booked = True
-            self.slot.save(update_fields=['is_booked'])
+            self.slot.save(update_fields=['is_booked', 'updated_at'])
 
     def delete(self, *args, **kwargs):
         slot = self.slot
         super().delete(*args, **kwargs)
         slot.is_booked = False
-        slot.save(update_fields=['is_booked'])
+        slot.save(update_fields=['is_booked', 'updated_at'])
+
+    def __str__(self):
+        return f"{self.user.email} → {self.therapist.name} @ {self.slot.slot_time}"
+
+
+class AppointmentSeries(models.Model):
+    """
+    週期預約：同一位使用者每隔 interval_weeks 週、在相同星期與時間預約同一位心理師。
+    各次預約以 Appointment.series 關聯，可一次取消或改期（見 appointments/series.py）。
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='appointment_series',
+        help_text='預約的使用者'
+    )
+    therapist = models.ForeignKey(
+        'therapists.TherapistProfile',
+        on_delete=models.CASCADE,
+        related_name='appointment_series',
+        help_text='預約的心理師'
+    )
+    consultation_type = models.CharField(
+        max_length=20,
+        choices=Appointment.CONSULTATION_CHOICES,
+        help_text='諮詢方式：線上或實體'
+    )
+    interval_weeks = models.PositiveSmallIntegerField(default=1, help_text='每幾週一次')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = '週期預約'
+        verbose_name_plural = '週期預約'
+
+    def __str__(self):
+        return f"{self.user.email} → {self.therapist.name}（每 {self.interval_weeks} 週）"
+
+
+class WaitlistEntry(models.Model):
+    """
+    心理師約滿時的候補登記。
+    有時段釋出（取消預約、新增時段）時由 appointments.waitlist 依登記順序配對，
+    配對成功即替候補者保留該時段（offer），候補者以 offer_hold_id 預約即保證成功。
+    """
+    STATUS_CHOICES = [
+        ('waiting', '候補中'),
+        ('offered', '已通知'),
+        ('booked', '已預約'),
+        ('cancelled', '已取消'),
+    ]
+    # 週一 = 1 << 0 … 週日 = 1 << 6（對應 datetime.weekday()）
+    WEEKDAY_BITS = {day: 1 << index for index, day in enumerate(
+        ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'])}
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        help_text='候補的使用者'
+    )
+    therapist = models.ForeignKey(
+        'therapists.TherapistProfile',
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        help_text='候補的心理師'
+    )
+    consultation_type = models.CharField(
+        max_length=20,
+        choices=Appointment.CONSULTATION_CHOICES,
+        help_text='諮詢方式：線上或實體'
+    )
+    weekdays = models.PositiveSmallIntegerField(
+        default=0,
+        help_text='偏好星期的位元遮罩（週一 = 1 … 週日 = 64），0 表示不限'
+    )
+    earliest_time = models.TimeField(null=True, blank=True, help_text='偏好最早開始時間（不填表示不限）')
+    latest_time = models.TimeField(null=True, blank=True, help_text='偏好最晚開始時間（不填表示不限）')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
+    offered_slot = models.ForeignKey(
+        'therapists.AvailableSlot',
+        null=True, blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        help_text='目前通知的時段'
+    )
+    offer_hold_id = models.UUIDField(null=True, blank=True, help_text='通知時段的保留識別碼，預約時帶入')
+    offer_expires_at = models.DateTimeField(null=True, blank=True, help_text='保留到期時間')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            # 配對：指定心理師的候補者依登記順序
+            models.Index(fields=['therapist', 'status', 'created_at'], name='waitlist_match_idx'),
+            # 逾期 offer 的回收
+            models.Index(fields=['status', 'offer_expires_at'], name='waitlist_offer_expiry_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user.email} → {self.therapist.name} @ {self.slot.start_time}"
+        return f"{self.user.email} ⧗ {self.therapist.name} ({self.get_status_display()})"
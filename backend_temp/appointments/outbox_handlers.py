@@ -0,0 +1,126 @@
+"""
+預約相關的背景副作用（由 run_worker 執行）
+
+handler 只收到事件 payload（id 等），需要的資料在執行時重新查詢；
+資料已不存在（例如預約在處理前就被取消）時直接略過。
+"""
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.outbox import handler
+
+from .models import Appointment, AppointmentSeries, WaitlistEntry
+
+
+def _format_time(value):
+    return f"{timezone.localtime(value):%Y-%m-%d %H:%M}"
+
+
+@handler('appointment.created')
+def send_booking_confirmation(payload):
+    appointment = (
+        Appointment.objects.select_related('user', 'therapist__user', 'slot')
+        .filter(pk=payload['appointment_id']).first()
+    )
+    if appointment is None:
+        return
+    when = _format_time(appointment.slot.slot_time)
+    send_mail(
+        '預約確認',
+        f"您已預約 {appointment.therapist.name} 心理師 {when} 的"
+        f"{appointment.get_consultation_type_display()}諮詢。",
+        settings.DEFAULT_FROM_EMAIL,
+        [appointment.user.email],
+    )
+    therapist_user = appointment.therapist.user
+    if therapist_user is not None and therapist_user.email:
+        send_mail(
+            '新預約通知',
+            f"{when} 有新的{appointment.get_consultation_type_display()}預約。",
+            settings.DEFAULT_FROM_EMAIL,
+            [therapist_user.email],
+        )
+
+
+@handler('appointment.cancelled')
+def send_cancellation_notice(payload):
+    send_mail(
+        '預約已取消',
+        f"您預約的 {payload['therapist']} 心理師 {_format_time(parse_datetime(payload['slot_time']))} 諮詢已取消。",
+        settings.DEFAULT_FROM_EMAIL,
+        [payload['email']],
+    )
+
+
+def _series_notice(series_id, subject, action):
+    series = AppointmentSeries.objects.select_related('user', 'therapist__user').filter(pk=series_id).first()
+    if series is None:
+        return
+    times = [
+        _format_time(slot_time)
+        for slot_time in series.appointments.filter(status__in=('pending', 'confirmed'))
+        .order_by('slot__slot_time').values_list('slot__slot_time', flat=True)
+    ]
+    if not times:
+        return
+    listing = '\n'.join(times)
+    send_mail(
+        subject,
+        f"您已{action} {series.therapist.name} 心理師的"
+        f"{series.get_consultation_type_display()}諮詢，共 {len(times)} 次：\n{listing}",
+        settings.DEFAULT_FROM_EMAIL,
+        [series.user.email],
+    )
+    therapist_user = series.therapist.user
+    if therapist_user is not None and therapist_user.email:
+        send_mail(
+            f'週期預約通知（{action}）',
+            f"{series.user.email} {action}{series.get_consultation_type_display()}諮詢，共 {len(times)} 次：\n{listing}",
+            settings.DEFAULT_FROM_EMAIL,
+            [therapist_user.email],
+        )
+
+
+@handler('appointment.series_created')
+def send_series_confirmation(payload):
+    _series_notice(payload['series_id'], '週期預約確認', '預約')
+
+
+@handler('appointment.series_rescheduled')
+def send_series_reschedule_notice(payload):
+    _series_notice(payload['series_id'], '週期預約改期', '改期')
+
+
+@handler('appointment.series_cancelled')
+def send_series_cancellation_notice(payload):
+    listing = '\n'.join(_format_time(parse_datetime(value)) for value in payload['slot_times'])
+    send_mail(
+        '週期預約已取消',
+        f"您預約的 {payload['therapist']} 心理師以下諮詢已取消：\n{listing}",
+        settings.DEFAULT_FROM_EMAIL,
+        [payload['email']],
+    )
+
+
+@handler('waitlist.offered')
+def send_waitlist_offer(payload):
+    entry = (
+        WaitlistEntry.objects.select_related('user', 'therapist', 'offered_slot')
+        .filter(pk=payload['entry_id'], status='offered').first()
+    )
+    if entry is None or entry.offered_slot is None:
+        return
+    query = urlencode({'slot': entry.offered_slot_id, 'hold_id': entry.offer_hold_id})
+    send_mail(
+        '候補時段通知',
+        f"{entry.therapist.name} 心理師 {_format_time(entry.offered_slot.slot_time)} 有空檔，"
+        f"已為您保留至 {_format_time(entry.offer_expires_at)}，請盡快完成預約：\n"
+        f"{settings.BOOKING_URL}?{query}\n"
+        f"（保留代碼：{entry.offer_hold_id}，預約時帶入即保證成功）",
+        settings.DEFAULT_FROM_EMAIL,
+        [entry.user.email],
+    )
@@ -1,22 +1,44 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 from therapists.models import AvailableSlot
-from .models import Appointment
+from .conflicts import check_booking
+from .holds import HOLD_MAX_MINUTES, claim_slot
+from .models import Appointment, AppointmentSeries, WaitlistEntry
+from .series import MAX_INTERVAL_WEEKS, MAX_OCCURRENCES, SeriesUnavailable, book_series
+from .waitlist import mark_offer_booked
+from core.outbox import publish
 import hashlib
 
 User = get_user_model()
 
+def resolve_user(email, raw_id):
+    """以 email + 身分證號取得使用者；第一次使用時自動建立帳號"""
+    try:
+        user = User.objects.get(email=email)
+        if not user.check_id_number(raw_id):
+            raise serializers.ValidationError({'id_number': '身分證號不符'})
+    except User.DoesNotExist:
+        user = User(username=email, email=email)
+        user.set_unusable_password()
+        user.set_id_number(raw_id)
+        user.save()
+    return user
+
+
 class AppointmentSerializer(serializers.ModelSerializer):
     slot = serializers.PrimaryKeyRelatedField(read_only=True)
+    series = serializers.PrimaryKeyRelatedField(read_only=True)
     user = serializers.ReadOnlyField(source='user.email')
     therapist = serializers.ReadOnlyField(source='therapist.name')
 
     class Meta:
         model = Appointment
         fields = [
-            'id', 'user', 'therapist', 'slot',
+            'id', 'user', 'therapist', 'slot', 'series',
             'consultation_type', 'price',
-            'status', 'created_at'
+            'status', 'created_at', 'updated_at'
         ]
         read_only_fields = fields
 
@@ -37,24 +59,202 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
         choices=Appointment.CONSULTATION_CHOICES,
         help_text='諮詢方式：online 或 offline'
     )
+    hold_id = serializers.UUIDField(
+        required=False,
+        write_only=True,
+        help_text='POST /api/appointments/holds/ 取得的保留識別碼；帶有效保留的預約保證成功'
+    )
 
     class Meta:
         model = Appointment
-        fields = ['email', 'id_number', 'slot', 'consultation_type']
+        fields = ['email', 'id_number', 'slot', 'consultation_type', 'hold_id']
 
+    @transaction.atomic
     def create(self, validated_data):
         email = validated_data.pop('email')
         raw_id = validated_data.pop('id_number')
+        hold_id = validated_data.pop('hold_id', None)
 
-        try:
-            user = User.objects.get(email=email)
-            if not user.check_id_number(raw_id):
-                raise serializers.ValidationError({'id_number': '身分證號不符'})
-        except User.DoesNotExist:
-            user = User(username=email, email=email)
-            user.set_unusable_password()
-            user.set_id_number(raw_id)
-            user.save()
+        user = resolve_user(email, raw_id)
+
+        # 以條件式 UPDATE 佔用時段：已被預約或被他人保留中則失敗，不會產生重複預約
+        slot = validated_data['slot']
+        conflict = check_booking(slot, user)
+        if conflict:
+            raise serializers.ValidationError({'slot': conflict})
+        if not claim_slot(slot, hold_id):
+            raise serializers.ValidationError({'slot': '此時段已被預約或保留中'})
+        slot.is_booked = True
+        if hold_id:
+            mark_offer_booked(slot.pk, hold_id)
 
+        # 心理師由時段決定
+        validated_data['therapist'] = slot.therapist
         appointment = Appointment.objects.create(user=user, **validated_data)
+        # 確認信等副作用交由 run_worker 處理，與預約同一個交易提交
+        publish('appointment.created', appointment_id=appointment.pk)
         return appointment
+
+
+class SeriesOccurrenceSerializer(serializers.ModelSerializer):
+    slot_time = serializers.DateTimeField(source='slot.slot_time', read_only=True)
+    ends_at = serializers.DateTimeField(source='slot.ends_at', read_only=True)
+
+    class Meta:
+        model = Appointment
+        fields = ['id', 'slot', 'slot_time', 'ends_at', 'price', 'status']
+        read_only_fields = fields
+
+
+class AppointmentSeriesSerializer(serializers.ModelSerializer):
+    therapist = serializers.ReadOnlyField(source='therapist.name')
+    therapist_id = serializers.ReadOnlyField()
+    appointments = SeriesOccurrenceSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = AppointmentSeries
+        fields = [
+            'id', 'therapist', 'therapist_id', 'consultation_type',
+            'interval_weeks', 'appointments', 'created_at',
+        ]
+        read_only_fields = fields
+
+
+class SeriesSlotSerializer(serializers.Serializer):
+    """週期預約、改期的第一個時段（其餘依間隔週數推算）"""
+    first_slot = serializers.PrimaryKeyRelatedField(
+        queryset=AvailableSlot.objects.filter(is_booked=False).select_related('therapist'),
+        help_text='第一次預約的 AvailableSlot id；之後每隔 interval_weeks 週的相同時間'
+    )
+    hold_id = serializers.UUIDField(
+        required=False,
+        write_only=True,
+        help_text='第一個時段的保留識別碼（POST /api/appointments/holds/）'
+    )
+
+    def validate_first_slot(self, slot):
+        if slot.slot_time <= timezone.now():
+            raise serializers.ValidationError('此時段已開始')
+        return slot
+
+
+class AppointmentSeriesCreateSerializer(SeriesSlotSerializer):
+    email = serializers.EmailField(write_only=True, help_text='用戶電子郵件')
+    id_number = serializers.CharField(write_only=True, help_text='用戶身分證號，後端雜湊比對')
+    occurrences = serializers.IntegerField(
+        min_value=2,
+        max_value=MAX_OCCURRENCES,
+        help_text='預約次數（含第一次），上限 SERIES_MAX_OCCURRENCES'
+    )
+    interval_weeks = serializers.IntegerField(
+        default=1,
+        min_value=1,
+        max_value=MAX_INTERVAL_WEEKS,
+        help_text='每幾週一次'
+    )
+    consultation_type = serializers.ChoiceField(
+        choices=Appointment.CONSULTATION_CHOICES,
+        help_text='諮詢方式：online 或 offline'
+    )
+    allow_partial = serializers.BooleanField(
+        default=False,
+        help_text='部分時間無法預約時，是否只預約可預約的部分（預設整批失敗）'
+    )
+
+    def validate(self, attrs):
+        therapist = attrs['first_slot'].therapist
+        if therapist.consultation_modes and attrs['consultation_type'] not in therapist.consultation_modes:
+            raise serializers.ValidationError({'consultation_type': '此心理師未提供這種諮詢方式'})
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        user = resolve_user(validated_data['email'], validated_data['id_number'])
+        try:
+            series, skipped = book_series(
+                user, validated_data['first_slot'], validated_data['occurrences'],
+                validated_data['consultation_type'], validated_data['interval_weeks'],
+                allow_partial=validated_data['allow_partial'], hold_id=validated_data.get('hold_id'),
+            )
+        except SeriesUnavailable as exc:
+            raise series_unavailable_error(exc)
+        series.skipped = skipped
+        return series
+
+
+def series_unavailable_error(exc):
+    if not exc.unavailable:
+        return serializers.ValidationError({'first_slot': '時段已被預約，請重新選擇'})
+    return serializers.ValidationError({
+        'first_slot': f'有 {len(exc.unavailable)} 次無法預約',
+        'unavailable': [
+            {'slot_time': slot_time.isoformat(), 'reason': reason} for slot_time, reason in exc.unavailable
+        ],
+    })
+
+
+class SlotHoldSerializer(serializers.Serializer):
+    slot = serializers.PrimaryKeyRelatedField(
+        queryset=AvailableSlot.objects.all(),
+        help_text='要保留的 AvailableSlot id'
+    )
+    minutes = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=HOLD_MAX_MINUTES,
+        help_text='保留分鐘數（預設 SLOT_HOLD_MINUTES）'
+    )
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    therapist = serializers.ReadOnlyField(source='therapist.name')
+    therapist_id = serializers.ReadOnlyField()
+    weekdays = serializers.SerializerMethodField()
+    offered_slot_time = serializers.DateTimeField(source='offered_slot.slot_time', read_only=True, default=None)
+
+    class Meta:
+        model = WaitlistEntry
+        fields = [
+            'id', 'therapist', 'therapist_id', 'consultation_type',
+            'weekdays', 'earliest_time', 'latest_time', 'status',
+            'offered_slot', 'offered_slot_time', 'offer_hold_id', 'offer_expires_at',
+            'created_at',
+        ]
+        read_only_fields = fields
+
+    def get_weekdays(self, obj):
+        return [day for day, bit in WaitlistEntry.WEEKDAY_BITS.items() if obj.weekdays & bit]
+
+
+class WaitlistEntryCreateSerializer(serializers.ModelSerializer):
+    email = serializers.EmailField(write_only=True, help_text='用戶電子郵件')
+    id_number = serializers.CharField(write_only=True, help_text='用戶身分證號，後端雜湊比對')
+    weekdays = serializers.ListField(
+        child=serializers.ChoiceField(choices=list(WaitlistEntry.WEEKDAY_BITS)),
+        required=False,
+        help_text='偏好星期，如 ["monday", "friday"]；不填表示不限'
+    )
+
+    class Meta:
+        model = WaitlistEntry
+        fields = ['email', 'id_number', 'therapist', 'consultation_type',
+                  'weekdays', 'earliest_time', 'latest_time']
+
+    def validate(self, attrs):
+        therapist = attrs['therapist']
+        if therapist.consultation_modes and attrs['consultation_type'] not in therapist.consultation_modes:
+            raise serializers.ValidationError({'consultation_type': '此心理師未提供這種諮詢方式'})
+        earliest, latest = attrs.get('earliest_time'), attrs.get('latest_time')
+        if earliest and latest and earliest > latest:
+            raise serializers.ValidationError({'latest_time': '最晚時間不可早於最早時間'})
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        user = resolve_user(validated_data.pop('email'), validated_data.pop('id_number'))
+        if WaitlistEntry.objects.filter(
+                user=user, therapist=validated_data['therapist'], status__in=['waiting', 'offered']).exists():
+            raise serializers.ValidationError({'therapist': '已在此心理師的候補名單中'})
+        days = validated_data.pop('weekdays', [])
+        validated_data['weekdays'] = sum(WaitlistEntry.WEEKDAY_BITS[day] for day in set(days))
+        return WaitlistEntry.objects.create(user=user, **validated_data)
@@ -0,0 +1,231 @@
+"""
+週期預約（/api/appointments/series/）：同一位心理師每隔 interval_weeks 週、相同星期與時間的一組預約
+
+單次預約每筆各自檢查衝突、以條件式 UPDATE 佔用時段、經 Appointment.save() 的訊號更新統計；
+週期預約改以集合處理，12 次與單次預約的查詢數相當：
+1. occurrence_times()：由第一個時段的當地日期與時間推算每次的開始時間（跨日光節約時間仍為同一當地時間）
+2. 以 slot_time IN (...) 一次取出並鎖定可預約的時段（SELECT … FOR UPDATE SKIP LOCKED：
+   正被其他交易預約的時段視為無法預約，不等待）
+3. 心理師已預約的時段、使用者進行中的預約各以一個範圍查詢取出，在記憶體內以 IntervalIndex 檢查重疊
+4. 一個條件式 UPDATE 佔用全部時段（筆數不符即整批回滾），bulk_create 建立預約
+5. 建立、改期以 bulk_create／bulk_update 寫入，訊號原本的連帶處理（月報表、最近可預約時間、時段事件、
+   候補配對、行事曆訂閱）以集合一次完成，通知信為一個 outbox 事件；預約、時段的訊號處理有增減時需一併更新這裡。
+   取消以 QuerySet.delete() 刪除預約，月報表、刪除紀錄與行事曆訂閱由各筆的 post_delete 訊號處理
+
+allow_partial=False（預設）時任一次無法預約即整批失敗；True 時只預約可預約的部分，並回報略過的時間。
+取消與改期只處理尚未開始的進行中預約；改期的新時間不可與本系列目前的時間相同（需先取消再預約）。
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from analytics.facts import apply_appointment_changes, appointment_state
+from core.outbox import publish
+from therapists.availability import schedule_refresh
+from therapists.events import emit_slot_event
+from therapists.models import AvailableSlot
+from therapists.overlaps import IntervalIndex
+
+from .calendar import invalidate as invalidate_calendars
+from .conflicts import ACTIVE_STATUSES, user_conflicts
+from .models import Appointment, AppointmentSeries, WaitlistEntry
+from .waitlist import mark_offer_booked, offer_slot
+
+MAX_OCCURRENCES = getattr(settings, 'SERIES_MAX_OCCURRENCES', 26)
+MAX_INTERVAL_WEEKS = 4
+
+# 無法預約的原因
+UNAVAILABLE = 'unavailable'                  # 沒有這個時段，或已被預約、保留中
+THERAPIST_CONFLICT = 'therapist_conflict'    # 與心理師其他已預約的時段重疊
+USER_CONFLICT = 'user_conflict'              # 使用者在此時段已有其他預約
+
+
+class SeriesUnavailable(Exception):
+    """有無法預約的時間（整批模式），或沒有任何一次可預約；unavailable 為 [(開始時間, 原因)]"""
+
+    def __init__(self, unavailable):
+        super().__init__(unavailable)
+        self.unavailable = unavailable
+
+
+def occurrence_times(first, count, interval_weeks=1):
+    local = timezone.localtime(first)
+    return [
+        timezone.make_aware(datetime.combine(local.date() + timedelta(weeks=interval_weeks * index), local.time()))
+        for index in range(count)
+    ]
+
+
+def _claimable(now, hold_id=None):
+    """未被預約、沒有有效保留（或是本人持有的保留）"""
+    condition = Q(held_until__isnull=True) | Q(held_until__lte=now)
+    if hold_id:
+        condition |= Q(hold_id=hold_id)
+    return Q(condition, is_booked=False)
+
+
+def _lock_available(therapist_id, user_id, times, now, hold_id=None, releasing=()):
+    """
+    鎖定 times 中可預約的時段；需在交易中呼叫。
+    releasing 為即將釋出的時段（改期前的舊時段），不視為衝突。
+    回傳 (可預約的時段（依時間排序）, [(無法預約的時間, 原因)])
+    """
+    candidates = {
+        slot.slot_time: slot
+        for slot in AvailableSlot.objects.filter(
+            _claimable(now, hold_id), therapist_id=therapist_id, slot_time__in=times, slot_time__gt=now,
+        ).select_for_update(skip_locked=True)
+    }
+    if candidates:
+        start = min(candidates)
+        end = max(slot.ends_at for slot in candidates.values())
+        booked = IntervalIndex(
+            AvailableSlot.objects.filter(therapist_id=therapist_id, is_booked=True)
+            .overlapping(start, end).exclude(pk__in=releasing).values_list('slot_time', 'ends_at')
+        )
+        mine = IntervalIndex(
+            user_conflicts(user_id, start, end).exclude(slot_id__in=releasing)
+            .values_list('slot__slot_time', 'slot__ends_at')
+        )
+
+    slots, unavailable = [], []
+    for slot_time in sorted(times):
+        slot = candidates.get(slot_time)
+        if slot is None:
+            unavailable.append((slot_time, UNAVAILABLE))
+        elif booked.overlaps(slot.slot_time, slot.ends_at):
+            unavailable.append((slot_time, THERAPIST_CONFLICT))
+        elif mine.overlaps(slot.slot_time, slot.ends_at):
+            unavailable.append((slot_time, USER_CONFLICT))
+        else:
+            slots.append(slot)
+    return slots, unavailable
+
+
+def _claim(slots, now, hold_id=None):
+    """以一個條件式 UPDATE 佔用已鎖定的時段；有時段在鎖定後被佔用（不支援資料列鎖的資料庫）時整批失敗"""
+    claimed = AvailableSlot.objects.filter(_claimable(now, hold_id), pk__in=[slot.pk for slot in slots]).update(
+        is_booked=True, hold_id=None, held_until=None, held_by='', updated_at=now,
+    )
+    if claimed != len(slots):
+        raise SeriesUnavailable([])
+    for slot in slots:
+        slot.is_booked = True
+        emit_slot_event('booked', slot)
+
+
+def _release(therapist_id, slots, now):
+    """釋出時段：比照 Appointment.delete() 後時段的訊號處理（時段事件、候補配對）"""
+    AvailableSlot.objects.filter(pk__in=[slot.pk for slot in slots]).update(is_booked=False, updated_at=now)
+    waitlisted = WaitlistEntry.objects.filter(
+        therapist_id=therapist_id, status__in=('waiting', 'offered'),
+    ).exists()
+    for slot in slots:
+        slot.is_booked = False
+        emit_slot_event('released', slot)
+        if waitlisted:
+            transaction.on_commit(partial(offer_slot, slot))
+
+
+def _upcoming(series, now):
+    """尚未開始的進行中預約（鎖定），依時間排序"""
+    return list(
+        series.appointments.filter(status__in=ACTIVE_STATUSES, slot__slot_time__gt=now)
+        .select_related('slot').select_for_update().order_by('slot__slot_time')
+    )
+
+
+@transaction.atomic
+def book_series(user, first_slot, occurrences, consultation_type, interval_weeks=1,
+                allow_partial=False, hold_id=None):
+    """回傳 (AppointmentSeries, [(略過的時間, 原因)])；無法預約時拋出 SeriesUnavailable"""
+    now = timezone.now()
+    therapist = first_slot.therapist
+    times = occurrence_times(first_slot.slot_time, occurrences, interval_weeks)
+    slots, unavailable = _lock_available(therapist.pk, user.pk, times, now, hold_id)
+    if not slots or (unavailable and not allow_partial):
+        raise SeriesUnavailable(unavailable)
+    _claim(slots, now, hold_id)
+    if hold_id:
+        mark_offer_booked(first_slot.pk, hold_id)
+
+    series = AppointmentSeries.objects.create(
+        user=user, therapist=therapist, consultation_type=consultation_type, interval_weeks=interval_weeks,
+    )
+    # bulk_create 不經過 Appointment.save()：價格比照 save() 由心理師收費決定
+    price = (therapist.pricing or {}).get(consultation_type, Decimal('0.00'))
+    appointments = Appointment.objects.bulk_create([
+        Appointment(
+            user=user, therapist=therapist, slot=slot, series=series,
+            consultation_type=consultation_type, price=price,
+        )
+        for slot in slots
+    ])
+    apply_appointment_changes([(None, appointment_state(appointment)) for appointment in appointments])
+    schedule_refresh(therapist.pk)
+    invalidate_calendars(therapist.pk, user.pk)
+    publish('appointment.series_created', series_id=series.pk)
+    return series, unavailable
+
+
+@transaction.atomic
+def cancel_series(series):
+    """取消（刪除）尚未開始的各次預約並釋出時段；回傳取消的筆數"""
+    now = timezone.now()
+    appointments = _upcoming(series, now)
+    if not appointments:
+        return 0
+    # 預約刪除後無法再查詢，通知所需資料直接放進事件
+    publish(
+        'appointment.series_cancelled',
+        series_id=series.pk,
+        email=series.user.email,
+        therapist=series.therapist.name,
+        slot_times=[appointment.slot.slot_time for appointment in appointments],
+    )
+    # QuerySet.delete() 不呼叫 Appointment.delete()：時段由 _release() 一次釋出；
+    # 月報表（計為使用者取消）、刪除紀錄與行事曆訂閱由 post_delete 訊號處理
+    Appointment.objects.filter(pk__in=[appointment.pk for appointment in appointments]).delete()
+    _release(series.therapist_id, [appointment.slot for appointment in appointments], now)
+    schedule_refresh(series.therapist_id)
+    return len(appointments)
+
+
+@transaction.atomic
+def reschedule_series(series, first_slot, hold_id=None):
+    """
+    將尚未開始的各次預約整批移到 first_slot 起的新時間（全部可預約才改期）；
+    回傳改期的筆數，無法預約時拋出 SeriesUnavailable
+    """
+    now = timezone.now()
+    appointments = _upcoming(series, now)
+    if not appointments:
+        return 0
+    old_slots = [appointment.slot for appointment in appointments]
+    times = occurrence_times(first_slot.slot_time, len(appointments), series.interval_weeks)
+    slots, unavailable = _lock_available(
+        series.therapist_id, series.user_id, times, now, hold_id, releasing=[slot.pk for slot in old_slots],
+    )
+    if unavailable:
+        raise SeriesUnavailable(unavailable)
+    _claim(slots, now, hold_id)
+    if hold_id:
+        mark_offer_booked(first_slot.pk, hold_id)
+
+    previous = [appointment_state(appointment) for appointment in appointments]
+    for appointment, slot in zip(appointments, slots):
+        appointment.slot = slot
+        appointment.updated_at = now
+    # 新時段都是剛佔用的空時段，不會與舊時段互換，一個 UPDATE 不違反 slot 的唯一限制
+    Appointment.objects.bulk_update(appointments, ['slot', 'updated_at'])
+    apply_appointment_changes(zip(previous, [appointment_state(appointment) for appointment in appointments]))
+    _release(series.therapist_id, old_slots, now)
+    schedule_refresh(series.therapist_id)
+    invalidate_calendars(series.therapist_id, series.user_id)
+    publish('appointment.series_rescheduled', series_id=series.pk)
+    return len(appointments)
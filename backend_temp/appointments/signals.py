@@ -0,0 +1,69 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from therapists.availability import schedule_refresh
+from therapists.events import emit_slot_event
+from therapists.models import AvailableSlot
+
+from .calendar import invalidate as invalidate_calendars
+from .models import Appointment
+from .waitlist import offer_slot
+
+# 影響心理師最近可預約時間的時段欄位
+AVAILABILITY_FIELDS = {'is_booked', 'slot_time', 'therapist', 'therapist_id'}
+# 影響行事曆訂閱的時段欄位（已預約的時段在後台改時間）
+CALENDAR_FIELDS = {'slot_time', 'ends_at'}
+
+
+@receiver(post_save, sender=AvailableSlot)
+def slot_released(sender, instance, created, update_fields=None, **kwargs):
+    """
+    新增時段，或 Appointment.delete()（取消預約）將 is_booked 改回 False 時，
+    推送時段事件，並於交易提交後配對候補名單
+    """
+    released = created or (update_fields is not None and 'is_booked' in update_fields)
+    if released and not instance.is_booked:
+        emit_slot_event('added' if created else 'released', instance)
+        transaction.on_commit(lambda: offer_slot(instance))
+
+
+@receiver(post_save, sender=AvailableSlot)
+def slot_availability_changed(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """時段新增、改期、取消預約（is_booked 改回 False）時重算心理師的最近可預約時間"""
+    if raw:
+        return
+    if created or update_fields is None or not AVAILABILITY_FIELDS.isdisjoint(update_fields):
+        schedule_refresh(instance.therapist_id)
+
+
+@receiver(post_delete, sender=AvailableSlot)
+def slot_removed(sender, instance, **kwargs):
+    schedule_refresh(instance.therapist_id)
+
+
+@receiver(post_save, sender=Appointment)
+def appointment_booked(sender, instance, created, raw=False, **kwargs):
+    """預約以條件式 UPDATE 佔用時段（不發出時段的訊號），改由預約建立時重算"""
+    if created and not raw:
+        schedule_refresh(instance.therapist_id)
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def appointment_calendar_changed(sender, instance, raw=False, **kwargs):
+    """預約新增、狀態變更、取消時讓心理師與個案的行事曆訂閱失效"""
+    if not raw:
+        invalidate_calendars(instance.therapist_id, instance.user_id)
+
+
+@receiver(post_save, sender=AvailableSlot)
+def booked_slot_moved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """已預約的時段在後台改時間時，讓該預約的行事曆訂閱失效"""
+    if raw or created or not instance.is_booked:
+        return
+    if update_fields is not None and CALENDAR_FIELDS.isdisjoint(update_fields):
+        return
+    owners = Appointment.objects.filter(slot=instance).values_list('therapist_id', 'user_id').first()
+    if owners is not None:
+        invalidate_calendars(*owners)
@@ -0,0 +1,247 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from analytics.models import MonthlyAppointmentFact
+from core.models import OutboxEvent, Tombstone
+from therapists.models import AvailableSlot, TherapistProfile
+
+from .holds import HoldLimitReached, acquire_hold, claim_slot
+from .models import Appointment, WaitlistEntry
+from .series import (
+    THERAPIST_CONFLICT, UNAVAILABLE, USER_CONFLICT, SeriesUnavailable, book_series, cancel_series, occurrence_times,
+)
+
+User = get_user_model()
+
+
+def make_therapist(**fields):
+    number = TherapistProfile.objects.count() + 1
+    defaults = {
+        'name': f'心理師{number}', 'title': '諮商心理師', 'license_number': f'T-{number}',
+        'education': '', 'experience': '', 'beliefs': '',
+        'consultation_modes': ['online', 'offline'],
+        'pricing': {'online': 1500, 'offline': 2000},
+    }
+    return TherapistProfile.objects.create(**{**defaults, **fields})
+
+
+def make_slot(therapist, slot_time=None, minutes=60, **fields):
+    slot_time = slot_time or timezone.now().replace(second=0, microsecond=0) + timedelta(days=3)
+    return AvailableSlot.objects.create(
+        therapist=therapist, slot_time=slot_time, ends_at=slot_time + timedelta(minutes=minutes), **fields,
+    )
+
+
+def make_user(email, **fields):
+    user = User(username=email, email=email, **fields)
+    user.set_unusable_password()
+    user.set_id_number('A123456789')
+    user.save()
+    return user
+
+
+def book(user, slot, consultation_type='online'):
+    claim_slot(slot)
+    return Appointment.objects.create(
+        user=user, therapist=slot.therapist, slot=slot, consultation_type=consultation_type,
+    )
+
+
+class BookingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.therapist = make_therapist()
+        self.client = APIClient()
+
+
+class SlotHoldTests(BookingTestCase):
+    def test_second_claim_of_same_slot_fails(self):
+        slot = make_slot(self.therapist)
+        self.assertTrue(claim_slot(slot))
+        self.assertFalse(claim_slot(slot))
+
+    def test_double_booking_creates_one_appointment(self):
+        slot = make_slot(self.therapist)
+        statuses = [
+            self.client.post(reverse('appointment-list'), {
+                'email': email, 'id_number': 'A123456789', 'slot': slot.pk, 'consultation_type': 'online',
+            }, format='json').status_code
+            for email in ('a@example.com', 'b@example.com')
+        ]
+        self.assertEqual(statuses, [201, 400])
+        self.assertEqual(Appointment.objects.filter(slot=slot).count(), 1)
+
+    def test_active_hold_blocks_others_but_not_holder(self):
+        slot = make_slot(self.therapist)
+        hold_id, _held_until = acquire_hold(slot, holder='anon:1')
+        self.assertIsNone(acquire_hold(slot, holder='anon:2'))
+        self.assertFalse(claim_slot(slot))
+        self.assertTrue(claim_slot(slot, hold_id))
+
+    def test_expired_hold_is_reclaimed_by_next_hold(self):
+        slot = make_slot(self.therapist)
+        old_hold, _held_until = acquire_hold(slot, holder='anon:1')
+        AvailableSlot.objects.filter(pk=slot.pk).update(held_until=timezone.now() - timedelta(minutes=1))
+
+        new_hold, _held_until = acquire_hold(slot, holder='anon:2')
+        self.assertNotEqual(new_hold, old_hold)
+        # 過期的保留已被覆蓋，原持有者不能再以舊 hold_id 預約
+        self.assertFalse(claim_slot(slot, old_hold))
+        self.assertTrue(claim_slot(slot, new_hold))
+
+    def test_expired_hold_can_be_claimed_without_hold_id(self):
+        slot = make_slot(self.therapist)
+        acquire_hold(slot, holder='anon:1')
+        AvailableSlot.objects.filter(pk=slot.pk).update(held_until=timezone.now() - timedelta(minutes=1))
+        self.assertTrue(claim_slot(slot))
+        slot.refresh_from_db()
+        self.assertEqual((slot.hold_id, slot.held_until, slot.held_by), (None, None, ''))
+
+    def test_hold_limit_counts_only_active_holds(self):
+        slots = [make_slot(self.therapist, timezone.now() + timedelta(days=3, hours=index)) for index in range(4)]
+        for slot in slots[:3]:
+            acquire_hold(slot, holder='anon:1')
+        with self.assertRaises(HoldLimitReached):
+            acquire_hold(slots[3], holder='anon:1')
+
+        AvailableSlot.objects.filter(pk=slots[0].pk).update(held_until=timezone.now() - timedelta(minutes=1))
+        self.assertIsNotNone(acquire_hold(slots[3], holder='anon:1'))
+
+
+class WaitlistOfferTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = make_user('owner@example.com')
+        self.slot = make_slot(self.therapist)
+        self.appointment = book(self.owner, self.slot)
+        self.entry = WaitlistEntry.objects.create(
+            user=make_user('waiting@example.com'), therapist=self.therapist, consultation_type='online',
+        )
+
+    def assertOffered(self):
+        self.entry.refresh_from_db()
+        self.slot.refresh_from_db()
+        self.assertEqual(self.entry.status, 'offered')
+        self.assertEqual(self.entry.offered_slot_id, self.slot.pk)
+        self.assertFalse(self.slot.is_booked)
+        self.assertEqual(self.slot.hold_id, self.entry.offer_hold_id)
+        self.assertTrue(OutboxEvent.objects.filter(topic='waitlist.offered', payload__entry_id=self.entry.pk).exists())
+
+    def test_owner_cancellation_offers_slot(self):
+        self.client.force_authenticate(self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('appointment-detail', args=[self.appointment.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertOffered()
+
+    def test_admin_cancellation_offers_slot(self):
+        self.client.force_authenticate(make_user('admin@example.com', is_staff=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('appointment-detail', args=[self.appointment.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertOffered()
+
+    def test_status_endpoint_rejects_cancelled(self):
+        self.client.force_authenticate(make_user('admin@example.com', is_staff=True))
+        response = self.client.patch(
+            reverse('appointment-update-status', args=[self.appointment.pk]), {'status': 'cancelled'}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.status, 'pending')
+
+    def test_offer_hold_blocks_other_bookings(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.appointment.delete()
+        self.assertFalse(claim_slot(self.slot))
+        self.entry.refresh_from_db()
+        self.assertTrue(claim_slot(self.slot, self.entry.offer_hold_id))
+
+
+class SeriesTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('series@example.com')
+        first = timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=3)
+        self.times = occurrence_times(first, 4)
+        self.slots = [make_slot(self.therapist, slot_time) for slot_time in self.times]
+
+    def make_conflicts(self):
+        """第 2 次已被他人預約、第 3 次與心理師另一個已預約的時段重疊、第 4 次使用者另有預約"""
+        book(make_user('other@example.com'), self.slots[1])
+        book(make_user('third@example.com'), make_slot(self.therapist, self.times[2] - timedelta(minutes=30), 45))
+        book(self.user, make_slot(make_therapist(), self.times[3] + timedelta(minutes=15)))
+
+    def test_conflicts_reject_whole_series(self):
+        self.make_conflicts()
+        with self.assertRaises(SeriesUnavailable) as raised:
+            book_series(self.user, self.slots[0], 4, 'online')
+        self.assertEqual(raised.exception.unavailable, [
+            (self.times[1], UNAVAILABLE), (self.times[2], THERAPIST_CONFLICT), (self.times[3], USER_CONFLICT),
+        ])
+        self.slots[0].refresh_from_db()
+        self.assertFalse(self.slots[0].is_booked)
+        self.assertFalse(self.user.appointment_series.exists())
+
+    def test_partial_series_books_available_occurrences(self):
+        self.make_conflicts()
+        with self.captureOnCommitCallbacks(execute=True):
+            series, skipped = book_series(self.user, self.slots[0], 4, 'online', allow_partial=True)
+        self.assertEqual([slot_time for slot_time, _reason in skipped], self.times[1:])
+        self.assertEqual(list(series.appointments.values_list('slot_id', flat=True)), [self.slots[0].pk])
+        self.assertEqual(series.appointments.get().price, 1500)
+        self.slots[0].refresh_from_db()
+        self.assertTrue(self.slots[0].is_booked)
+        for slot in self.slots[2:]:
+            slot.refresh_from_db()
+            self.assertFalse(slot.is_booked)
+
+    def test_series_with_no_available_occurrence_fails_even_when_partial(self):
+        book(make_user('other@example.com'), self.slots[0])
+        with self.assertRaises(SeriesUnavailable):
+            book_series(self.user, self.slots[0], 1, 'online', allow_partial=True)
+
+    def test_cancel_series_releases_slots(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            series, _skipped = book_series(self.user, self.slots[0], 4, 'online')
+        ids = list(series.appointments.values_list('pk', flat=True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(cancel_series(series), 4)
+        self.assertFalse(Appointment.objects.filter(pk__in=ids).exists())
+        booked = AvailableSlot.objects.filter(pk__in=[slot.pk for slot in self.slots], is_booked=True)
+        self.assertFalse(booked.exists())
+        self.assertEqual(
+            set(Tombstone.objects.filter(resource='appointments.appointment').values_list('object_id', flat=True)),
+            set(ids),
+        )
+        facts = MonthlyAppointmentFact.objects.filter(therapist=self.therapist)
+        self.assertEqual(sum(facts.values_list('appointments', flat=True)), 0)
+        self.assertEqual(sum(facts.values_list('withdrawn', flat=True)), 4)
+
+
+class AppointmentAdminTests(BookingTestCase):
+    def test_delete_selected_releases_slots(self):
+        slots = [make_slot(self.therapist, timezone.now() + timedelta(days=3, hours=index)) for index in range(2)]
+        appointments = [book(make_user(f'user{index}@example.com'), slot) for index, slot in enumerate(slots)]
+        entry = WaitlistEntry.objects.create(
+            user=make_user('waiting@example.com'), therapist=self.therapist, consultation_type='online',
+        )
+        self.client.force_login(make_user('admin@example.com', is_staff=True, is_superuser=True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('admin:appointments_appointment_changelist'), {
+                'action': 'delete_selected', 'post': 'yes',
+                '_selected_action': [appointment.pk for appointment in appointments],
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Appointment.objects.exists())
+        self.assertFalse(AvailableSlot.objects.filter(pk__in=[slot.pk for slot in slots], is_booked=True).exists())
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'offered')
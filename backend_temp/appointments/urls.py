@@ -1,10 +1,19 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AppointmentViewSet
+from .views import (
+    AppointmentViewSet, AppointmentSeriesViewSet, CalendarLinksView, CalendarResetView, SlotHoldViewSet,
+    WaitlistViewSet, calendar_feed,
+)
 
 router = DefaultRouter()
 router.register(r'appointments', AppointmentViewSet, basename='appointment')
+router.register(r'series', AppointmentSeriesViewSet, basename='appointment-series')
+router.register(r'holds', SlotHoldViewSet, basename='slot-hold')
+router.register(r'waitlist', WaitlistViewSet, basename='waitlist')
 
 urlpatterns = [
+    path('calendar/', CalendarLinksView.as_view(), name='appointment-calendar'),
+    path('calendar/reset/', CalendarResetView.as_view(), name='appointment-calendar-reset'),
+    path('calendar/<str:token>.ics', calendar_feed, name='appointment-calendar-feed'),
     path('', include(router.urls)),
 ]
@@ -1,30 +1,50 @@
 import hashlib
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404
+from django.urls import reverse
+from django.views.decorators.http import require_safe
 from rest_framework import viewsets, mixins, status
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.views import APIView
 
-from .models import Appointment
-from .serializers import AppointmentSerializer, AppointmentCreateSerializer
+from .models import Appointment, AppointmentSeries, WaitlistEntry
+from .serializers import (
+    AppointmentSerializer, AppointmentCreateSerializer, SlotHoldSerializer,
+    WaitlistEntrySerializer, WaitlistEntryCreateSerializer,
+    AppointmentSeriesSerializer, AppointmentSeriesCreateSerializer, SeriesSlotSerializer,
+    series_unavailable_error,
+)
+from .calendar import CLIENT, THERAPIST, feed_response, feed_token, parse_token, reset_token
+from .holds import HoldLimitReached, MAX_PER_CLIENT as HOLD_MAX_PER_CLIENT, acquire_hold, release_hold
+from .series import SeriesUnavailable, cancel_series, reschedule_series
+from .waitlist import cancel_entry
 from .permissions import IsAppointmentOwner, IsTherapistOwner
 from therapists.models import TherapistProfile
+from core.delta import DeltaSyncMixin
+from core.idempotency import client_identity, idempotent
+from core.outbox import publish
 
 User = get_user_model()
 
 class AppointmentViewSet(
+        DeltaSyncMixin,
         mixins.CreateModelMixin,
         mixins.ListModelMixin,
         mixins.RetrieveModelMixin,
         mixins.DestroyModelMixin,
         viewsets.GenericViewSet):
     """
-    POST   /api/appointments/           建立預約
-    GET    /api/appointments/           列表（本人 or 管理員） 
+    POST   /api/appointments/           建立預約（支援 Idempotency-Key header，重試不會重複預約）
+    GET    /api/appointments/           列表（本人 or 管理員），支援增量同步 ?updated_since=
     GET    /api/appointments/{id}/      檢視
-    PATCH  /api/appointments/{id}/status/   更新狀態（僅管理員）
-    DELETE /api/appointments/{id}/      取消（僅本人）
+    PATCH  /api/appointments/{id}/status/   更新狀態（僅管理員）；不接受 cancelled，取消請用 DELETE
+    DELETE /api/appointments/{id}/      取消（本人或管理員）：通知使用者、刪除預約並釋出時段（配對候補名單）
     POST   /api/appointments/query/     查詢預約（Email+身分證）
     """
     queryset = Appointment.objects.all().order_by('-created_at')
@@ -34,6 +54,8 @@ class AppointmentViewSet(
             return [AllowAny()]
 
         if self.action == 'destroy':
+            if self.request.user.is_staff:
+                return [IsAdminUser()]
             return [IsAuthenticated(), IsAppointmentOwner()]
 
         if self.action == 'update_status':
@@ -71,6 +93,17 @@ class AppointmentViewSet(
         # 用戶：只能查看自己的預約
         return Appointment.objects.filter(user=user).order_by('-created_at')
 
+    def filter_tombstones(self, tombstones):
+        # 已刪除的預約：與 get_queryset 相同的可見範圍
+        user = self.request.user
+        if user.is_staff or user.is_superuser:
+            return tombstones
+        therapist_ids = list(TherapistProfile.objects.filter(user=user).values_list('id', flat=True))
+        if therapist_ids:
+            return tombstones.filter(therapist_ref__in=therapist_ids)
+        return tombstones.filter(user_ref=user.pk)
+
+    @idempotent
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -82,6 +115,22 @@ class AppointmentViewSet(
             headers=headers
         )
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        """
+        取消預約：刪除預約，時段經 Appointment.delete() 改回可預約，
+        由時段的訊號推送事件並配對候補名單（appointments/signals.py）
+        """
+        # 預約刪除後無法再查詢，通知所需資料直接放進事件
+        publish(
+            'appointment.cancelled',
+            appointment_id=instance.pk,
+            email=instance.user.email,
+            therapist=instance.therapist.name,
+            slot_time=instance.slot.slot_time,
+        )
+        instance.delete()
+
     @action(detail=False, methods=['post'], url_path='query', permission_classes=[AllowAny])
     def query(self, request):
         """
@@ -111,6 +160,260 @@ class AppointmentViewSet(
         new_status = request.data.get('status')
         if new_status not in dict(Appointment.STATUS_CHOICES):
             return Response({'error': '無效的狀態'}, status=status.HTTP_400_BAD_REQUEST)
+        if new_status == 'cancelled':
+            # 時段與預約是一對一關聯：只改狀態會讓時段一直被已取消的預約佔用；取消一律以 DELETE 刪除並釋出時段
+            return Response(
+                {'error': '取消預約請使用 DELETE /api/appointments/appointments/{id}/'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         appointment.status = new_status
         appointment.save()
         return Response({'status': appointment.status})
+
+
+class AppointmentSeriesViewSet(
+        mixins.CreateModelMixin,
+        mixins.ListModelMixin,
+        mixins.RetrieveModelMixin,
+        mixins.DestroyModelMixin,
+        viewsets.GenericViewSet):
+    """
+    POST   /api/appointments/series/                  週期預約（Email+身分證，同預約流程；支援 Idempotency-Key）
+           body: {"first_slot": id, "occurrences": 12, "interval_weeks": 1, "consultation_type": "online",
+                  "allow_partial": false}
+    GET    /api/appointments/series/                  本人的週期預約（含各次預約）
+    GET    /api/appointments/series/{id}/             檢視
+    DELETE /api/appointments/series/{id}/             取消尚未開始的各次預約（僅本人）
+    POST   /api/appointments/series/{id}/reschedule/  尚未開始的各次預約整批改期 body: {"first_slot": id}
+    無法預約時回傳 400，unavailable 列出各次的時間與原因（見 appointments/series.py）。
+    """
+    def get_permissions(self):
+        if self.action == 'create':
+            return [AllowAny()]
+        return [IsAuthenticated(), IsAppointmentOwner()]
+
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return AppointmentSeriesCreateSerializer
+        if self.action == 'reschedule':
+            return SeriesSlotSerializer
+        return AppointmentSeriesSerializer
+
+    def get_queryset(self):
+        return self.with_occurrences(AppointmentSeries.objects.filter(user=self.request.user)).order_by('-created_at')
+
+    @staticmethod
+    def with_occurrences(queryset):
+        occurrences = Appointment.objects.select_related('slot').order_by('slot__slot_time')
+        return queryset.select_related('user', 'therapist').prefetch_related(Prefetch('appointments', queryset=occurrences))
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        series = serializer.save()
+        data = AppointmentSeriesSerializer(self.with_occurrences(AppointmentSeries.objects).get(pk=series.pk)).data
+        data['skipped'] = [{'slot_time': slot_time, 'reason': reason} for slot_time, reason in series.skipped]
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def perform_destroy(self, instance):
+        cancel_series(instance)
+
+    @action(detail=True, methods=['post'], url_path='reschedule')
+    def reschedule(self, request, pk=None):
+        series = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        first_slot = serializer.validated_data['first_slot']
+        if first_slot.therapist_id != series.therapist_id:
+            return Response({'first_slot': ['需為同一位心理師的時段']}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            moved = reschedule_series(series, first_slot, serializer.validated_data.get('hold_id'))
+        except SeriesUnavailable as exc:
+            raise series_unavailable_error(exc)
+        if not moved:
+            return Response({'error': '沒有尚未開始的預約可改期'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(AppointmentSeriesSerializer(self.get_queryset().get(pk=series.pk)).data)
+
+
+class SlotHoldViewSet(viewsets.ViewSet):
+    """
+    POST   /api/appointments/holds/             保留時段 body: {"slot": id, "minutes": 10}
+    DELETE /api/appointments/holds/{hold_id}/   提前釋放保留
+    預約時帶回 hold_id 即保證成功；逾期未預約的保留自動失效。
+    不需登入：請求頻率以 slot_hold 節流，每個用戶端（使用者或 IP）同時持有的保留不超過 SLOT_HOLD_MAX_PER_CLIENT 個。
+    """
+    permission_classes = [AllowAny]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'slot_hold'
+    lookup_field = 'hold_id'
+    lookup_value_regex = '[0-9a-f-]{36}'
+
+    def create(self, request):
+        serializer = SlotHoldSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        slot = serializer.validated_data['slot']
+        try:
+            hold = acquire_hold(slot, serializer.validated_data.get('minutes'), holder=client_identity(request))
+        except HoldLimitReached:
+            return Response(
+                {'error': f'同時最多保留 {HOLD_MAX_PER_CLIENT} 個時段，請先預約或釋放已保留的時段'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+        if hold is None:
+            return Response({'error': '此時段已被預約或保留中'}, status=status.HTTP_409_CONFLICT)
+        hold_id, held_until = hold
+        return Response(
+            {'hold_id': hold_id, 'slot': slot.pk, 'expires_at': held_until},
+            status=status.HTTP_201_CREATED,
+        )
+
+    def destroy(self, request, hold_id=None):
+        if not release_hold(hold_id):
+            return Response({'error': '保留不存在或已失效'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class WaitlistViewSet(
+        mixins.CreateModelMixin,
+        mixins.ListModelMixin,
+        mixins.DestroyModelMixin,
+        viewsets.GenericViewSet):
+    """
+    POST   /api/appointments/waitlist/          登記候補（Email+身分證，同預約流程）
+    GET    /api/appointments/waitlist/          本人的候補紀錄
+    DELETE /api/appointments/waitlist/{id}/     取消候補（持有的保留一併釋放）
+    POST   /api/appointments/waitlist/query/    查詢候補與通知（Email+身分證）
+    有時段釋出時自動通知：狀態變為 offered，以 offer_hold_id 預約即保證成功。
+    """
+    def get_permissions(self):
+        if self.action in ['create', 'query']:
+            return [AllowAny()]
+        return [IsAuthenticated()]
+
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return WaitlistEntryCreateSerializer
+        return WaitlistEntrySerializer
+
+    def get_queryset(self):
+        return (
+            WaitlistEntry.objects.filter(user=self.request.user)
+            .select_related('therapist', 'offered_slot')
+            .order_by('-created_at')
+        )
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        entry = serializer.save()
+        return Response(WaitlistEntrySerializer(entry).data, status=status.HTTP_201_CREATED)
+
+    def perform_destroy(self, instance):
+        cancel_entry(instance)
+
+    @action(detail=False, methods=['post'], url_path='query')
+    def query(self, request):
+        email = request.data.get('email')
+        raw_id = request.data.get('id_number')
+        if not email or not raw_id:
+            return Response({'error': '請提供 email 與 id_number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = get_object_or_404(User, email=email)
+        if not user.check_id_number(raw_id):
+            return Response({'error': '身分證號不符'}, status=status.HTTP_400_BAD_REQUEST)
+
+        qs = (
+            WaitlistEntry.objects.filter(user=user, status__in=['waiting', 'offered'])
+            .select_related('therapist', 'offered_slot')
+            .order_by('-created_at')
+        )
+        return Response(WaitlistEntrySerializer(qs, many=True).data)
+
+
+# ───────── 行事曆訂閱（iCalendar） ─────────
+def _feed_url(request, kind, owner_id):
+    return request.build_absolute_uri(reverse('appointment-calendar-feed', args=[feed_token(kind, owner_id)]))
+
+
+def _verified_client(request):
+    """以 Email+身分證確認個案；回傳 (user, None) 或 (None, 錯誤回應)"""
+    email = request.data.get('email')
+    raw_id = request.data.get('id_number')
+    if not email or not raw_id:
+        return None, Response({'error': '請提供 email 與 id_number'}, status=status.HTTP_400_BAD_REQUEST)
+    user = get_object_or_404(User, email=email)
+    if not user.check_id_number(raw_id):
+        return None, Response({'error': '身分證號不符'}, status=status.HTTP_400_BAD_REQUEST)
+    return user, None
+
+
+def _calendar_links(request, user):
+    therapist_id = TherapistProfile.objects.filter(user=user).values_list('id', flat=True).first()
+    return {
+        'client': _feed_url(request, CLIENT, user.pk),
+        'therapist': _feed_url(request, THERAPIST, therapist_id) if therapist_id else None,
+    }
+
+
+class CalendarLinksView(APIView):
+    """
+    GET  /api/appointments/calendar/   登入者的訂閱網址：client（本人的預約）、therapist（心理師帳號才有）
+    POST /api/appointments/calendar/   以 Email+身分證取得本人預約的訂閱網址 body: {"email": "...", "id_number": "..."}
+    網址不需登入即可讀取，加入行事曆 App 時可將 https:// 換成 webcal://
+    """
+    def get_permissions(self):
+        if self.request.method == 'POST':
+            return [AllowAny()]
+        return [IsAuthenticated()]
+
+    def get(self, request):
+        return Response(_calendar_links(request, request.user))
+
+    def post(self, request):
+        user, error = _verified_client(request)
+        if error:
+            return error
+        return Response({'client': _feed_url(request, CLIENT, user.pk)})
+
+
+class CalendarResetView(APIView):
+    """
+    POST /api/appointments/calendar/reset/   重設訂閱網址（網址外流時），舊網址立即失效；回傳新的網址
+      登入者：body {"kind": "client" | "therapist"}，省略時兩者都重設；回應格式同 GET /calendar/
+      未登入的個案：body {"email": "...", "id_number": "..."}，只重設 client
+    """
+    permission_classes = [AllowAny]
+
+    @transaction.atomic
+    def post(self, request):
+        if not request.user.is_authenticated:
+            user, error = _verified_client(request)
+            if error:
+                return error
+            reset_token(CLIENT, user.pk)
+            return Response({'client': _feed_url(request, CLIENT, user.pk)})
+
+        kind = request.data.get('kind')
+        if kind not in (None, CLIENT, THERAPIST):
+            return Response({'error': f'kind 須為 {CLIENT} 或 {THERAPIST}'}, status=status.HTTP_400_BAD_REQUEST)
+        therapist_id = TherapistProfile.objects.filter(user=request.user).values_list('id', flat=True).first()
+        if kind == THERAPIST and therapist_id is None:
+            return Response({'error': '此帳號沒有心理師資料'}, status=status.HTTP_400_BAD_REQUEST)
+        if kind in (None, CLIENT):
+            reset_token(CLIENT, request.user.pk)
+        if kind in (None, THERAPIST) and therapist_id:
+            reset_token(THERAPIST, therapist_id)
+        return Response(_calendar_links(request, request.user))
+
+
+@require_safe
+def calendar_feed(request, token):
+    """
+    GET /api/appointments/calendar/{token}.ics
+    行事曆 App 輪詢用：支援 If-None-Match／If-Modified-Since，內容未變時回 304（見 appointments/calendar.py）
+    """
+    owner = parse_token(token)
+    if owner is None:
+        raise Http404
+    return feed_response(request, *owner)
@@ -0,0 +1,89 @@
+"""
+候補名單配對
+
+時段釋出（預約取消、新增時段）時，依登記順序找出第一位條件相符的候補者，
+替他保留該時段 WAITLIST_OFFER_MINUTES 分鐘並標記為 offered。
+
+- 候選者查詢走 (therapist, status, created_at) 索引，取到第一筆即停止，不掃描整個名單
+- 星期偏好存成位元遮罩，時間偏好為可空的起訖時間，都在同一個查詢中過濾
+- 逾期未預約的 offer 在下一次配對同一位心理師時才退回候補（lazy），不需要排程
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.outbox import publish
+
+from .holds import acquire_hold, release_hold
+from .models import WaitlistEntry
+
+OFFER_MINUTES = getattr(settings, 'WAITLIST_OFFER_MINUTES', 60)
+
+
+def reclaim_expired_offers(therapist_id, now=None):
+    """逾期未預約的 offer 退回候補，保留原登記順序"""
+    now = now or timezone.now()
+    return WaitlistEntry.objects.filter(
+        therapist_id=therapist_id, status='offered', offer_expires_at__lte=now,
+    ).update(status='waiting', offered_slot=None, offer_hold_id=None, offer_expires_at=None)
+
+
+def candidates(therapist_id, slot_time):
+    """符合時段星期與時間偏好的候補者，依登記順序"""
+    local = timezone.localtime(slot_time)
+    day_bit = 1 << local.weekday()
+    start = local.time()
+    return (
+        WaitlistEntry.objects
+        .filter(therapist_id=therapist_id, status='waiting')
+        .annotate(day_match=F('weekdays').bitand(day_bit))
+        .filter(Q(weekdays=0) | Q(day_match__gt=0))
+        .filter(Q(earliest_time__isnull=True) | Q(earliest_time__lte=start))
+        .filter(Q(latest_time__isnull=True) | Q(latest_time__gte=start))
+        .order_by('created_at')
+    )
+
+
+def offer_slot(slot):
+    """
+    將釋出的時段通知第一位相符的候補者；回傳取得 offer 的 WaitlistEntry 或 None。
+    時段若已被預約／保留（保留失敗），不做任何變更。
+    """
+    now = timezone.now()
+    if slot.slot_time <= now:
+        return None
+    reclaim_expired_offers(slot.therapist_id, now)
+
+    with transaction.atomic():
+        # skip_locked：同時釋出多個時段時，各自配對到不同候補者
+        entry = candidates(slot.therapist_id, slot.slot_time).select_for_update(skip_locked=True).first()
+        if entry is None:
+            return None
+        hold = acquire_hold(slot, OFFER_MINUTES)
+        if hold is None:
+            return None
+        entry.status = 'offered'
+        entry.offered_slot = slot
+        entry.offer_hold_id, entry.offer_expires_at = hold
+        entry.save(update_fields=['status', 'offered_slot', 'offer_hold_id', 'offer_expires_at'])
+        publish('waitlist.offered', entry_id=entry.pk)
+    return entry
+
+
+def mark_offer_booked(slot_id, hold_id):
+    """候補者以 offer 的 hold_id 完成預約"""
+    WaitlistEntry.objects.filter(
+        offered_slot_id=slot_id, offer_hold_id=hold_id, status='offered',
+    ).update(status='booked')
+
+
+def cancel_entry(entry):
+    """取消候補；若持有 offer，一併釋放時段並轉給下一位候補者"""
+    slot, hold_id = entry.offered_slot, entry.offer_hold_id
+    entry.status = 'cancelled'
+    entry.offered_slot, entry.offer_hold_id, entry.offer_expires_at = None, None, None
+    entry.save(update_fields=['status', 'offered_slot', 'offer_hold_id', 'offer_expires_at'])
+    if slot is not None and hold_id is not None:
+        if release_hold(hold_id):
+            transaction.on_commit(lambda: offer_slot(slot))
@@ -26,6 +26,11 @@ class Article(models.Model):
         auto_now_add=True,
         help_text="發佈時間，建立時自動填入"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        help_text="最後修改時間，供增量同步（?updated_since=）使用"
+    )
 
     def __str__(self):
         # 管理後台顯示用
@@ -12,9 +12,9 @@ class ArticleSerializer(serializers.ModelSerializer):
     class Meta:
         model = Article
         # 所有欄位都包含
-        fields = ['id', 'title', 'content', 'tags', 'author', 'published_at']
-        # 僅 published_at 由後端自動處理，不允許前端寫入
-        read_only_fields = ['published_at']
+        fields = ['id', 'title', 'content', 'tags', 'author', 'published_at', 'updated_at']
+        # published_at、updated_at 由後端自動處理，不允許前端寫入
+        read_only_fields = ['published_at', 'updated_at']
 
     def create(self, validated_data):
         """
@@ -32,3 +32,16 @@ class ArticleSerializer(serializers.ModelSerializer):
         # 建立並回傳 Article 實例
         article = Article.objects.create(author=author, **validated_data)
         return article
+
+
+class ArticleSummarySerializer(serializers.ModelSerializer):
+    """
+    文章摘要（首頁 bundle 使用）
+    - excerpt 由查詢以 Substr 註記，不需載入完整內文
+    """
+    excerpt = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Article
+        fields = ['id', 'title', 'excerpt', 'tags', 'author', 'published_at', 'updated_at']
+        read_only_fields = fields
@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from core.async_views import read_write_view
 from .views import ArticleViewSet
 
 router = DefaultRouter()
@@ -10,3 +12,7 @@ urlpatterns = [
     # 掛載所有由 router 自動產生的路由
     path('', include(router.urls)),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    # ASGI 模式：文章列表（GET）改用 async view，新增文章（POST）仍由 router 的同步 view 處理
+    urlpatterns.insert(0, path('articles/', read_write_view(ArticleViewSet, {'get': 'list', 'post': 'create'})))
@@ -1,19 +1,24 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from core.delta import DeltaSyncMixin
+from core.response_cache import CachedResponseMixin
 from .models import Article
 from .serializers import ArticleSerializer
 from .permissions import IsAdminOrTherapist
 
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewSet(CachedResponseMixin, DeltaSyncMixin, viewsets.ModelViewSet):
     """
     文章 API：
     - list / retrieve (GET) : 公開，任何人可讀
     - create / update / delete : 僅限 admin 或 therapist
+    - list / retrieve 的回應會被快取，文章異動時失效（見 core/response_cache.py）
+    - list 支援增量同步：?updated_since=（見 core/delta.py）
     """
     queryset = Article.objects.all().order_by('-published_at')
     serializer_class = ArticleSerializer
     # 先檢查是否登入，GET 可匿名，其他需登入；接著檢查角色
     permission_classes = [IsAuthenticatedOrReadOnly, IsAdminOrTherapist]
+    cache_dependencies = ('articles',)
 
     def perform_create(self, serializer):
         """
@@ -1,6 +1,22 @@
 from django.contrib import admin
+from core.paginators import EstimatedCountPaginator
 from .models import Test, Question, Choice, Response, ResponseItem
 
+
+class RiskLevelFilter(admin.SimpleListFilter):
+    """風險等級篩選：選項固定，不需對作答紀錄做 SELECT DISTINCT"""
+    title = "風險等級"
+    parameter_name = 'risk_level'
+
+    def lookups(self, request, model_admin):
+        return [(level, level) for level in Response.RISK_LEVELS]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(risk_level=self.value())
+        return queryset
+
+
 @admin.register(Test)
 class TestAdmin(admin.ModelAdmin):
     list_display = ('code', 'name')
@@ -9,20 +25,29 @@ class TestAdmin(admin.ModelAdmin):
 class QuestionAdmin(admin.ModelAdmin):
     list_display = ('test', 'order', 'text')
     list_filter = ('test',)
+    list_select_related = ('test',)
 
 @admin.register(Choice)
 class ChoiceAdmin(admin.ModelAdmin):
     list_display = ('question', 'text', 'score')
     list_filter = ('question__test',)
+    list_select_related = ('question__test',)
 
 class ResponseItemInline(admin.TabularInline):
     model = ResponseItem
     extra = 0
     readonly_fields = ('question', 'choice')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('question__test', 'choice__question__test')
+
 @admin.register(Response)
 class ResponseAdmin(admin.ModelAdmin):
     list_display = ('test', 'user', 'total_score', 'risk_level', 'created_at')
-    list_filter = ('test', 'risk_level')
+    list_filter = ('test', RiskLevelFilter)
+    list_select_related = ('test', 'user')
     readonly_fields = ('test', 'user', 'total_score', 'risk_level', 'created_at')
     inlines = [ResponseItemInline]
+    # 作答紀錄可達百萬筆：估算總筆數，篩選時不另算全表筆數
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
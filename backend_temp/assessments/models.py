@@ -40,30 +40,46 @@ class Response(models.Model):
     total_score = models.IntegerField(null=True, blank=True)
     risk_level = models.CharField(max_length=50, blank=True)
 
+    # 風險等級（由好到差）；admin 篩選、seed 資料都以這裡為準
+    WHO5_LEVELS = ('良好', '中度關注', '需要關注')
+    BSRS5_LEVELS = ('正常', '輕度', '中度', '重度')
+    RISK_LEVELS = WHO5_LEVELS + BSRS5_LEVELS
+
+    class Meta:
+        indexes = [
+            # 使用者的作答紀錄：WHERE user_id = ? ORDER BY created_at DESC
+            models.Index(fields=['user', '-created_at'], name='response_user_created_idx'),
+            # 各量表依日期統計：WHERE test_id = ? AND created_at BETWEEN ...
+            models.Index(fields=['test', 'created_at'], name='response_test_created_idx'),
+        ]
+
+    @classmethod
+    def score(cls, code, raw_total):
+        """由選項分數總和計算 (total_score, risk_level)"""
+        if code == 'WHO5':
+            # WHO-5 raw sum * 4 → 0–100
+            good, moderate, poor = cls.WHO5_LEVELS
+            total = raw_total * 4
+            if total >= 50:
+                return total, good
+            if total >= 29:
+                return total, moderate
+            return total, poor
+        # BSRS-5 raw sum → 0–20
+        normal, mild, moderate, severe = cls.BSRS5_LEVELS
+        if raw_total <= 5:
+            return raw_total, normal
+        if raw_total <= 9:
+            return raw_total, mild
+        if raw_total <= 14:
+            return raw_total, moderate
+        return raw_total, severe
+
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
         # 計算分數
         total = sum(item.choice.score for item in self.items.all())
-        if self.test.code == 'WHO5':
-            # WHO-5 raw sum * 4 → 0–100
-            self.total_score = total * 4
-            if self.total_score >= 50:
-                self.risk_level = '良好'
-            elif self.total_score >= 29:
-                self.risk_level = '中度關注'
-            else:
-                self.risk_level = '需要關注'
-        else:
-            # BSRS-5 raw sum → 0–20
-            self.total_score = total
-            if total <= 5:
-                self.risk_level = '正常'
-            elif total <= 9:
-                self.risk_level = '輕度'
-            elif total <= 14:
-                self.risk_level = '中度'
-            else:
-                self.risk_level = '重度'
+        self.total_score, self.risk_level = self.score(self.test.code, total)
         # 直接 update，避免再次觸發 save()
         Response.objects.filter(pk=self.pk).update(
             total_score=self.total_score,
@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import Test, Question, Choice, Response, ResponseItem
 
@@ -33,6 +34,7 @@ class ResponseCreateSerializer(serializers.ModelSerializer):
         model = Response
         fields = ('items',)
 
+    @transaction.atomic
     def create(self, validated_data):
         # 匿名可填，但登入後 user 不為 None
         user = self.context['request'].user if self.context['request'].user.is_authenticated else None
@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.urls import path
+from core.async_views import AsyncReadView
 from .views import (
     TestListView, QuestionListView,
     ResponseCreateView, ResponseListView
@@ -8,7 +10,12 @@ app_name = 'assessments'
 
 urlpatterns = [
     path('tests/', TestListView.as_view(), name='test-list'),
-    path('tests/<str:code>/questions/', QuestionListView.as_view(), name='question-list'),
+    path(
+        'tests/<str:code>/questions/',
+        # ASGI 模式改用 async view
+        AsyncReadView.as_view(view_class=QuestionListView) if settings.ASYNC_READ_VIEWS else QuestionListView.as_view(),
+        name='question-list',
+    ),
     path('tests/<str:code>/responses/', ResponseCreateView.as_view(), name='response-create'),
     path('results/', ResponseListView.as_view(), name='response-list'),
 ]
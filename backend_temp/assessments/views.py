@@ -1,22 +1,29 @@
+from urllib.parse import urlencode
+
+from django.urls import reverse
 from rest_framework import generics, permissions
 from rest_framework.response import Response as R
+from core.idempotency import idempotent
+from core.response_cache import CachedResponseMixin
 from .models import Test, Question, Response
 from .serializers import (
     TestSerializer, QuestionSerializer,
     ResponseCreateSerializer, ResponseSerializer
 )
 
-class TestListView(generics.ListAPIView):
+class TestListView(CachedResponseMixin, generics.ListAPIView):
     queryset = Test.objects.all()
     serializer_class = TestSerializer
     permission_classes = [permissions.AllowAny]
+    cache_dependencies = ('assessments',)
 
-class QuestionListView(generics.ListAPIView):
+class QuestionListView(CachedResponseMixin, generics.ListAPIView):
     serializer_class = QuestionSerializer
     permission_classes = [permissions.AllowAny]
+    cache_dependencies = ('assessments',)
 
     def get_queryset(self):
-        return Question.objects.filter(test__code=self.kwargs['code']).order_by('order')
+        return Question.objects.filter(test__code=self.kwargs['code']).prefetch_related('choices').order_by('order')
 
 class ResponseCreateView(generics.CreateAPIView):
     serializer_class = ResponseCreateSerializer
@@ -27,11 +34,18 @@ class ResponseCreateView(generics.CreateAPIView):
         ctx['test'] = Test.objects.get(code=self.kwargs['code'])
         return ctx
 
+    # 支援 Idempotency-Key header：重試時回放第一次的結果，不重複建立作答紀錄
+    @idempotent
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         response = serializer.save()
         data = ResponseSerializer(response).data
+        # 依本次結果推薦心理師的連結（GET /api/therapists/recommendations/）
+        data['recommendations'] = '%s?%s' % (
+            reverse('therapist-recommendations'),
+            urlencode({'test': response.test.code, 'risk_level': response.risk_level}),
+        )
         return R(data)
 
 class ResponseListView(generics.ListAPIView):
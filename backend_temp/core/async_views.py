@@ -0,0 +1,114 @@
+"""
+ASGI 模式的 async 唯讀 view
+
+AsyncReadView 重用既有 DRF view 的 get_queryset()、filter_backends 與 serializer_class，
+只把資料庫存取改為 async ORM，輸出格式與同步版本相同：
+
+    path('profiles/', AsyncReadView.as_view(view_class=TherapistProfileViewSet))
+    path('profiles/<int:pk>/', AsyncReadView.as_view(view_class=TherapistProfileViewSet, detail=True))
+
+- 沒有查詢參數時全程不離開 event loop；有篩選／搜尋參數時，篩選條件（django-filter 驗證可能查詢資料庫）
+  以 sync_to_async 建立，查詢本身仍以 async 執行
+- serializer 只能讀取已載入的資料（select_related／prefetch_related），延遲查詢會觸發 SynchronousOnlyOperation
+- 僅支援公開（AllowAny／唯讀）的端點，不執行身分驗證與權限檢查；同一路徑也接受寫入時以 read_write_view()
+  只把 GET／HEAD 交給 async view，其他方法交給同步的 DRF view（含身分驗證與權限檢查）
+- ?updated_since=（增量同步，core/delta.py）交給同步版本的 DRF view 處理
+- view_class 設有 cache_dependencies 時與同步版本共用回應快取（core/response_cache.py），
+  命中時不查資料庫、不序列化
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.request import Request
+from rest_framework.viewsets import ViewSetMixin
+
+from .delta import PARAM as DELTA_PARAM
+from .response_cache import TTL, aversions, build_response, entry_key, json_renderer, make_entry
+
+
+class AsyncReadView(View):
+    view_class = None
+    detail = False
+    http_method_names = ['get', 'head', 'options']
+
+    def sync_view(self):
+        if issubclass(self.view_class, ViewSetMixin):
+            return self.view_class.as_view({'get': 'list'})
+        return self.view_class.as_view()
+
+    def build_view(self, request, kwargs):
+        drf_request = Request(request)
+        view = self.view_class(
+            request=drf_request, args=(), kwargs=kwargs, format_kwarg=None,
+            action='retrieve' if self.detail else 'list',
+        )
+        view.headers = {}
+        return view
+
+    async def get(self, request, **kwargs):
+        if not self.detail and DELTA_PARAM in request.GET:
+            return await sync_to_async(self.sync_view())(request, **kwargs)
+
+        view = self.build_view(request, kwargs)
+        dependencies = getattr(self.view_class, 'cache_dependencies', ())
+        if not dependencies:
+            return await self.fetch(view, request, kwargs)
+
+        renderer = self.renderer(view)
+        key = entry_key(request, renderer.media_type, await aversions(dependencies))
+        entry = await cache.aget(key)
+        hit = entry is not None
+        if not hit:
+            response = await self.fetch(view, request, kwargs)
+            if response.status_code != 200:
+                return response
+            entry = make_entry(response.content, response['Content-Type'])
+            await cache.aset(key, entry, TTL)
+        return build_response(request, entry, hit)
+
+    async def fetch(self, view, request, kwargs):
+        queryset = view.get_queryset()
+        if request.GET:
+            queryset = await sync_to_async(view.filter_queryset)(queryset)
+
+        if self.detail:
+            lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+            queryset = queryset.filter(**{view.lookup_field: kwargs[lookup_url_kwarg]})
+            objects = [obj async for obj in queryset[:1]]
+            if not objects:
+                # 與 DRF get_object_or_404 相同的 404 內容
+                model = queryset.model._meta.object_name
+                return self.render(view, {'detail': f'No {model} matches the given query.'}, status=404)
+            data = view.get_serializer(objects[0]).data
+        else:
+            data = view.get_serializer([obj async for obj in queryset], many=True).data
+
+        return self.render(view, data)
+
+    def renderer(self, view):
+        # 與同步版本相同，使用 DEFAULT_RENDERER_CLASSES 中的 JSON renderer
+        return json_renderer(view.get_renderers())
+
+    def render(self, view, data, status=200):
+        renderer = self.renderer(view)
+        return HttpResponse(renderer.render(data), content_type=renderer.media_type, status=status)
+
+
+def read_write_view(view_class, actions, detail=False):
+    """
+    GET／HEAD 由 AsyncReadView 處理，其他方法（POST、OPTIONS 等）交給 view_class.as_view(actions)：
+
+        path('articles/', read_write_view(ArticleViewSet, {'get': 'list', 'post': 'create'}))
+    """
+    read_view = AsyncReadView.as_view(view_class=view_class, detail=detail)
+    write_view = sync_to_async(view_class.as_view(actions))
+
+    async def view(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await read_view(request, *args, **kwargs)
+        return await write_view(request, *args, **kwargs)
+
+    # 與 DRF 的 view 相同，CSRF 由 DRF 的身分驗證處理
+    view.csrf_exempt = True
+    return view
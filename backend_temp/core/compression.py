@@ -0,0 +1,107 @@
+"""
+回應壓縮：依 Accept-Encoding 協商 brotli（安裝 brotli 套件時）或 gzip
+
+- CompressionMiddleware 壓縮一般回應；已帶 Content-Encoding 的回應（例如 response_cache 預先壓縮好的內容）、
+  串流回應（SSE）、過小（< COMPRESS_MIN_SIZE bytes）或不適合壓縮的內容類型直接略過
+- 只壓縮 API 的內容類型（COMPRESSIBLE_TYPES）：HTML（後台、瀏覽器 API）含 CSRF token，與使用者輸入一起壓縮
+  可由壓縮後的長度推測 token（BREACH），因此不壓縮；使用或設定 CSRF token 的回應一律略過
+- compress() 供 response_cache 在寫入快取時產生各種編碼的內容，命中時不需要再壓縮
+- middleware 同時支援 sync 與 async，ASGI 下不會因此多一次執行緒切換
+"""
+import gzip
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli 為選用套件
+    brotli = None
+
+MIN_SIZE = getattr(settings, 'COMPRESS_MIN_SIZE', 500)
+COMPRESSIBLE_TYPES = ('application/json', 'text/calendar')
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+_ACCEPT_RE = re.compile(r'\s*([a-z*]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*', re.I)
+
+
+def negotiate(accept_encoding, available=ENCODINGS):
+    """依 Accept-Encoding 的 q 值挑選編碼；同分時依 available 的順序（br 優先）"""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        match = _ACCEPT_RE.fullmatch(part)
+        if match:
+            try:
+                accepted[match.group(1).lower()] = float(match.group(2) or 1)
+            except ValueError:
+                continue
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body, encoding, level=None):
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if level is None else level)
+    return gzip.compress(body, compresslevel=6 if level is None else level, mtime=0)
+
+
+def _uses_csrf(request, response):
+    # get_token()（表單的 {% csrf_token %}）會設定 CSRF_COOKIE_USED
+    return request.META.get('CSRF_COOKIE_USED') or settings.CSRF_COOKIE_NAME in response.cookies
+
+
+def _should_compress(request, response):
+    if response.streaming or response.has_header('Content-Encoding'):
+        return False
+    if _uses_csrf(request, response):
+        return False
+    if response.status_code != 200 or len(response.content) < MIN_SIZE:
+        return False
+    if 'no-transform' in response.get('Cache-Control', ''):
+        return False
+    content_type = response.get('Content-Type', '')
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress_response(request, response):
+    if not _should_compress(request, response):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = negotiate(request.headers.get('Accept-Encoding', ''))
+    if encoding is None:
+        return response
+    # 即時壓縮用較快的等級；預先壓縮（response_cache）才用最高等級
+    compressed = compress(response.content, encoding, level=5 if encoding == 'br' else 6)
+    if len(compressed) >= len(response.content):
+        return response
+    response.content = compressed
+    response['Content-Length'] = str(len(compressed))
+    response['Content-Encoding'] = encoding
+    # 與 GZipMiddleware 相同：壓縮後內容不同，強 ETag 改為弱 ETag
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    return response
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return compress_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return compress_response(request, await self.get_response(request))
@@ -0,0 +1,124 @@
+"""
+增量同步：列表 API 支援 ?updated_since=<ISO 8601 時間>
+
+    GET /api/therapists/profiles/?updated_since=2025-01-01T08:00:00Z
+    → {"changed": [...], "deleted": [3, 8], "next": null, "next_since": "2025-01-01T08:05:00+00:00"}
+
+- changed：updated_at >= updated_since 的資料（套用與一般列表相同的權限範圍與篩選條件）
+- deleted：該時間之後被刪除的 id（Tombstone，刪除時由 core/signals.py 記錄）
+- changed 依 (updated_at, id) 排序，每頁最多 DELTA_SYNC_PAGE_SIZE 筆；還有下一頁時 next 為帶 ?cursor= 的網址、
+  next_since 為 null，用戶端依序取完各頁（deleted 只在第一頁回傳）
+- next_since：下一次同步使用的時間（最後一頁才回傳）；比第一頁的查詢時間早 DELTA_SYNC_OVERLAP_SECONDS 秒，
+  涵蓋查詢當下仍未提交的交易，因此同一筆資料可能重複出現，用戶端以 id 覆蓋即可
+- updated_since 早於刪除紀錄保留期間（TOMBSTONE_RETENTION_DAYS 天）時回 410，用戶端應重新抓取完整列表
+
+以 QuerySet.update() 寫入的程式需自行設定 updated_at（auto_now 只在 save() 時生效）。
+"""
+import base64
+import binascii
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .models import Tombstone
+
+PARAM = 'updated_since'
+OVERLAP_SECONDS = getattr(settings, 'DELTA_SYNC_OVERLAP_SECONDS', 5)
+RETENTION_DAYS = getattr(settings, 'TOMBSTONE_RETENTION_DAYS', 30)
+PAGE_SIZE = getattr(settings, 'DELTA_SYNC_PAGE_SIZE', 500)
+CURSOR_PARAM = 'cursor'
+
+
+def parse_since(value):
+    # 查詢字串中未編碼的「+08:00」會變成空白
+    parsed = parse_datetime(value) or parse_datetime(value.replace(' ', '+'))
+    if parsed is None:
+        raise ValidationError({PARAM: '時間格式錯誤，請使用 ISO 8601，例如 2025-01-01T08:00:00Z'})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def encode_cursor(updated_at, pk, next_since):
+    raw = json.dumps([updated_at.isoformat(), pk, next_since.isoformat()])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(value):
+    """回傳 (上一頁最後一筆的 updated_at, id, next_since)"""
+    try:
+        updated_at, pk, next_since = json.loads(base64.urlsafe_b64decode(value.encode()))
+        cursor = parse_datetime(updated_at), int(pk), parse_datetime(next_since)
+    except (binascii.Error, TypeError, ValueError):
+        cursor = None
+    if cursor is None or None in cursor:
+        raise ValidationError({CURSOR_PARAM: '無效的 cursor，請由第一頁重新同步'})
+    return cursor
+
+
+def record_tombstone(instance, therapist_ref=None, user_ref=None):
+    Tombstone.objects.create(
+        resource=instance._meta.label_lower, object_id=instance.pk,
+        therapist_ref=therapist_ref, user_ref=user_ref,
+    )
+
+
+class DeltaSyncMixin:
+    """
+    為 list 加上 ?updated_since=；刪除紀錄的權限範圍由 filter_tombstones() 決定（預設全部公開）
+    """
+    def list(self, request, *args, **kwargs):
+        value = request.query_params.get(PARAM)
+        if value is None:
+            return super().list(request, *args, **kwargs)
+
+        since = parse_since(value)
+        now = timezone.now()
+        if since < now - timedelta(days=RETENTION_DAYS):
+            return Response(
+                {'detail': f'{PARAM} 超過 {RETENTION_DAYS} 天，請重新取得完整列表', 'full_sync_required': True},
+                status=status.HTTP_410_GONE,
+            )
+
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .filter(updated_at__gte=since).order_by('updated_at', 'pk')
+        )
+        cursor = request.query_params.get(CURSOR_PARAM)
+        if cursor:
+            last_updated, last_pk, next_since = decode_cursor(cursor)
+            queryset = queryset.filter(Q(updated_at__gt=last_updated) | Q(updated_at=last_updated, pk__gt=last_pk))
+            deleted = []
+        else:
+            next_since = now - timedelta(seconds=OVERLAP_SECONDS)
+            tombstones = Tombstone.objects.filter(
+                resource=queryset.model._meta.label_lower, deleted_at__gte=since,
+            )
+            deleted = sorted(set(self.filter_tombstones(tombstones).values_list('object_id', flat=True)))
+
+        rows = list(queryset[:PAGE_SIZE + 1])
+        more = len(rows) > PAGE_SIZE
+        rows = rows[:PAGE_SIZE]
+        next_url = None
+        if more:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), CURSOR_PARAM,
+                encode_cursor(rows[-1].updated_at, rows[-1].pk, next_since),
+            )
+        return Response({
+            'changed': self.get_serializer(rows, many=True).data,
+            'deleted': deleted,
+            'next': next_url,
+            'next_since': None if more else next_since.isoformat(),
+        })
+
+    def filter_tombstones(self, tombstones):
+        return tombstones
@@ -0,0 +1,114 @@
+"""
+Idempotency-Key 支援（POST 建立預約、送出測驗作答）
+
+用戶端在重試時帶同一個 Idempotency-Key header：
+- 已完成的 key：直接回放第一次的回應（先查快取，命中時不查資料庫）
+- 同時送達的重複請求：第二個請求會在資料列鎖上等待第一個完成後回放，不會重做寫入
+- 同一個 key 但請求內容不同：422
+- 5xx／未處理例外不會被記錄，重試時重新執行
+key 的範圍為「方法 + 路徑 + 送出者」：登入者為使用者 id，匿名請求為用戶端 IP（與 DRF 節流相同的判斷方式），
+其他人即使拿到同一個 key 也無法讀到回放的回應。
+紀錄保留 IDEMPOTENCY_TTL 秒，過期資料由 purge_idempotency_keys 指令清除。
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+TTL = getattr(settings, 'IDEMPOTENCY_TTL', 24 * 60 * 60)
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{request.method}\n{request.path}\n{body}".encode()).hexdigest()
+
+
+def client_identity(request):
+    """送出請求的使用者（user:<id>）或匿名用戶端（anon:<IP>）"""
+    if request.user and request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    return f"anon:{BaseThrottle().get_ident(request)}"[:100]
+
+
+def _cache_key(scope, owner, key):
+    return 'idem:' + hashlib.sha256(f"{scope}\n{owner}\n{key}".encode()).hexdigest()[:40]
+
+
+def _replay(fingerprint, stored_fingerprint, response_status, response_body):
+    if fingerprint != stored_fingerprint:
+        return Response(
+            {'error': f'{HEADER} 已用於不同內容的請求'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(response_body, status=response_status)
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def idempotent(view_method):
+    """裝飾 DRF view 的 create()；沒有 Idempotency-Key header 時行為不變"""
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({'error': f'{HEADER} 長度不可超過 255'}, status=status.HTTP_400_BAD_REQUEST)
+
+        scope = f"{request.method} {request.path}"[:100]
+        owner = client_identity(request)
+        fingerprint = _fingerprint(request)
+        cache_key = _cache_key(scope, owner, key)
+
+        # 1) 快取命中：單次查詢即回放
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return _replay(fingerprint, *cached)
+
+        # 2) 先建立紀錄（獨立交易）；已存在時改用既有紀錄
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(
+                    scope=scope, owner=owner, key=key, fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=TTL),
+                )
+        except IntegrityError:
+            pass
+
+        # 3) 鎖住紀錄並在同一個交易中執行寫入；重複請求會在此等待
+        with transaction.atomic():
+            record = IdempotencyKey.objects.select_for_update().get(scope=scope, owner=owner, key=key)
+            if record.expires_at < now:
+                record.fingerprint = fingerprint
+                record.response_status = record.response_body = None
+                record.expires_at = now + timedelta(seconds=TTL)
+                record.save(update_fields=['fingerprint', 'response_status', 'response_body', 'expires_at'])
+            if record.response_status is not None:
+                return _replay(fingerprint, record.fingerprint, record.response_status, record.response_body)
+            if record.fingerprint != fingerprint:
+                return _replay(fingerprint, record.fingerprint, None, None)
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code < 500:
+                record.response_status = response.status_code
+                record.response_body = json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+                record.save(update_fields=['response_status', 'response_body'])
+                stored = (record.fingerprint, record.response_status, record.response_body)
+                transaction.on_commit(lambda: cache.set(cache_key, stored, TTL))
+            return response
+
+    return wrapper
@@ -0,0 +1,260 @@
+"""
+熱門 API 的基準測試：量測延遲百分位與每個請求的 SQL 查詢數，輸出 JSON 報告
+
+    python manage.py benchmark --settings=mindcare.settings_bench -o after.json
+    python manage.py benchmark --settings=mindcare.settings_bench --compare before.json
+
+- 請求經過完整 middleware／DRF 流程（django.test.Client），不需啟動伺服器
+- 寫入照常提交，交易提交後的處理（transaction.on_commit）一併計入；結束後刪除本次建立的預約與測驗結果，
+  並重算受影響心理師的月報表，重複執行結果可比較
+- 每次請求前清空快取（不計入延遲），量測的是未命中快取的成本；--warm-cache 保留快取以量測命中時的表現
+- --compare 會與舊報告比較，p95 變慢超過門檻或查詢數增加時以非零狀態結束
+"""
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from analytics.facts import rebuild as rebuild_analytics
+from appointments.models import Appointment
+from articles.models import Article
+from assessments.models import Response, Test
+from core.profiling import RequestStats, _percentile
+from therapists.models import AvailableSlot, TherapistProfile
+from .seed_benchmark import BENCH_EMAIL_DOMAIN, BENCH_ID_NUMBER
+
+User = get_user_model()
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = '量測熱門 API 的延遲與查詢數，輸出可跨 commit 比較的 JSON 報告'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--iterations', type=int, default=50, help='每個情境量測次數')
+        parser.add_argument('--warmup', type=int, default=5, help='每個情境暖身次數（不計入）')
+        parser.add_argument('--only', nargs='+', help='只執行指定情境')
+        parser.add_argument('--seed', type=int, default=42, help='亂數種子')
+        parser.add_argument('-o', '--output', help='報告輸出路徑（預設印到 stdout）')
+        parser.add_argument('--compare', help='與舊報告比較')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='p95 允許變慢的比例（預設 0.25 = 25%%）')
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='每次請求前不清空快取（量測回應快取命中時的表現）')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.client = Client()
+
+        self.warm_cache = options['warm_cache']
+        self.prepare()
+        scenarios = self.scenarios()
+        if options['only']:
+            unknown = set(options['only']) - scenarios.keys()
+            if unknown:
+                raise CommandError(f"未知情境：{', '.join(sorted(unknown))}")
+            scenarios = {name: scenarios[name] for name in options['only']}
+
+        results = {}
+        try:
+            for name, request in scenarios.items():
+                results[name] = self.measure(request, options['iterations'], options['warmup'])
+                self.stderr.write(
+                    f"  {name:<24} p50 {results[name]['latency_ms']['p50']:>8.2f} ms  "
+                    f"p95 {results[name]['latency_ms']['p95']:>8.2f} ms  "
+                    f"queries {results[name]['queries']['median']:>4}"
+                )
+        finally:
+            self.cleanup()
+
+        report = {'meta': self.meta(options), 'scenarios': results}
+        payload = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                fh.write(payload)
+            self.stderr.write(self.style.SUCCESS(f"報告已寫入 {options['output']}"))
+        else:
+            self.stdout.write(payload)
+
+        if options['compare']:
+            self.compare(options['compare'], report, options['threshold'])
+
+    # ───────── 準備資料 ─────────
+    def prepare(self):
+        self.users = list(
+            User.objects.filter(email__endswith=f'@{BENCH_EMAIL_DOMAIN}', is_staff=False)
+            .order_by('id')[:200]
+        )
+        if not self.users:
+            raise CommandError('找不到基準測試資料，請先執行 seed_benchmark')
+        self.tokens = [Token.objects.get_or_create(user=user)[0].key for user in self.users[:20]]
+        self.therapist_ids = list(TherapistProfile.objects.values_list('id', flat=True))
+        self.free_slots = list(
+            AvailableSlot.objects.available()
+            .values_list('id', 'therapist__consultation_modes')[:5000]
+        )
+        self.rng.shuffle(self.free_slots)
+        # 結束後刪除比這些編號新的紀錄
+        self.last_appointment_id = Appointment.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        self.last_response_id = Response.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        self.tests = {
+            test.code: [
+                (question.id, [choice.id for choice in question.choices.all()])
+                for question in test.questions.all()
+            ]
+            for test in Test.objects.prefetch_related('questions__choices')
+        }
+
+    def cleanup(self):
+        created = list(Appointment.objects.filter(id__gt=self.last_appointment_id).select_related('slot'))
+        for appointment in created:
+            # 逐筆刪除：Appointment.delete() 會釋出時段並經訊號更新最近可預約時間等
+            appointment.delete()
+        Response.objects.filter(id__gt=self.last_response_id).delete()
+        if created:
+            # 刪除會被計為使用者取消，重算月報表回到執行前的狀態
+            rebuild_analytics({appointment.therapist_id for appointment in created})
+        cache.clear()
+
+    def meta(self, options):
+        return {
+            'git_revision': git_revision(),
+            'generated_at': datetime.now().astimezone().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'warmup': options['warmup'],
+            'volumes': {
+                'therapists': TherapistProfile.objects.count(),
+                'slots': AvailableSlot.objects.count(),
+                'appointments': Appointment.objects.count(),
+                'responses': Response.objects.count(),
+                'articles': Article.objects.count(),
+            },
+        }
+
+    # ───────── 情境定義 ─────────
+    def scenarios(self):
+        """每個情境是一個函式，回傳 (method, path, body, headers)"""
+        def auth_header():
+            return {'HTTP_AUTHORIZATION': f'Token {self.rng.choice(self.tokens)}'}
+
+        def book():
+            if not self.free_slots:
+                raise CommandError('未預約的時段不足，請增加 seed_benchmark 規模')
+            slot_id, modes = self.free_slots.pop()
+            user = self.rng.choice(self.users)
+            return ('post', reverse('appointment-list'), {
+                'email': user.email, 'id_number': BENCH_ID_NUMBER,
+                'slot': slot_id, 'consultation_type': modes[0],
+            }, {})
+
+        def submit(code):
+            items = [{'question': qid, 'choice': self.rng.choice(choices)} for qid, choices in self.tests[code]]
+            return ('post', reverse('assessments:response-create', args=[code]), {'items': items}, {})
+
+        return {
+            'therapist_list': lambda: ('get', reverse('therapist-profile-list'), None, {}),
+            'therapist_search': lambda: ('get', reverse('therapist-profile-list') + '?search=認知', None, {}),
+            'therapist_detail': lambda: (
+                'get', reverse('therapist-profile-detail', args=[self.rng.choice(self.therapist_ids)]), None, {}),
+            'specialty_list': lambda: ('get', reverse('specialty-list'), None, {}),
+            'appointment_create': book,
+            'appointment_query': lambda: ('post', reverse('appointment-query'), {
+                'email': self.rng.choice(self.users).email, 'id_number': BENCH_ID_NUMBER}, {}),
+            'appointment_list_user': lambda: ('get', reverse('appointment-list'), None, auth_header()),
+            'question_load': lambda: ('get', reverse('assessments:question-list', args=['WHO5']), None, {}),
+            'response_submit': lambda: submit(self.rng.choice(list(self.tests))),
+            'response_list_user': lambda: ('get', reverse('assessments:response-list'), None, auth_header()),
+            # reverse('article-list') 會得到被 router 根目錄遮蔽的 /api/articles/
+            'article_list': lambda: ('get', '/api/articles/articles/', None, {}),
+            'home_bundle': lambda: ('get', reverse('core:home-bundle'), None, {}),
+        }
+
+    # ───────── 量測 ─────────
+    def call(self, request):
+        method, path, body, headers = request()
+        if method == 'get':
+            return self.client.get(path, **headers)
+        return self.client.post(path, data=json.dumps(body), content_type='application/json', **headers)
+
+    def measure(self, request, iterations, warmup):
+        for _ in range(warmup):
+            self.call(request)
+
+        latencies, query_counts, statuses = [], [], {}
+        for _ in range(iterations):
+            if not self.warm_cache:
+                cache.clear()
+            stats = RequestStats()
+            with connection.execute_wrapper(stats):
+                start = time.perf_counter()
+                response = self.call(request)
+                latencies.append((time.perf_counter() - start) * 1000)
+            query_counts.append(stats.queries)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        latencies.sort()
+        return {
+            'latency_ms': {
+                'p50': round(_percentile(latencies, 50), 3),
+                'p90': round(_percentile(latencies, 90), 3),
+                'p95': round(_percentile(latencies, 95), 3),
+                'p99': round(_percentile(latencies, 99), 3),
+                'mean': round(statistics.fmean(latencies), 3),
+                'max': round(latencies[-1], 3),
+            },
+            'queries': {
+                'median': int(statistics.median(query_counts)),
+                'max': max(query_counts),
+            },
+            'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+        }
+
+    # ───────── 與舊報告比較 ─────────
+    def compare(self, path, report, threshold):
+        with open(path, encoding='utf-8') as fh:
+            baseline = json.load(fh)
+
+        regressions = []
+        self.stderr.write(f"\n與 {path}（{baseline['meta'].get('git_revision')}）比較：")
+        for name, current in report['scenarios'].items():
+            previous = baseline['scenarios'].get(name)
+            if previous is None:
+                continue
+            old_p95, new_p95 = previous['latency_ms']['p95'], current['latency_ms']['p95']
+            old_q, new_q = previous['queries']['median'], current['queries']['median']
+            change = (new_p95 - old_p95) / old_p95 if old_p95 else 0.0
+            flag = ''
+            if change > threshold or new_q > old_q:
+                flag = '  ← 退化'
+                regressions.append(name)
+            self.stderr.write(
+                f"  {name:<24} p95 {old_p95:>8.2f} → {new_p95:>8.2f} ms ({change:+.0%})  "
+                f"queries {old_q} → {new_q}{flag}"
+            )
+
+        if regressions:
+            raise CommandError(f"偵測到效能退化：{', '.join(regressions)}")
+        self.stderr.write(self.style.SUCCESS('未偵測到效能退化'))
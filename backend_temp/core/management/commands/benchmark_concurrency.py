@@ -0,0 +1,169 @@
+"""
+WSGI 與 ASGI 的併發比較：對執行中的伺服器以大量 keep-alive 連線送出公開唯讀 API 請求
+
+    # 同一台機器、各一個 worker
+    gunicorn mindcare.wsgi:application -w 1 --threads 8 -b 127.0.0.1:8000
+    uvicorn mindcare.asgi:application --workers 1 --port 8001
+    python manage.py benchmark_concurrency wsgi=http://127.0.0.1:8000 asgi=http://127.0.0.1:8001 \\
+        -c 1 16 64 256 --duration 10 --idle-ms 200 -o concurrency.json
+
+- 每條連線是一個「慢速用戶端」：收到回應後等待 --idle-ms 毫秒（保持連線）再送出下一個請求
+- 每個併發等級量測 --duration 秒，回報吞吐量、延遲百分位、錯誤數與實際建立的連線數
+- 用戶端以 asyncio 實作，不需額外套件；兩個目標依序量測，避免互相干擾
+"""
+import asyncio
+import json
+import random
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = [
+    '/api/therapists/profiles/',
+    '/api/therapists/specialties/',
+    '/api/articles/articles/',
+    '/api/assessments/tests/WHO5/questions/',
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def read_response(reader):
+    """讀取一個 HTTP/1.1 回應，回傳 (status, keep_alive)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('連線已關閉')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+async def client(target, paths, deadline, idle, stats, rng):
+    parts = urlsplit(target)
+    host, port = parts.hostname, parts.port or 80
+    reader = writer = None
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+                stats['connections'] += 1
+            path = parts.path.rstrip('/') + rng.choice(paths)
+            start = time.perf_counter()
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept: application/json\r\n\r\n'.encode())
+            await writer.drain()
+            status, keep_alive = await asyncio.wait_for(read_response(reader), timeout=30)
+            stats['latencies'].append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                stats['errors'] += 1
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            stats['errors'] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.05)
+        if idle:
+            await asyncio.sleep(idle)
+    if writer is not None:
+        writer.close()
+
+
+async def measure(target, paths, concurrency, duration, idle, seed):
+    stats = {'latencies': [], 'errors': 0, 'connections': 0}
+    started = time.monotonic()
+    deadline = started + duration
+    await asyncio.gather(*(
+        client(target, paths, deadline, idle, stats, random.Random(seed + i))
+        for i in range(concurrency)
+    ))
+    elapsed = time.monotonic() - started
+    latencies = sorted(stats['latencies'])
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'errors': stats['errors'],
+        'connections': stats['connections'],
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'mean': round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = '比較 WSGI 與 ASGI 部署在不同併發連線數下的吞吐量與延遲'
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='+', help='名稱=網址，例如 wsgi=http://127.0.0.1:8000')
+        parser.add_argument('-c', '--concurrency', type=int, nargs='+', default=[1, 16, 64, 256],
+                            help='併發連線數（可多個）')
+        parser.add_argument('--duration', type=float, default=10.0, help='每個併發等級量測秒數')
+        parser.add_argument('--idle-ms', type=float, default=0.0, help='每個請求之間保持連線閒置的毫秒數（模擬慢速用戶端）')
+        parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS, help='要輪流請求的路徑')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('-o', '--output', help='JSON 報告輸出路徑')
+
+    def handle(self, *args, **options):
+        targets = []
+        for item in options['targets']:
+            name, sep, url = item.partition('=')
+            if not sep or not url.startswith('http://'):
+                raise CommandError(f'目標格式應為 名稱=http://host:port：{item}')
+            targets.append((name, url))
+
+        report = {
+            'duration': options['duration'],
+            'idle_ms': options['idle_ms'],
+            'paths': options['paths'],
+            'results': {},
+        }
+        for name, url in targets:
+            self.stdout.write(f'\n{name}（{url}）')
+            self.stdout.write(f"  {'併發':>6} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'錯誤':>6} {'連線':>6}")
+            rows = report['results'][name] = []
+            for concurrency in options['concurrency']:
+                row = asyncio.run(measure(
+                    url, options['paths'], concurrency, options['duration'],
+                    options['idle_ms'] / 1000, options['seed'],
+                ))
+                rows.append(row)
+                latency = row['latency_ms']
+                self.stdout.write(
+                    f"  {concurrency:>6} {row['rps']:>9.1f} {latency['p50']:>7.1f}ms {latency['p95']:>7.1f}ms "
+                    f"{latency['p99']:>7.1f}ms {row['errors']:>6} {row['connections']:>6}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                json.dump(report, fh, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"\n報告已寫入 {options['output']}"))
@@ -0,0 +1,135 @@
+"""
+對熱門查詢執行 EXPLAIN，任何一個退化成全表掃描時以非零狀態結束（可放進 CI）
+
+    python manage.py explain_hot_queries --settings=mindcare.settings_bench
+    python manage.py explain_hot_queries -v 2          # 印出完整執行計畫
+
+- 查詢直接取自各 view 的 get_queryset()／filter_queryset()，view 改寫查詢時檢查會跟著更新
+- 只檢查每個查詢的主要資料表；join 進來的小表（心理師、量表）不列入判斷
+- 判斷規則：SQLite「SCAN <table>」且未使用索引、MySQL type=ALL、PostgreSQL「Seq Scan on <table>」
+- 額外排序（SQLite temp B-tree、MySQL filesort、PostgreSQL Sort）只列為警告
+- 小資料表上資料庫可能判斷全表掃描較快，請在 seed_benchmark 建立的資料上執行
+"""
+import re
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from appointments.conflicts import therapist_conflicts, user_conflicts
+from appointments.models import Appointment
+from appointments.views import AppointmentViewSet
+from assessments.models import Response, Test
+from assessments.views import ResponseListView
+from therapists.models import AvailableSlot, TherapistProfile
+from therapists.views import AvailableSlotViewSet
+
+User = get_user_model()
+
+
+def view_queryset(view_class, user=None, params=None, **attrs):
+    """以指定使用者／查詢參數建立 view，回傳其 filter_queryset(get_queryset())"""
+    request = Request(APIRequestFactory().get('/', params or {}))
+    request.user = user
+    view = view_class(request=request, args=(), kwargs={}, format_kwarg=None, **attrs)
+    return view.filter_queryset(view.get_queryset())
+
+
+def explain(queryset):
+    """回傳 (執行計畫文字, 全表掃描的資料表集合, 是否額外排序)"""
+    connection = connections[queryset.db]
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            lines = [row[-1] for row in cursor.fetchall()]
+            scans = {
+                match.group(1) for line in lines
+                if (match := re.match(r'SCAN (\w+)', line)) and 'INDEX' not in line
+            }
+            sorted_ = any('TEMP B-TREE' in line for line in lines)
+        elif connection.vendor == 'mysql':
+            cursor.execute('EXPLAIN ' + sql, params)
+            columns = [col[0] for col in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            lines = [
+                f"{row['table']}: type={row['type']} key={row['key']} rows={row['rows']} {row.get('Extra') or ''}"
+                for row in rows
+            ]
+            scans = {row['table'] for row in rows if row['type'] == 'ALL'}
+            sorted_ = any('filesort' in (row.get('Extra') or '') for row in rows)
+        elif connection.vendor == 'postgresql':
+            cursor.execute('EXPLAIN ' + sql, params)
+            lines = [row[0] for row in cursor.fetchall()]
+            scans = {match.group(1) for line in lines if (match := re.search(r'Seq Scan on (\w+)', line))}
+            sorted_ = any(re.search(r'->\s+(Incremental )?Sort', line) or line.startswith('Sort') for line in lines)
+        else:
+            raise CommandError(f'不支援的資料庫：{connection.vendor}')
+    return '\n'.join(lines), scans, sorted_
+
+
+class Command(BaseCommand):
+    help = '對熱門查詢執行 EXPLAIN，退化成全表掃描時失敗'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='+', help='只檢查指定查詢')
+
+    def cases(self):
+        """(名稱, 主要資料表的 model, 建立 queryset 的函式)；缺少資料時函式回傳 None"""
+        now = timezone.now()
+        user = User.objects.filter(appointments__isnull=False).first() or User(pk=0)
+        therapist = TherapistProfile.objects.filter(user__isnull=False).select_related('user').first()
+        test = Test.objects.first()
+        slot = AvailableSlot.objects.filter(slot_time__gt=now).first()
+
+        return [
+            ('appointment_list_user', Appointment,
+             lambda: view_queryset(AppointmentViewSet, user, action='list')),
+            ('appointment_list_therapist', Appointment,
+             lambda: therapist and view_queryset(AppointmentViewSet, therapist.user, action='list')),
+            ('slot_available', AvailableSlot,
+             lambda: AvailableSlot.objects.available(now).order_by('slot_time')),
+            ('slot_list_therapist', AvailableSlot,
+             lambda: view_queryset(AvailableSlotViewSet, SimpleNamespace(),
+                                   {'therapist': therapist.pk if therapist else 1}, action='list')),
+            ('booking_therapist_overlap', AvailableSlot,
+             lambda: slot and therapist_conflicts(slot)),
+            ('booking_user_overlap', Appointment,
+             lambda: slot and user_conflicts(user.pk, slot.slot_time, slot.ends_at)),
+            ('response_list_user', Response,
+             lambda: view_queryset(ResponseListView, user)),
+            ('response_by_test_and_date', Response,
+             lambda: test and Response.objects.filter(
+                 test=test, created_at__gte=now - timezone.timedelta(days=30), created_at__lt=now,
+             )),
+        ]
+
+    def handle(self, *args, **options):
+        failures = []
+        for name, model, build in self.cases():
+            if options['only'] and name not in options['only']:
+                continue
+            queryset = build()
+            if queryset is None:
+                self.stdout.write(self.style.WARNING(f'  略過  {name}（缺少資料）'))
+                continue
+            plan, scans, sorted_ = explain(queryset)
+            table = model._meta.db_table
+            if table in scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'  全表掃描  {name}（{table}）'))
+            elif sorted_:
+                self.stdout.write(self.style.WARNING(f'  額外排序  {name}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'  使用索引  {name}'))
+            if options['verbosity'] >= 2 or table in scans:
+                for line in plan.splitlines():
+                    self.stdout.write(f'        {line}')
+
+        if failures:
+            raise CommandError(f"{len(failures)} 個熱門查詢退化成全表掃描：{', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('所有熱門查詢皆使用索引'))
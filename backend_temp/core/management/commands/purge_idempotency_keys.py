@@ -0,0 +1,31 @@
+"""
+清除過期的 Idempotency-Key 紀錄（建議以 cron 每小時執行）
+
+    python manage.py purge_idempotency_keys
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = '分批刪除過期的 Idempotency-Key 紀錄'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批刪除筆數')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        total = 0
+        while True:
+            # 依 expires_at 索引取出一批 id 再刪除，避免長時間鎖表
+            ids = list(
+                IdempotencyKey.objects.filter(expires_at__lt=now)
+                .values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            IdempotencyKey.objects.filter(id__in=ids).delete()
+            total += len(ids)
+        self.stdout.write(self.style.SUCCESS(f"已刪除 {total} 筆過期的 Idempotency-Key 紀錄"))
@@ -0,0 +1,36 @@
+"""
+清除超過保留期間（TOMBSTONE_RETENTION_DAYS 天）的刪除紀錄（建議以 cron 每天執行）
+
+    python manage.py purge_tombstones
+
+updated_since 早於保留期間的增量同步請求會收到 410，用戶端改為重新抓取完整列表，
+因此清除後不會漏掉刪除。
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.delta import RETENTION_DAYS
+from core.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = '分批刪除超過保留期間的 Tombstone 紀錄'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批刪除筆數')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=RETENTION_DAYS)
+        total = 0
+        while True:
+            ids = list(
+                Tombstone.objects.filter(deleted_at__lt=cutoff)
+                .values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            Tombstone.objects.filter(id__in=ids).delete()
+            total += len(ids)
+        self.stdout.write(self.style.SUCCESS(f"已刪除 {total} 筆過期的刪除紀錄"))
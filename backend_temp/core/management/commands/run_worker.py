@@ -0,0 +1,89 @@
+"""
+outbox 背景處理程序
+
+    python manage.py run_worker                     # 持續執行（SIGTERM／Ctrl-C 會處理完目前這批後結束）
+    python manage.py run_worker --once              # 處理到佇列清空即結束（cron／測試用）
+    python manage.py run_worker --stats             # 只印出佇列深度
+    python manage.py run_worker --retry-failed      # 將 failed 事件重新排入佇列
+
+可同時啟動多個 worker；事件以 select_for_update(skip_locked=True) 領取，不會重複處理。
+"""
+import json
+import signal
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core.models import OutboxEvent
+from core.outbox import claim, dispatch, load_handlers, purge_done, queue_stats
+
+RETENTION_DAYS = getattr(settings, 'OUTBOX_RETENTION_DAYS', 7)
+
+
+class Command(BaseCommand):
+    help = '處理交易式 outbox 事件（預約確認信、通知等副作用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='每次領取的事件數')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='佇列為空時的等待秒數')
+        parser.add_argument('--stats-interval', type=float, default=60.0, help='輸出佇列深度的間隔秒數')
+        parser.add_argument('--topics', nargs='+', help='只處理指定 topic')
+        parser.add_argument('--once', action='store_true', help='處理到佇列清空即結束')
+        parser.add_argument('--stats', action='store_true', help='只印出佇列深度（JSON）')
+        parser.add_argument('--retry-failed', action='store_true', help='將 failed 事件重新排入佇列後結束')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(queue_stats(), ensure_ascii=False, indent=2))
+            return
+        if options['retry_failed']:
+            count = OutboxEvent.objects.filter(status='failed').update(
+                status='pending', attempts=0, available_at=timezone.now(),
+            )
+            self.stdout.write(self.style.SUCCESS(f"已重新排入 {count} 筆失敗事件"))
+            return
+
+        handlers = load_handlers()
+        self.stdout.write(f"已載入 handler：{', '.join(sorted(handlers)) or '（無）'}")
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        processed = failed = 0
+        next_stats = time.monotonic() + options['stats_interval']
+        while not self.stopping:
+            close_old_connections()
+            events = claim(options['batch_size'], options['topics'])
+            for event in events:
+                if dispatch(event):
+                    processed += 1
+                else:
+                    failed += 1
+
+            if time.monotonic() >= next_stats:
+                next_stats = time.monotonic() + options['stats_interval']
+                purge_done(timedelta(days=RETENTION_DAYS))
+                self.log_stats(processed, failed)
+
+            if not events:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+
+        self.log_stats(processed, failed)
+
+    def stop(self, signum, frame):
+        self.stderr.write('收到結束訊號，處理完目前這批後結束…')
+        self.stopping = True
+
+    def log_stats(self, processed, failed):
+        stats = queue_stats()
+        self.stdout.write(
+            f"[{timezone.localtime():%H:%M:%S}] 已處理 {processed}，失敗 {failed}｜"
+            f"待處理 {stats['pending']}（可處理 {stats['ready']}，最舊 {stats['oldest_ready_age_seconds']}s）"
+            f"，處理中 {stats['processing']}，失敗 {stats['failed']}"
+        )
@@ -0,0 +1,304 @@
+"""
+建立基準測試用的大量資料（預設規模：300 位心理師、10 萬個時段、100 萬筆測驗作答、3,000 篇文章）
+
+    python manage.py seed_benchmark --settings=mindcare.settings_bench
+    python manage.py seed_benchmark --scale 0.1 --settings=mindcare.settings_bench
+
+所有資料以固定亂數種子產生，同樣的參數會得到同樣的資料集。
+資料應寫入獨立的基準測試資料庫；要換規模時請刪除 bench.sqlite3 後重新 migrate。
+"""
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dtime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from analytics.facts import rebuild as rebuild_analytics
+from appointments.models import Appointment
+from articles.models import Article
+from assessments.models import Choice, Question, Response, ResponseItem, Test
+from core.response_cache import bump
+from therapists.availability import refresh as refresh_availability
+from therapists.models import AvailableSlot, AvailableTime, Specialty, TherapistProfile, default_slot_end
+
+User = get_user_model()
+
+BENCH_LICENSE_PREFIX = 'BENCH-'
+BENCH_EMAIL_DOMAIN = 'bench.example.com'
+BENCH_ID_NUMBER = 'A123456789'
+BATCH_SIZE = 5000
+
+DEFAULT_VOLUMES = {
+    'therapists': 300,
+    'slots': 100_000,
+    'users': 5_000,
+    'appointments': 20_000,
+    'responses': 1_000_000,
+    'articles': 3_000,
+}
+
+# WHO-5 / BSRS-5 題目與選項（若資料庫尚未建立量表時使用）
+ASSESSMENT_DEFINITIONS = {
+    'WHO5': {
+        'name': 'WHO-5 幸福感量表',
+        'questions': [
+            '我覺得開心、心情愉快', '我感到平靜和放鬆', '我感到充滿活力、精力充沛',
+            '我醒來時感到神清氣爽、休息充足', '我每天的生活充滿了有趣的事情',
+        ],
+        'choices': ['從未有過', '有時候', '少於一半時間', '超過一半時間', '大部分時間', '所有時間'],
+    },
+    'BSRS5': {
+        'name': 'BSRS-5 簡式健康量表',
+        'questions': [
+            '睡眠困難，譬如難以入睡、易醒或早醒', '感覺緊張不安', '覺得容易苦惱或動怒',
+            '感覺憂鬱、心情低落', '覺得比不上別人',
+        ],
+        'choices': ['完全沒有', '輕微', '中等程度', '厲害', '非常厲害'],
+    },
+}
+
+WEEK_DAYS = [code for code, _label in AvailableTime.WEEK_DAYS]
+ARTICLE_TAGS = ['焦慮', '憂鬱', '人際關係', '壓力管理', '睡眠', '親子', '伴侶', '正念', '自我照顧', '職場']
+
+
+@contextmanager
+def explicit_timestamp(model, field_name):
+    """暫時關閉 auto_now_add，讓 bulk_create 保留我們指定的時間"""
+    field = model._meta.get_field(field_name)
+    original = field.auto_now_add
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = original
+
+
+class Command(BaseCommand):
+    help = '建立基準測試用的大量資料（可用 --scale 調整規模）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='資料量倍率（預設 1.0）')
+        parser.add_argument('--seed', type=int, default=42, help='亂數種子')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        volumes = {key: max(1, int(value * options['scale'])) for key, value in DEFAULT_VOLUMES.items()}
+
+        if TherapistProfile.objects.filter(license_number__startswith=BENCH_LICENSE_PREFIX).exists():
+            self.stdout.write(self.style.WARNING('已存在基準測試資料；如需重建請刪除資料庫後重新 migrate'))
+            return
+
+        self.now = timezone.now().replace(minute=0, second=0, microsecond=0)
+        steps = [
+            ('assessments', self.seed_assessments),
+            ('users', lambda: self.seed_users(volumes['users'])),
+            ('therapists', lambda: self.seed_therapists(volumes['therapists'])),
+            ('slots', lambda: self.seed_slots(volumes['slots'])),
+            ('appointments', lambda: self.seed_appointments(volumes['appointments'])),
+            ('articles', lambda: self.seed_articles(volumes['articles'])),
+            ('responses', lambda: self.seed_responses(volumes['responses'])),
+        ]
+        for label, step in steps:
+            start = time.perf_counter()
+            with transaction.atomic():
+                count = step()
+            self.stdout.write(f"  {label:<13} {count:>9,} 筆  {time.perf_counter() - start:6.1f}s")
+        bump('therapists', 'articles', 'assessments')  # bulk_create 不會發出 signal
+        rebuild_analytics()
+        refresh_availability()
+        self.stdout.write(self.style.SUCCESS('基準測試資料建立完成'))
+
+    # ───────── 各類資料 ─────────
+    def seed_assessments(self):
+        created = 0
+        for code, definition in ASSESSMENT_DEFINITIONS.items():
+            test, was_created = Test.objects.get_or_create(code=code, defaults={'name': definition['name']})
+            if not was_created and test.questions.exists():
+                continue
+            for order, text in enumerate(definition['questions'], start=1):
+                question = Question.objects.create(test=test, text=text, order=order)
+                Choice.objects.bulk_create([
+                    Choice(question=question, text=label, score=score)
+                    for score, label in enumerate(definition['choices'])
+                ])
+            created += 1
+        return created
+
+    def seed_users(self, count):
+        # 所有基準測試使用者共用同一組身分證號，雜湊只算一次
+        id_hash = make_password(BENCH_ID_NUMBER)
+        users = [
+            User(username=f'bench-user-{i}@{BENCH_EMAIL_DOMAIN}',
+                 email=f'bench-user-{i}@{BENCH_EMAIL_DOMAIN}',
+                 password='!', id_number_hash=id_hash)
+            for i in range(count)
+        ]
+        users.append(User(username=f'bench-author@{BENCH_EMAIL_DOMAIN}',
+                          email=f'bench-author@{BENCH_EMAIL_DOMAIN}',
+                          password='!', is_staff=True))
+        User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        self.user_ids = list(
+            User.objects.filter(email__startswith='bench-user-').order_by('id').values_list('id', flat=True)
+        )
+        self.author_id = User.objects.get(email=f'bench-author@{BENCH_EMAIL_DOMAIN}').id
+        return len(users)
+
+    def seed_therapists(self, count):
+        specialty_ids = list(Specialty.objects.values_list('id', flat=True))
+        profiles = []
+        for i in range(count):
+            modes = self.rng.choice([['online'], ['offline'], ['online', 'offline']])
+            profiles.append(TherapistProfile(
+                name=f'基準心理師{i:04d}',
+                title=self.rng.choice(['諮商心理師', '臨床心理師', '諮商所督導']),
+                license_number=f'{BENCH_LICENSE_PREFIX}{i:06d}',
+                education='國立大學 諮商心理學系 碩士',
+                experience='擁有多年臨床經驗。' * 5,
+                beliefs='陪伴每一位個案找到自己的力量。' * 3,
+                publications=[f'文章 {n}' for n in range(self.rng.randint(0, 5))],
+                consultation_modes=modes,
+                pricing={mode: self.rng.choice([1200, 1500, 1800, 2000, 2500]) for mode in modes},
+            ))
+        TherapistProfile.objects.bulk_create(profiles, batch_size=BATCH_SIZE)
+        self.therapist_ids = list(
+            TherapistProfile.objects.filter(license_number__startswith=BENCH_LICENSE_PREFIX)
+            .order_by('id').values_list('id', flat=True)
+        )
+
+        Through = TherapistProfile.specialties.through
+        links = [
+            Through(therapistprofile_id=therapist_id, specialty_id=specialty_id)
+            for therapist_id in self.therapist_ids
+            for specialty_id in self.rng.sample(specialty_ids, min(len(specialty_ids), self.rng.randint(2, 6)))
+        ]
+        Through.objects.bulk_create(links, batch_size=BATCH_SIZE)
+
+        times = [
+            AvailableTime(therapist_id=therapist_id, day_of_week=day,
+                          start_time=dtime(9, 0), end_time=dtime(17, 0))
+            for therapist_id in self.therapist_ids
+            for day in WEEK_DAYS[:5]
+        ]
+        AvailableTime.objects.bulk_create(times, batch_size=BATCH_SIZE)
+        return len(profiles)
+
+    def seed_slots(self, count):
+        per_therapist = max(1, count // len(self.therapist_ids))
+        # 從三週前開始，每個平日 9:00–17:00 每小時一個時段
+        start_day = timezone.localtime(self.now).date() - timedelta(days=21)
+        slot_times = []
+        day = start_day
+        while len(slot_times) < per_therapist:
+            if day.weekday() < 5:
+                for hour in range(9, 17):
+                    slot_times.append(timezone.make_aware(datetime.combine(day, dtime(hour, 0))))
+            day += timedelta(days=1)
+        slot_times = slot_times[:per_therapist]
+
+        total = 0
+        batch = []
+        for therapist_id in self.therapist_ids:
+            for slot_time in slot_times:
+                batch.append(AvailableSlot(therapist_id=therapist_id, slot_time=slot_time,
+                                           ends_at=default_slot_end(slot_time)))
+            if len(batch) >= BATCH_SIZE:
+                AvailableSlot.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+                total += len(batch)
+                batch = []
+        AvailableSlot.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+        return total + len(batch)
+
+    def seed_appointments(self, count):
+        slots = list(
+            AvailableSlot.objects.filter(therapist_id__in=self.therapist_ids)
+            .values_list('id', 'therapist_id', 'slot_time')
+        )
+        chosen = self.rng.sample(slots, min(count, len(slots)))
+        pricing = dict(
+            TherapistProfile.objects.filter(id__in=self.therapist_ids).values_list('id', 'pricing')
+        )
+        statuses = [code for code, _label in Appointment.STATUS_CHOICES]
+        appointments = []
+        for slot_id, therapist_id, slot_time in chosen:
+            mode = self.rng.choice(list(pricing[therapist_id]))
+            appointments.append(Appointment(
+                user_id=self.rng.choice(self.user_ids),
+                therapist_id=therapist_id,
+                slot_id=slot_id,
+                consultation_type=mode,
+                price=pricing[therapist_id][mode],
+                status=self.rng.choice(statuses) if slot_time < self.now else 'pending',
+                created_at=slot_time - timedelta(days=self.rng.randint(1, 14)),
+            ))
+        with explicit_timestamp(Appointment, 'created_at'):
+            Appointment.objects.bulk_create(appointments, batch_size=BATCH_SIZE)
+        booked = [slot_id for slot_id, _tid, _time in chosen]
+        for i in range(0, len(booked), BATCH_SIZE):
+            AvailableSlot.objects.filter(id__in=booked[i:i + BATCH_SIZE]).update(
+                is_booked=True, updated_at=timezone.now(),
+            )
+        return len(appointments)
+
+    def seed_articles(self, count):
+        paragraph = '這是一段關於心理健康的內容，介紹如何覺察情緒並照顧自己。' * 20
+        articles = [
+            Article(
+                title=f'心理健康文章 {i:05d}',
+                content='\n\n'.join([paragraph] * self.rng.randint(2, 6)),
+                tags=self.rng.sample(ARTICLE_TAGS, self.rng.randint(1, 3)),
+                author_id=self.author_id,
+                published_at=self.now - timedelta(hours=i),
+            )
+            for i in range(count)
+        ]
+        with explicit_timestamp(Article, 'published_at'):
+            Article.objects.bulk_create(articles, batch_size=BATCH_SIZE)
+        return len(articles)
+
+    def seed_responses(self, count):
+        tests = {}
+        for test in Test.objects.filter(code__in=ASSESSMENT_DEFINITIONS):
+            questions = []
+            for question in test.questions.prefetch_related('choices').order_by('order'):
+                questions.append((question.id, [(c.id, c.score) for c in question.choices.all()]))
+            tests[test.id] = (test.code, questions)
+        test_ids = list(tests)
+
+        created = 0
+        while created < count:
+            size = min(BATCH_SIZE, count - created)
+            last_id = Response.objects.order_by('-id').values_list('id', flat=True).first() or 0
+            responses, answers = [], []
+            for _ in range(size):
+                test_id = self.rng.choice(test_ids)
+                code, questions = tests[test_id]
+                picks = [(qid, self.rng.choice(choices)) for qid, choices in questions]
+                total, risk = Response.score(code, sum(score for _qid, (_cid, score) in picks))
+                responses.append(Response(
+                    test_id=test_id,
+                    user_id=self.rng.choice(self.user_ids) if self.rng.random() < 0.3 else None,
+                    created_at=self.now - timedelta(minutes=self.rng.randint(0, 60 * 24 * 365)),
+                    total_score=total,
+                    risk_level=risk,
+                ))
+                answers.append(picks)
+            # 直接 bulk_create，跳過 Response.save() 的重新計分
+            with explicit_timestamp(Response, 'created_at'):
+                Response.objects.bulk_create(responses, batch_size=BATCH_SIZE)
+            # MySQL 的 bulk_create 不回傳主鍵，依插入順序重新取得
+            new_ids = list(
+                Response.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)
+            )
+            items = [
+                ResponseItem(response_id=response_id, question_id=qid, choice_id=cid)
+                for response_id, picks in zip(new_ids, answers)
+                for qid, (cid, _score) in picks
+            ]
+            ResponseItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+            created += size
+        return created
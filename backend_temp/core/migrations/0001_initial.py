@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-19 10:00
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(help_text='請求方法與路徑，如 POST /api/appointments/appointments/', max_length=100)),
+                ('key', models.CharField(help_text='用戶端送出的 Idempotency-Key', max_length=255)),
+                ('fingerprint', models.CharField(help_text='請求內容的 SHA256，用來偵測同一 key 送出不同內容', max_length=64)),
+                ('response_status', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('response_body', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True, help_text='過期後由 purge_idempotency_keys 清除')),
+            ],
+            options={
+                'unique_together': {('scope', 'key')},
+            },
+        ),
+    ]
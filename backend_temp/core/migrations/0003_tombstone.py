@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_outboxevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(help_text='model label，如 therapists.availableslot', max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('therapist_ref', models.BigIntegerField(blank=True, help_text='所屬心理師 id', null=True)),
+                ('user_ref', models.BigIntegerField(blank=True, help_text='所屬使用者 id', null=True)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['resource', 'deleted_at'], name='tombstone_sync_idx')],
+            },
+        ),
+    ]
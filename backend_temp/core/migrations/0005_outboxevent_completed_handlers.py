@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_idempotencykey_owner'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxevent',
+            name='completed_handlers',
+            field=models.JSONField(blank=True, default=list, help_text='已成功執行的 handler（重試時略過，避免重複寄信等副作用）'),
+        ),
+    ]
@@ -0,0 +1,80 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class IdempotencyKey(models.Model):
+    """
+    Idempotency-Key 紀錄：同一個 key 的重試直接回放第一次的回應。
+    response_status 為 NULL 表示第一次的請求仍在處理中（或處理失敗可重試）。
+    """
+    scope = models.CharField(max_length=100, help_text="請求方法與路徑，如 POST /api/appointments/appointments/")
+    owner = models.CharField(max_length=100, blank=True, default='', help_text="送出請求的使用者（user:<id>）或匿名用戶端（anon:<IP>）")
+    key = models.CharField(max_length=255, help_text="用戶端送出的 Idempotency-Key")
+    fingerprint = models.CharField(max_length=64, help_text="請求內容的 SHA256，用來偵測同一 key 送出不同內容")
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True, help_text="過期後由 purge_idempotency_keys 清除")
+
+    class Meta:
+        unique_together = ('scope', 'owner', 'key')
+
+    def __str__(self):
+        return f"{self.scope} {self.owner} [{self.key}]"
+
+
+class OutboxEvent(models.Model):
+    """
+    交易式 outbox：與業務資料在同一個交易中寫入，交易提交後才會被 run_worker 看見並處理。
+    available_at 是下一次可被領取的時間：待處理時為重試時間，處理中時為租約到期時間
+    （worker 中途結束時，租約到期後由其他 worker 重新領取）。
+    """
+    STATUS_CHOICES = [
+        ('pending', '待處理'),
+        ('processing', '處理中'),
+        ('done', '完成'),
+        ('failed', '失敗'),
+    ]
+
+    topic = models.CharField(max_length=100, help_text="事件類型，如 appointment.created")
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(help_text="下一次可被領取的時間")
+    last_error = models.TextField(blank=True)
+    completed_handlers = models.JSONField(
+        default=list, blank=True, help_text="已成功執行的 handler（重試時略過，避免重複寄信等副作用）",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # worker 領取：status IN (pending, processing) AND available_at <= now
+            models.Index(fields=['status', 'available_at'], name='outbox_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk} ({self.status})"
+
+
+class Tombstone(models.Model):
+    """
+    刪除紀錄：供 ?updated_since= 增量同步回傳已刪除的 id（見 core/delta.py）。
+    therapist_ref／user_ref 記錄刪除當下的歸屬，讓各列表只回傳使用者看得到的刪除；
+    被參照的資料可能已一併刪除，因此只存 id、不建立外鍵。
+    """
+    resource = models.CharField(max_length=50, help_text="model label，如 therapists.availableslot")
+    object_id = models.BigIntegerField()
+    therapist_ref = models.BigIntegerField(null=True, blank=True, help_text="所屬心理師 id")
+    user_ref = models.BigIntegerField(null=True, blank=True, help_text="所屬使用者 id")
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['resource', 'deleted_at'], name='tombstone_sync_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.resource} #{self.object_id} (deleted {self.deleted_at:%Y-%m-%d %H:%M})"
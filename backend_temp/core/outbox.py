@@ -0,0 +1,142 @@
+"""
+交易式 outbox 與背景處理
+
+業務程式在自己的交易中呼叫 publish()，事件與資料一起提交或一起回滾；
+`python manage.py run_worker` 分批領取事件並呼叫對應的 handler：
+
+- 領取以 select_for_update(skip_locked=True) 鎖定一批事件並改為 processing（附租約），
+  多個 worker 互不阻塞；handler 在領取交易之外執行，不長時間持有資料列鎖
+- 同一 topic 可有多個 handler，各自記錄完成（completed_handlers）：重試時只執行尚未成功的 handler，
+  已寄出的信不會重寄（handler 本身仍可能因 worker 在執行中途結束而重跑，需能承受至少一次的執行）
+- handler 失敗時依 OUTBOX_BACKOFF_BASE * 2^attempts（上限 OUTBOX_BACKOFF_MAX，加隨機抖動）延後重試，
+  超過 OUTBOX_MAX_ATTEMPTS 次標記為 failed
+- handler 以 @handler('topic') 註冊在各 app 的 outbox_handlers.py，worker 啟動時自動載入；
+  沒有 handler 的 topic 不要發布（事件只會佔用 outbox），需要時與 handler 一起加入
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 8)
+BACKOFF_BASE = getattr(settings, 'OUTBOX_BACKOFF_BASE', 5)
+BACKOFF_MAX = getattr(settings, 'OUTBOX_BACKOFF_MAX', 60 * 60)
+LEASE_SECONDS = getattr(settings, 'OUTBOX_LEASE_SECONDS', 5 * 60)
+
+_handlers = {}
+
+
+def handler(topic):
+    """註冊事件處理函式：handler(payload) 拋出例外即視為失敗並重試"""
+    def decorator(func):
+        _handlers.setdefault(topic, []).append(func)
+        return func
+    return decorator
+
+
+def handler_name(func):
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def load_handlers():
+    autodiscover_modules('outbox_handlers')
+    return _handlers
+
+
+def publish(topic, **payload):
+    """寫入 outbox；請在業務資料的同一個交易中呼叫"""
+    return OutboxEvent.objects.create(topic=topic, payload=payload, available_at=timezone.now())
+
+
+def backoff(attempts):
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(batch_size, topics=None):
+    """領取一批可處理的事件（含租約過期的 processing 事件）"""
+    now = timezone.now()
+    with transaction.atomic():
+        qs = OutboxEvent.objects.filter(status__in=['pending', 'processing'], available_at__lte=now)
+        if topics:
+            qs = qs.filter(topic__in=topics)
+        events = list(qs.order_by('available_at', 'id').select_for_update(skip_locked=True)[:batch_size])
+        if events:
+            OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+                status='processing', available_at=now + timedelta(seconds=LEASE_SECONDS),
+            )
+    return events
+
+
+def dispatch(event):
+    """執行 event 尚未完成的 handler 並記錄結果；回傳是否全部成功"""
+    completed = list(event.completed_handlers)
+    try:
+        for func in _handlers.get(event.topic, []):
+            name = handler_name(func)
+            if name in completed:
+                continue
+            func(event.payload)
+            # 每個 handler 成功後立即記錄，之後的 handler 失敗或 worker 中途結束時不會重跑
+            completed.append(name)
+            OutboxEvent.objects.filter(pk=event.pk).update(completed_handlers=completed)
+    except Exception as exc:  # noqa: BLE001 — 任何錯誤都要記錄並重試
+        attempts = event.attempts + 1
+        failed = attempts >= MAX_ATTEMPTS
+        logger.warning('outbox %s #%s 第 %s 次處理失敗：%r', event.topic, event.pk, attempts, exc)
+        OutboxEvent.objects.filter(pk=event.pk).update(
+            status='failed' if failed else 'pending',
+            attempts=attempts,
+            available_at=timezone.now() + backoff(attempts),
+            last_error=repr(exc)[:2000],
+        )
+        return False
+
+    OutboxEvent.objects.filter(pk=event.pk).update(
+        status='done', attempts=event.attempts + 1, processed_at=timezone.now(), last_error='',
+    )
+    return True
+
+
+def queue_stats():
+    """佇列深度：各狀態筆數、可處理（已到期）的待處理數、最舊待處理事件的延遲秒數、各 topic 待處理數"""
+    now = timezone.now()
+    counts = dict(OutboxEvent.objects.values_list('status').annotate(Count('id')).order_by())
+    backlog = OutboxEvent.objects.filter(status='pending')
+    oldest = backlog.filter(available_at__lte=now).aggregate(oldest=Min('available_at'))['oldest']
+    return {
+        'pending': counts.get('pending', 0),
+        'ready': backlog.filter(available_at__lte=now).count(),
+        'processing': counts.get('processing', 0),
+        'failed': counts.get('failed', 0),
+        'done': counts.get('done', 0),
+        'oldest_ready_age_seconds': round((now - oldest).total_seconds(), 3) if oldest else 0,
+        'pending_by_topic': dict(
+            backlog.values_list('topic').annotate(Count('id')).order_by()
+        ),
+    }
+
+
+def purge_done(older_than, batch_size=1000):
+    """分批刪除已完成且超過保留期限的事件"""
+    cutoff = timezone.now() - older_than
+    total = 0
+    while True:
+        # 完成事件的 available_at 為領取時的租約時間，與處理時間相近，且可走 outbox_claim_idx
+        ids = list(
+            OutboxEvent.objects.filter(status='done', available_at__lte=cutoff)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        OutboxEvent.objects.filter(id__in=ids).delete()
+        total += len(ids)
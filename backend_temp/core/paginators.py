@@ -0,0 +1,48 @@
+"""
+大資料表（Response、Appointment、AvailableSlot）admin changelist 用的分頁器
+
+未篩選的列表以資料庫統計值估算總筆數，不執行全表 COUNT(*)：
+- MySQL：information_schema.TABLES.TABLE_ROWS（InnoDB 的估算值，誤差可能達數成）
+- PostgreSQL：pg_class.reltuples（ANALYZE 後更新）
+其他資料庫、有搜尋／篩選條件，或估算值低於 ESTIMATE_THRESHOLD 時仍使用精確的 COUNT(*)。
+
+搭配 ModelAdmin.show_full_result_count = False，篩選時也不會再多算一次全表筆數。
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+ESTIMATE_THRESHOLD = 100_000
+
+
+def estimated_row_count(queryset):
+    """未篩選 queryset 的估算筆數；無法估算時回傳 None"""
+    if not isinstance(queryset, QuerySet) or queryset.query.where or queryset.query.distinct:
+        return None
+    table = queryset.model._meta.db_table
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT TABLE_ROWS FROM information_schema.TABLES '
+                'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s', [table],
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    # PostgreSQL 未 ANALYZE 過的資料表 reltuples 為 -1
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        estimate = estimated_row_count(self.object_list)
+        if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+            return estimate
+        return super().count
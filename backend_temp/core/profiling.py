@@ -0,0 +1,180 @@
+"""
+請求層級的效能分析（預設關閉）
+
+settings.PERF_PROFILING = True 時啟用 QueryProfilingMiddleware，記錄每個請求的：
+- SQL 查詢數與總 DB 時間（透過 connection.execute_wrapper，不依賴 DEBUG）
+- 重複查詢（相同 SQL 指紋出現多次，通常是 N+1）
+- DRF serializer .data 的耗時
+- 整體延遲
+
+結果寫入 Server-Timing header，並依 view 名稱彙整到記憶體 ring buffer，
+由 /api/_perf/ 提供管理員查詢。關閉時 middleware 會自行移除，不增加任何成本。
+"""
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+_current = ContextVar('perf_request_stats', default=None)
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def fingerprint(sql):
+    """SQL 指紋：參數已是 %s，只需把不同長度的 IN (...) 視為相同"""
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+class RequestStats:
+    """單一請求的統計資料"""
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'fingerprints', '_serializer_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.fingerprints = Counter()
+        self._serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper 介面
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+
+class PerfRecorder:
+    """以 view 名稱彙整的 ring buffer（只保留最近 N 筆請求）"""
+
+    def __init__(self, size):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, view_name, latency, stats):
+        sample = (view_name, latency, stats.queries, stats.db_time,
+                  stats.serializer_time, tuple(stats.duplicates()))
+        with self._lock:
+            self._samples.append(sample)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        with self._lock:
+            samples = list(self._samples)
+
+        grouped = {}
+        for view_name, latency, queries, db_time, ser_time, dupes in samples:
+            grouped.setdefault(view_name, []).append((latency, queries, db_time, ser_time, dupes))
+
+        views = {}
+        for view_name, rows in grouped.items():
+            latencies = sorted(row[0] for row in rows)
+            n = len(rows)
+            duplicate_counts = Counter(sql for row in rows for sql in row[4])
+            views[view_name] = {
+                'requests': n,
+                'latency_ms': {
+                    'p50': _ms(_percentile(latencies, 50)),
+                    'p95': _ms(_percentile(latencies, 95)),
+                    'p99': _ms(_percentile(latencies, 99)),
+                    'max': _ms(latencies[-1]),
+                },
+                'avg_queries': round(sum(row[1] for row in rows) / n, 2),
+                'max_queries': max(row[1] for row in rows),
+                'avg_db_ms': _ms(sum(row[2] for row in rows) / n),
+                'avg_serializer_ms': _ms(sum(row[3] for row in rows) / n),
+                'duplicate_queries': [
+                    {'sql': sql, 'requests': count}
+                    for sql, count in duplicate_counts.most_common(5)
+                ],
+            }
+        return {'samples': len(samples), 'capacity': self._samples.maxlen, 'views': views}
+
+
+def _percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+recorder = PerfRecorder(getattr(settings, 'PERF_RING_SIZE', 2000))
+
+
+def _install_serializer_timer():
+    """包裝 DRF BaseSerializer.data，累計當前請求的序列化時間（巢狀只計最外層）"""
+    from rest_framework.serializers import BaseSerializer
+
+    original = BaseSerializer.data.fget
+    if getattr(original, '_perf_wrapped', False):
+        return
+
+    def timed_data(self):
+        stats = _current.get()
+        if stats is None:
+            return original(self)
+        stats._serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return original(self)
+        finally:
+            stats._serializer_depth -= 1
+            if stats._serializer_depth == 0:
+                stats.serializer_time += time.perf_counter() - start
+
+    timed_data._perf_wrapped = True
+    BaseSerializer.data = property(timed_data)
+
+
+class QueryProfilingMiddleware:
+    """PERF_PROFILING 關閉時直接 MiddlewareNotUsed，由 Django 從鏈中移除"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERF_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _install_serializer_timer()
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        latency = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name or match._func_path) if match else request.path
+        recorder.record(view_name, latency, stats)
+
+        timings = [
+            f'db;dur={_ms(stats.db_time)};desc="{stats.queries} queries"',
+            f'ser;dur={_ms(stats.serializer_time)}',
+            f'total;dur={_ms(latency)}',
+        ]
+        duplicates = stats.duplicates()
+        if duplicates:
+            timings.append(f'dup;desc="{sum(duplicates.values())} duplicate queries"')
+        response['Server-Timing'] = ', '.join(timings)
+        return response
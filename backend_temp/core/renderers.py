@@ -0,0 +1,44 @@
+"""
+高速 JSON renderer／parser（安裝 orjson 時使用，否則退回 DRF 內建實作）
+
+輸出與 DRF JSONRenderer 相同：緊湊格式、UTF-8 不跳脫；orjson 不支援的型別
+（datetime、Decimal、lazy 字串、QuerySet 等）交給 DRF 的 JSONEncoder 處理，格式一致。
+要求縮排（如瀏覽器 API 的 indent）時改用 DRF 原本的 renderer。
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 為選用套件
+    orjson = None
+
+_fallback = JSONEncoder()
+_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=_fallback.default, option=_OPTIONS)
+        # 與 DRF 相同：跳脫 U+2028／U+2029，維持為合法的 JavaScript 子集
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
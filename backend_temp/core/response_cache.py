@@ -0,0 +1,155 @@
+"""
+公開唯讀 API 的回應快取（預先壓縮）
+
+    class TherapistProfileViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+        cache_dependencies = ('therapists',)
+
+- 第一次請求時照常執行 view，將 render 後的 JSON 連同 gzip（及 brotli，安裝時）版本一起存入快取；
+  命中時直接依 Accept-Encoding 回傳對應的 bytes，不再序列化、也不再壓縮
+- 以強 ETag（原始內容雜湊）回應 If-None-Match，內容未變時回 304
+- 失效以「版本號」處理：快取鍵包含各 dependency 目前的版本，資料異動時 bump() 換新版本，
+  舊項目不需逐一刪除，自然過期（RESPONSE_CACHE_TTL 秒）
+- 哪些 model 異動會 bump 哪個 dependency 見 core/signals.py；bulk_create／update() 不會發出 signal，
+  批次寫入的指令需自行呼叫 bump()
+- 只快取 JSON renderer 的 200 回應；瀏覽器 API（BrowsableAPIRenderer）與其他方法照常執行
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+from .compression import ENCODINGS, MIN_SIZE, compress, negotiate
+
+TTL = getattr(settings, 'RESPONSE_CACHE_TTL', 10 * 60)
+CACHE_HEADER = 'X-Cache'
+
+
+def _version_key(name):
+    return f'rc:v:{name}'
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def versions(names):
+    """各 dependency 目前的版本；尚未建立的版本在此初始化"""
+    keys = [_version_key(name) for name in names]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _new_version(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+async def aversions(names):
+    keys = [_version_key(name) for name in names]
+    found = await cache.aget_many(keys)
+    for key in keys:
+        if key not in found:
+            await cache.aadd(key, _new_version(), None)
+            found[key] = await cache.aget(key)
+    return [found[key] for key in keys]
+
+
+def bump(*names):
+    """讓依賴這些名稱的快取回應失效（交易提交後才生效，避免讀到未提交的資料又被快取）"""
+    def apply():
+        cache.set_many({_version_key(name): _new_version() for name in names}, None)
+    transaction.on_commit(apply)
+
+
+def entry_key(request, media_type, version_list):
+    # photo 等欄位會依 host 產生絕對網址，鍵需包含 scheme 與 host
+    raw = '\n'.join([
+        request.scheme, request.get_host(), request.get_full_path(), media_type, *version_list,
+    ])
+    return 'rc:e:' + hashlib.sha256(raw.encode()).hexdigest()[:40]
+
+
+def make_entry(body, content_type):
+    bodies = {'identity': body}
+    if len(body) >= MIN_SIZE:
+        for encoding in ENCODINGS:
+            compressed = compress(body, encoding)
+            if len(compressed) < len(body):
+                bodies[encoding] = compressed
+    return {
+        'etag': '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest(),
+        'content_type': content_type,
+        'bodies': bodies,
+    }
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # 弱比較：忽略 W/ 前綴
+    return any(tag.strip().removeprefix('W/') == etag for tag in header.split(','))
+
+
+def build_response(request, entry, hit):
+    """依 If-None-Match／Accept-Encoding 從快取項目組出回應"""
+    etag = entry['etag']
+    if _etag_matches(request, etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+    else:
+        available = tuple(encoding for encoding in ENCODINGS if encoding in entry['bodies'])
+        encoding = negotiate(request.headers.get('Accept-Encoding', ''), available) if available else None
+        response = HttpResponse(entry['bodies'][encoding or 'identity'], content_type=entry['content_type'])
+        if encoding:
+            response['Content-Encoding'] = encoding
+            response['ETag'] = 'W/' + etag
+        else:
+            response['ETag'] = etag
+        response['Content-Length'] = str(len(response.content))
+    patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+    response[CACHE_HEADER] = 'HIT' if hit else 'MISS'
+    return response
+
+
+def json_renderer(renderers):
+    """第一個 JSON renderer（DEFAULT_RENDERER_CLASSES 中設定的高速 renderer）"""
+    return next((renderer for renderer in renderers if isinstance(renderer, JSONRenderer)), JSONRenderer())
+
+
+class CachedResponseMixin:
+    """
+    為 DRF 的 list／retrieve 加上回應快取；cache_dependencies 為資料來源的名稱（見 bump()）
+    """
+    cache_dependencies = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """以快取包裝任意 handler（list／retrieve 以外的 GET 也可直接呼叫）"""
+        renderer = getattr(request, 'accepted_renderer', None)
+        if not self.cache_dependencies or not isinstance(renderer, JSONRenderer):
+            return handler(request, *args, **kwargs)
+
+        # 先取得版本再執行 view：執行期間若資料異動，新結果會存在舊版本的鍵下，不會被讀到
+        key = entry_key(request, request.accepted_media_type, versions(self.cache_dependencies))
+        entry = cache.get(key)
+        hit = entry is not None
+        if not hit:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            body = renderer.render(response.data, request.accepted_media_type, self.get_renderer_context())
+            entry = make_entry(body, request.accepted_media_type)
+            cache.set(key, entry, TTL)
+        return build_response(request, entry, hit)
@@ -0,0 +1,109 @@
+"""
+資料異動的連帶處理（CoreConfig.ready() 時連接）
+
+1. 回應快取失效（core/response_cache.py）
+   DEPENDENCIES：model → 受影響的快取名稱。心理師列表內嵌專業領域與時段設定，
+   因此專業領域、分類、時段設定與多對多關聯的異動都會讓 therapists 失效。
+2. 增量同步（core/delta.py）
+   - TOMBSTONES：刪除時記錄 Tombstone 的 model，以及刪除當下的歸屬（心理師／使用者）
+   - 心理師的時段設定、專業領域異動時更新 TherapistProfile.updated_at，
+     讓 ?updated_since= 能取得內嵌資料的變動
+"""
+from django.apps import apps
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+
+from .delta import record_tombstone
+from .response_cache import bump
+
+DEPENDENCIES = {
+    'therapists.TherapistProfile': ('therapists',),
+    'therapists.AvailableTime': ('therapists',),
+    'therapists.Specialty': ('therapists',),
+    'therapists.SpecialtyCategory': ('therapists',),
+    'articles.Article': ('articles',),
+    'assessments.Test': ('assessments',),
+    'assessments.Question': ('assessments',),
+    'assessments.Choice': ('assessments',),
+}
+
+# model → instance 的 (therapist_ref, user_ref)
+TOMBSTONES = {
+    'therapists.TherapistProfile': lambda obj: (obj.pk, None),
+    'therapists.AvailableSlot': lambda obj: (obj.therapist_id, None),
+    'articles.Article': lambda obj: (None, None),
+    'appointments.Appointment': lambda obj: (obj.therapist_id, obj.user_id),
+}
+
+
+def _receiver(names):
+    def invalidate(sender, **kwargs):
+        if kwargs.get('raw'):  # loaddata
+            return
+        if 'action' in kwargs and not kwargs['action'].startswith('post_'):
+            return
+        bump(*names)
+    return invalidate
+
+
+def _tombstone_receiver(refs):
+    def tombstone(sender, instance, **kwargs):
+        therapist_ref, user_ref = refs(instance)
+        record_tombstone(instance, therapist_ref=therapist_ref, user_ref=user_ref)
+    return tombstone
+
+
+def _touch_therapists(**lookup):
+    TherapistProfile = apps.get_model('therapists.TherapistProfile')
+    TherapistProfile.objects.filter(**lookup).update(updated_at=timezone.now())
+
+
+def available_time_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _touch_therapists(pk=instance.therapist_id)
+
+
+def specialty_changed(sender, instance, raw=False, created=False, **kwargs):
+    if not raw and not created:
+        _touch_therapists(specialties=instance)
+
+
+def category_changed(sender, instance, raw=False, created=False, **kwargs):
+    if not raw and not created:
+        _touch_therapists(specialties__category=instance)
+
+
+def specialties_linked(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        _touch_therapists(pk=instance.pk)
+    elif pk_set:
+        _touch_therapists(pk__in=pk_set)
+    elif action == 'post_clear':
+        # clear() 的 pk_set 為 None；關聯已刪除，無法得知受影響的心理師
+        _touch_therapists()
+
+
+def connect():
+    for label, names in DEPENDENCIES.items():
+        model = apps.get_model(label)
+        receiver = _receiver(names)
+        post_save.connect(receiver, sender=model, weak=False, dispatch_uid=f'response_cache:save:{label}')
+        post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=f'response_cache:delete:{label}')
+    through = apps.get_model('therapists.TherapistProfile').specialties.through
+    m2m_changed.connect(_receiver(('therapists',)), sender=through, weak=False,
+                        dispatch_uid='response_cache:m2m:therapist-specialties')
+
+    for label, refs in TOMBSTONES.items():
+        post_delete.connect(_tombstone_receiver(refs), sender=apps.get_model(label), weak=False,
+                            dispatch_uid=f'tombstone:{label}')
+
+    AvailableTime = apps.get_model('therapists.AvailableTime')
+    post_save.connect(available_time_changed, sender=AvailableTime, dispatch_uid='touch:availabletime:save')
+    post_delete.connect(available_time_changed, sender=AvailableTime, dispatch_uid='touch:availabletime:delete')
+    post_save.connect(specialty_changed, sender=apps.get_model('therapists.Specialty'),
+                      dispatch_uid='touch:specialty')
+    post_save.connect(category_changed, sender=apps.get_model('therapists.SpecialtyCategory'),
+                      dispatch_uid='touch:specialtycategory')
+    m2m_changed.connect(specialties_linked, sender=through, dispatch_uid='touch:therapist-specialties')
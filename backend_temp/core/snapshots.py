@@ -0,0 +1,44 @@
+"""
+行程內的唯讀快照（推薦用特徵矩陣等需要常駐記憶體的衍生資料）
+
+    features = VersionedSnapshot(build_features, ('therapists',))
+    matrix = features.get()
+
+- get() 先讀取 dependencies 在 response_cache 中的版本（一次 cache 讀取）；
+  與建立快照時相同就直接回傳，不同（資料異動時 core/signals.py 會 bump）才重新 build()
+- ttl 秒數：無法以訊號得知的變動（例如時段被預約）以定期重建處理
+- 重建時持鎖，同一行程的併發請求只建立一次；建立期間其他請求等待新快照
+"""
+import threading
+import time
+
+from .response_cache import versions
+
+
+class VersionedSnapshot:
+    def __init__(self, build, dependencies, ttl=None):
+        self.build = build
+        self.dependencies = tuple(dependencies)
+        self.ttl = ttl
+        self._state = None  # (versions, built_at, value)
+        self._lock = threading.Lock()
+
+    def _fresh(self, state, current):
+        if state is None or state[0] != current:
+            return False
+        return self.ttl is None or time.monotonic() - state[1] < self.ttl
+
+    def get(self):
+        current = versions(self.dependencies)
+        state = self._state
+        if self._fresh(state, current):
+            return state[2]
+        with self._lock:
+            state = self._state
+            if not self._fresh(state, current):
+                state = (current, time.monotonic(), self.build())
+                self._state = state
+        return state[2]
+
+    def clear(self):
+        self._state = None
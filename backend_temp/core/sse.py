@@ -0,0 +1,252 @@
+"""
+Server-Sent Events：fan-out hub
+
+- publish() 把事件加入有上限的事件紀錄（SSE_EVENT_LOG_SIZE 筆）並喚醒所有訂閱者
+- 訂閱者以 Last-Event-ID 續傳；要求的事件已不在紀錄中（斷線太久、伺服器重啟）時先送出 reset，
+  用戶端應重新抓取完整資料
+- stream() 為同步 generator（WSGI，每條連線佔一個執行緒），astream() 為 async generator（ASGI）
+- 無事件時每 SSE_HEARTBEAT_SECONDS 秒送出註解行保持連線；SSE_MAX_STREAM_SECONDS 秒後結束，
+  用戶端（EventSource）會自動帶 Last-Event-ID 重連
+
+跨行程：
+- 設定 SSE_BROKER_URL（Redis，需安裝 redis 套件）時，publish() 經 Redis pub/sub 發送，每個行程在第一條 SSE
+  連線建立時啟動一個訂閱執行緒，收到的事件加入本行程的事件紀錄，任一 worker 的寫入都會推送到所有 worker 的連線。
+  與 Redis 斷線後重新訂閱，並對所有連線送出 reset（斷線期間的事件可能遺失）
+- 未設定時只在發生事件的行程內廣播，僅適用單一行程（開發環境、單一 ASGI worker）；
+  多行程部署未設定 SSE_BROKER_URL 時，連線會漏掉其他行程的事件
+事件 id 的序號由各行程自行編號，重連到另一個行程時會收到 reset。
+
+WSGI 每條連線佔用一個執行緒直到結束（最長 SSE_MAX_STREAM_SECONDS 秒），每個行程同時最多
+SSE_WSGI_MAX_STREAMS 條，超過時回 503（Retry-After），避免佔滿 worker 的執行緒；大量連線請以 ASGI 部署。
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis 為選用套件（設定 SSE_BROKER_URL 時需要）
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+LOG_SIZE = getattr(settings, 'SSE_EVENT_LOG_SIZE', 1000)
+HEARTBEAT_SECONDS = getattr(settings, 'SSE_HEARTBEAT_SECONDS', 15)
+MAX_STREAM_SECONDS = getattr(settings, 'SSE_MAX_STREAM_SECONDS', 600)
+BROKER_URL = getattr(settings, 'SSE_BROKER_URL', '')
+WSGI_MAX_STREAMS = getattr(settings, 'SSE_WSGI_MAX_STREAMS', 16)
+RETRY_MS = 3000
+RECONNECT_SECONDS = 1
+
+
+def format_event(data, event=None, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event is not None:
+        lines.append(f'event: {event}')
+    lines.append(f'data: {data}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class _LimitedStream:
+    """WSGI 串流結束（含用戶端斷線、尚未開始輸出就關閉）時歸還連線名額"""
+
+    def __init__(self, stream, semaphore):
+        self._stream = stream
+        self._semaphore = semaphore
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._stream)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._stream.close()
+            self._semaphore.release()
+
+
+class EventHub:
+    """
+    事件 id 為「<行程啟動識別>:<序號>」，序號連續，方便以位移找到續傳位置。
+    name 為 Redis pub/sub 的頻道名稱；topic 為 None 的事件（reset）送給所有訂閱者。
+    """
+
+    def __init__(self, name, maxlen=LOG_SIZE, broker_url=BROKER_URL, wsgi_max_streams=WSGI_MAX_STREAMS):
+        self.boot = uuid.uuid4().hex[:8]
+        self.channel = f'sse:{name}'
+        self._log = deque(maxlen=maxlen)  # (seq, topic, event, data)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._async_waiters = set()  # (loop, asyncio.Event)
+        self._wsgi_streams = threading.BoundedSemaphore(wsgi_max_streams)
+        self._broker = None
+        self._listener = None
+        if broker_url:
+            if redis is None:
+                raise ImproperlyConfigured('SSE_BROKER_URL 需要安裝 redis 套件')
+            self._broker = redis.Redis.from_url(broker_url)
+
+    def publish(self, topic, event, payload):
+        data = json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False)
+        if self._broker is not None:
+            try:
+                self._broker.publish(self.channel, json.dumps([topic, event, data]))
+                return
+            except redis.RedisError as exc:
+                # 交易已提交，不讓推送失敗影響請求；至少本行程的連線仍收得到
+                logger.warning('SSE 事件無法送到 broker，只在本行程廣播：%r', exc)
+        self._append(topic, event, data)
+
+    def _listen(self):
+        """訂閱 broker 的事件並加入本行程的事件紀錄；斷線後重新訂閱並通知所有連線 reset"""
+        reconnecting = False
+        while True:
+            try:
+                pubsub = self._broker.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                if reconnecting:
+                    self._append(None, 'reset', '{}')
+                    reconnecting = False
+                for message in pubsub.listen():
+                    topic, event, data = json.loads(message['data'])
+                    self._append(topic, event, data)
+            except redis.RedisError as exc:
+                logger.warning('SSE broker 連線中斷，%s 秒後重新訂閱：%r', RECONNECT_SECONDS, exc)
+                reconnecting = True
+                time.sleep(RECONNECT_SECONDS)
+
+    def _ensure_listener(self):
+        if self._broker is None or self._listener is not None:
+            return
+        with self._cond:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name=f'{self.channel}-listener', daemon=True)
+                self._listener.start()
+
+    def _append(self, topic, event, data):
+        with self._cond:
+            self._seq += 1
+            self._log.append((self._seq, topic, event, data))
+            self._cond.notify_all()
+            waiters = list(self._async_waiters)
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:  # event loop 已關閉
+                pass
+
+    def resume_point(self, last_event_id):
+        """回傳 (起始序號, 是否需要 reset)"""
+        self._ensure_listener()
+        with self._cond:
+            head = self._seq
+            oldest = self._log[0][0] if self._log else head + 1
+        if not last_event_id:
+            return head, False
+        boot, _, seq = last_event_id.partition(':')
+        if boot != self.boot or not seq.isdigit() or int(seq) > head:
+            return head, True
+        seq = int(seq)
+        return seq, seq < oldest - 1
+
+    def since(self, seq, topics=None):
+        """序號 seq 之後、topic 相符的事件，以及目前最新序號"""
+        with self._cond:
+            head = self._seq
+            if not self._log or seq >= head:
+                return [], head
+            start = max(0, seq + 1 - self._log[0][0])
+            items = list(islice(self._log, start, None))
+        return [item for item in items if topics is None or item[1] is None or item[1] in topics], head
+
+    def _render(self, item):
+        seq, _topic, event, data = item
+        return format_event(data, event=event, event_id=f'{self.boot}:{seq}')
+
+    def _prelude(self, reset):
+        yield f'retry: {RETRY_MS}\n\n'
+        if reset:
+            yield format_event('{}', event='reset', event_id=f'{self.boot}:{self._seq}')
+
+    def stream(self, topics=None, last_event_id=None,
+               heartbeat=HEARTBEAT_SECONDS, max_duration=MAX_STREAM_SECONDS):
+        seq, reset = self.resume_point(last_event_id)
+        yield from self._prelude(reset)
+        deadline = time.monotonic() + max_duration
+        last_sent = time.monotonic()
+        while time.monotonic() < deadline:
+            events, head = self.since(seq, topics)
+            for item in events:
+                yield self._render(item)
+            if events:
+                last_sent = time.monotonic()
+            seq = head
+            with self._cond:
+                if self._seq == seq:
+                    self._cond.wait(timeout=max(0.0, min(heartbeat, deadline - time.monotonic())))
+            if time.monotonic() - last_sent >= heartbeat:
+                yield ': ping\n\n'
+                last_sent = time.monotonic()
+
+    async def astream(self, topics=None, last_event_id=None,
+                      heartbeat=HEARTBEAT_SECONDS, max_duration=MAX_STREAM_SECONDS):
+        seq, reset = self.resume_point(last_event_id)
+        for chunk in self._prelude(reset):
+            yield chunk
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            self._async_waiters.add(waiter)
+        try:
+            deadline = time.monotonic() + max_duration
+            last_sent = time.monotonic()
+            while time.monotonic() < deadline:
+                events, head = self.since(seq, topics)
+                for item in events:
+                    yield self._render(item)
+                if events:
+                    last_sent = time.monotonic()
+                seq = head
+                waiter[1].clear()
+                if self._seq == seq:
+                    try:
+                        await asyncio.wait_for(
+                            waiter[1].wait(), timeout=max(0.0, min(heartbeat, deadline - time.monotonic())))
+                    except asyncio.TimeoutError:
+                        pass
+                if time.monotonic() - last_sent >= heartbeat:
+                    yield ': ping\n\n'
+                    last_sent = time.monotonic()
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+
+    def response(self, request, topics=None):
+        """依執行環境（ASGI／WSGI）回傳 text/event-stream 串流回應"""
+        last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        if hasattr(request, 'scope'):  # ASGIRequest
+            stream = self.astream(topics, last_event_id)
+        elif self._wsgi_streams.acquire(blocking=False):
+            stream = _LimitedStream(self.stream(topics, last_event_id), self._wsgi_streams)
+        else:
+            response = HttpResponse('SSE 連線數已達上限，請稍後重試', status=503, content_type='text/plain; charset=utf-8')
+            response['Retry-After'] = str(RETRY_MS // 1000)
+            return response
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # 關閉 nginx 緩衝
+        return response
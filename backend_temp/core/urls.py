@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import HomeBundleView, OutboxStatsView, PerfSummaryView
+
+app_name = 'core'
+
+urlpatterns = [
+    path('_perf/', PerfSummaryView.as_view(), name='perf-summary'),
+    path('_outbox/', OutboxStatsView.as_view(), name='outbox-stats'),
+    path('bundle/home/', HomeBundleView.as_view(), name='home-bundle'),
+]
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.db.models import Prefetch
+from django.db.models.functions import Substr
+from rest_framework import generics, status
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from articles.models import Article
+from articles.serializers import ArticleSummarySerializer
+from assessments.models import Test
+from assessments.serializers import TestSerializer
+from therapists.availability import VERSION_NAME as AVAILABILITY_VERSION
+from therapists.models import Specialty, SpecialtyCategory, TherapistProfile
+from therapists.serializers import SpecialtyCategoryTreeSerializer, TherapistProfileSerializer
+
+from .outbox import queue_stats
+from .profiling import recorder
+from .response_cache import CachedResponseMixin
+
+FEATURED_THERAPISTS = getattr(settings, 'HOME_FEATURED_THERAPISTS', 6)
+LATEST_ARTICLES = getattr(settings, 'HOME_LATEST_ARTICLES', 5)
+EXCERPT_LENGTH = 120
+
+
+class PerfSummaryView(APIView):
+    """
+    GET    /api/_perf/   依 view 彙整的延遲百分位、查詢數、DB／序列化時間與重複查詢
+    DELETE /api/_perf/   清空 ring buffer
+    僅限管理員；需 settings.PERF_PROFILING = True 才會有資料
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(recorder.summary())
+
+    def delete(self, request):
+        recorder.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class OutboxStatsView(APIView):
+    """
+    GET /api/_outbox/   outbox 佇列深度（各狀態筆數、最舊待處理事件延遲、各 topic 待處理數）
+    僅限管理員
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(queue_stats())
+
+
+class HomeBundleView(CachedResponseMixin, generics.GenericAPIView):
+    """
+    GET /api/bundle/home/   首頁所需資料一次取得（取代心理師、專業領域、分類、文章、測驗五個請求）
+    - featured_therapists：最新 HOME_FEATURED_THERAPISTS 位心理師（格式同 /api/therapists/profiles/）
+    - specialty_categories：分類與其下啟用中的專業領域
+    - latest_articles：最新 HOME_LATEST_ARTICLES 篇文章摘要
+    - tests：測驗列表
+    查詢數固定（8 次），與資料量無關；整份回應以預先壓縮的形式快取，任一來源異動時失效，支援 ETag／304
+    """
+    permission_classes = [AllowAny]
+    cache_dependencies = ('therapists', AVAILABILITY_VERSION, 'articles', 'assessments')
+
+    def get(self, request, *args, **kwargs):
+        return self.cached_response(self.assemble, request)
+
+    def assemble(self, request):
+        context = self.get_serializer_context()
+        therapists = (
+            TherapistProfile.objects
+            .prefetch_related('available_times', 'specialties__category')
+            .order_by('-created_at')[:FEATURED_THERAPISTS]
+        )
+        categories = SpecialtyCategory.objects.prefetch_related(
+            Prefetch('specialties', queryset=Specialty.objects.filter(is_active=True).order_by('name'))
+        ).order_by('name')
+        articles = (
+            Article.objects
+            .only('id', 'title', 'tags', 'author_id', 'published_at', 'updated_at')
+            .annotate(excerpt=Substr('content', 1, EXCERPT_LENGTH))
+            .order_by('-published_at')[:LATEST_ARTICLES]
+        )
+        return Response({
+            'featured_therapists': TherapistProfileSerializer(therapists, many=True, context=context).data,
+            'specialty_categories': SpecialtyCategoryTreeSerializer(categories, many=True, context=context).data,
+            'latest_articles': ArticleSummarySerializer(articles, many=True, context=context).data,
+            'tests': TestSerializer(Test.objects.all(), many=True, context=context).data,
+        })
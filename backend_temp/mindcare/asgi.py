@@ -0,0 +1,15 @@
+"""
+ASGI 進入點（uvicorn mindcare.asgi:application）
+
+ASGI 模式預設開啟 ASYNC_READ_VIEWS：公開的唯讀 API（心理師、專業領域、文章、測驗題目）
+改由 async view 以 async ORM 處理，單一 worker 可同時服務大量慢速連線；
+時段即時串流（SSE）也以 async generator 執行，不佔用執行緒。
+"""
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mindcare.settings')
+os.environ.setdefault('ASYNC_READ_VIEWS', 'True')
+
+application = get_asgi_application()
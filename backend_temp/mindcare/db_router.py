@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import connections
+
+
+class ReadReplicaRouter:
+    """
+    讀寫分離：REPLICA_READ_MODELS 中的 model 讀取走 'replica'，其餘一律走 'default'。
+    - 在主資料庫交易中（例如預約流程）的讀取仍走 'default'，避免讀到尚未同步的資料
+    - 寫入與 migration 只在 'default' 執行
+    """
+    replica_models = frozenset(settings.REPLICA_READ_MODELS)
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower not in self.replica_models:
+            return 'default'
+        if connections['default'].in_atomic_block:
+            return 'default'
+        return 'replica'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 副本與主資料庫內容相同，跨庫關聯視為同一份資料
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
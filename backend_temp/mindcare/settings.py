@@ -1,5 +1,9 @@
 import os
+from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
+from corsheaders.defaults import default_headers
+from django.core.exceptions import ImproperlyConfigured
 # 自動載入 .env
 from dotenv import load_dotenv
 load_dotenv()
@@ -7,11 +11,16 @@ load_dotenv()
 # 專案根目錄路徑（BASE_DIR 是推薦的標準）
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# 🌱 執行環境：dev（預設）/ test / prod，由 DJANGO_ENV 決定
+DJANGO_ENV = os.getenv('DJANGO_ENV', 'dev')
+if DJANGO_ENV not in ('dev', 'test', 'prod'):
+    raise ImproperlyConfigured(f"DJANGO_ENV 必須是 dev / test / prod，目前為 {DJANGO_ENV!r}")
+
 # 🔐 安全金鑰（開發時可用 .env 管理）
 SECRET_KEY = os.getenv("SECRET_KEY", "django-insecure-temp")
 
-# 🚧 開發階段建議設定 True，正式部署記得關閉
-DEBUG = True
+# 🚧 prod 一律關閉 DEBUG（DEBUG 會讓 Django 把每個 SQL 查詢留在記憶體）；dev / test 可用 .env 的 DEBUG 控制
+DEBUG = DJANGO_ENV != 'prod' and os.getenv('DEBUG', 'True') == 'True'
 
 # 允許的前端來源（React 前端用）
 ALLOWED_HOSTS = ["*"]  # 或指定 frontend 網域
@@ -36,11 +45,15 @@ INSTALLED_APPS = [
     'appointments',
     'assessments',
     'articles',
+    'core',
+    'analytics',
 ]
 
 # ✅ 中介軟體（React 跨來源支援、Admin 正常啟動所需）
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # 跨來源支援
+    'core.profiling.QueryProfilingMiddleware',  # 效能分析（PERF_PROFILING 關閉時自動移除）
+    'core.compression.CompressionMiddleware',  # gzip／brotli 壓縮（快取回應已預先壓縮，直接略過）
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,11 +63,18 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# ✅ 請求效能分析（預設關閉；開啟後由 /api/_perf/ 查看彙整）
+PERF_PROFILING = os.getenv('PERF_PROFILING', 'False') == 'True'
+PERF_RING_SIZE = int(os.getenv('PERF_RING_SIZE', '2000'))  # 保留最近幾筆請求
+
 # ✅ 主 URL 配置
 ROOT_URLCONF = 'mindcare.urls'
 
-# Debug: 印出 MYSQL_PASSWORD 是否有正確讀取
-print('DEBUG: MYSQL_PASSWORD from env =', os.getenv('MYSQL_PASSWORD'))
+# ✅ 部署進入點：WSGI（gunicorn mindcare.wsgi）或 ASGI（uvicorn mindcare.asgi:application）
+WSGI_APPLICATION = 'mindcare.wsgi.application'
+ASGI_APPLICATION = 'mindcare.asgi.application'
+# 公開唯讀 API 改用 async view；mindcare.asgi 預設開啟，WSGI 下保持關閉
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'False') == 'True'
 
 # ✅ TEMPLATES 設定（Django admin 需要）
 TEMPLATES = [
@@ -74,38 +94,197 @@ TEMPLATES = [
 ]
 
 # ✅ REST Framework 設定（使用 SimpleJWT）
+# 兩種驗證皆由快取解析使用者，熱請求不查資料庫（見 users/authentication.py）
 REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ),# 為postman新增
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',  # Authorization: Token <key>（Postman／後台）
+        'users.authentication.CachedJWTAuthentication',    # Authorization: Bearer <jwt>（心理師／管理員後台）
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',  # 預設登入才能操作
-    ]
+    ],
+    # 安裝 orjson 時以 orjson 編碼／解析 JSON（輸出與內建 JSONRenderer 相同）
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # 節流只套用在設定 throttle_scope 的 view（ScopedRateThrottle）
+    'DEFAULT_THROTTLE_RATES': {
+        'slot_hold': os.getenv('SLOT_HOLD_RATE', '20/min'),
+    },
+}
+
+# ✅ 身分驗證快取：行程內 LRU 容量與 TTL（秒）、共用快取 TTL（秒）
+TOKEN_AUTH_LOCAL_CACHE_SIZE = int(os.getenv('TOKEN_AUTH_LOCAL_CACHE_SIZE', '10000'))
+TOKEN_AUTH_LOCAL_TTL = int(os.getenv('TOKEN_AUTH_LOCAL_TTL', '30'))
+TOKEN_AUTH_SHARED_TTL = int(os.getenv('TOKEN_AUTH_SHARED_TTL', '300'))
+
+# ✅ JWT（後台登入用，/api/auth/jwt/）
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.getenv('JWT_ACCESS_MINUTES', '30'))),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# ✅ 快取：設定 REDIS_URL 時跨行程共用，否則為各行程各自的記憶體快取
+if os.getenv('REDIS_URL') and DJANGO_ENV != 'test':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # ✅ 自訂使用者模型
 AUTH_USER_MODEL = 'users.User'
 
-# Debug: 印出 MYSQL_DB 是否有正確讀取
-print('DEBUG: MYSQL_DB from env =', os.getenv('MYSQL_DB'))
-
 # ✅ 資料庫設定（MySQL，讀取環境變數）
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': os.getenv('MYSQL_DB', 'mindcare_v2'),
-        'USER': os.getenv('MYSQL_USER', 'root'),
-        'PASSWORD': os.getenv('MYSQL_PASSWORD', ''),
-        'HOST': os.getenv('MYSQL_HOST', '127.0.0.1'),
-        'PORT': os.getenv('MYSQL_PORT', '3306'),
+# - DB_CONN_MAX_AGE：連線保留秒數（prod 預設 60，重用連線省去每個請求重新連線）
+# - DB_POOL=True：改用 django-db-connection-pool 的連線池（選用套件）
+# - MYSQL_REPLICA_HOST：設定後公開唯讀 API 的查詢改走讀取副本
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '60' if DJANGO_ENV == 'prod' else '0'))
+DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+
+if DB_POOL and not find_spec('dj_db_conn_pool'):
+    raise ImproperlyConfigured("DB_POOL=True 需要先安裝 django-db-connection-pool[mysql]")
+
+
+def mysql_database(prefix='MYSQL'):
+    """由環境變數組出 MySQL 設定；副本（MYSQL_REPLICA_*）未設定的項目沿用主資料庫"""
+    def env(key, default):
+        return os.getenv(f'{prefix}_{key}') or os.getenv(f'MYSQL_{key}', default)
+
+    config = {
+        'ENGINE': 'dj_db_conn_pool.backends.mysql' if DB_POOL else 'django.db.backends.mysql',
+        'NAME': env('DB', 'mindcare_v2'),
+        'USER': env('USER', 'root'),
+        'PASSWORD': env('PASSWORD', ''),
+        'HOST': env('HOST', '127.0.0.1'),
+        'PORT': env('PORT', '3306'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        # 重用連線前先確認仍可用，避免 MySQL wait_timeout 後拿到斷線的連線
+        'CONN_HEALTH_CHECKS': DB_CONN_MAX_AGE > 0,
     }
-}
+    if DB_POOL:
+        config['POOL_OPTIONS'] = {
+            'POOL_SIZE': int(os.getenv('DB_POOL_SIZE', '10')),
+            'MAX_OVERFLOW': int(os.getenv('DB_POOL_MAX_OVERFLOW', '10')),
+            'RECYCLE': int(os.getenv('DB_POOL_RECYCLE', '300')),
+        }
+    return config
+
+
+if DJANGO_ENV == 'test' and os.getenv('TEST_DB_ENGINE', 'sqlite') == 'sqlite':
+    # test：預設使用記憶體 SQLite，不需要 MySQL
+    DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}
+else:
+    DATABASES = {'default': mysql_database()}
+    if os.getenv('MYSQL_REPLICA_HOST'):
+        DATABASES['replica'] = mysql_database('MYSQL_REPLICA')
+        DATABASE_ROUTERS = ['mindcare.db_router.ReadReplicaRouter']
+
+# 可以從讀取副本查詢的 model（公開唯讀 API 使用；預約、使用者、作答紀錄一律讀主資料庫）
+REPLICA_READ_MODELS = [
+    'therapists.therapistprofile',
+    'therapists.specialty',
+    'therapists.specialtycategory',
+    'therapists.availabletime',
+    'therapists.therapistprofile_specialties',
+    'articles.article',
+    'assessments.test',
+    'assessments.question',
+    'assessments.choice',
+]
+
+if DJANGO_ENV == 'test':
+    # 測試時改用快速雜湊，避免 PBKDF2 拖慢測試
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
 
 # ✅ 跨來源設定（給 React 前端用）
 CORS_ALLOW_ALL_ORIGINS = True  # 開發階段開放全部前端呼叫
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')  # 允許前端送出 Idempotency-Key
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
+
+# ✅ Idempotency-Key 紀錄保留秒數（預設 24 小時）
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', str(24 * 60 * 60)))
+
+# ✅ 預約結帳期間的時段保留（分鐘）
+SLOT_HOLD_MINUTES = int(os.getenv('SLOT_HOLD_MINUTES', '10'))
+SLOT_HOLD_MAX_MINUTES = int(os.getenv('SLOT_HOLD_MAX_MINUTES', '15'))
+# 每個用戶端（使用者或 IP）同時持有的保留上限；保留 API 的請求頻率見 DEFAULT_THROTTLE_RATES['slot_hold']
+SLOT_HOLD_MAX_PER_CLIENT = int(os.getenv('SLOT_HOLD_MAX_PER_CLIENT', '3'))
+# 候補名單通知的保留時間（分鐘）
+WAITLIST_OFFER_MINUTES = int(os.getenv('WAITLIST_OFFER_MINUTES', '60'))
+# 週期預約（/api/appointments/series/）一次最多幾次
+SERIES_MAX_OCCURRENCES = int(os.getenv('SERIES_MAX_OCCURRENCES', '26'))
+
+# ✅ 交易式 outbox（python manage.py run_worker 處理）：重試次數、退避秒數、租約秒數、完成事件保留天數
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))
+OUTBOX_BACKOFF_BASE = int(os.getenv('OUTBOX_BACKOFF_BASE', '5'))
+OUTBOX_BACKOFF_MAX = int(os.getenv('OUTBOX_BACKOFF_MAX', str(60 * 60)))
+OUTBOX_LEASE_SECONDS = int(os.getenv('OUTBOX_LEASE_SECONDS', str(5 * 60)))
+OUTBOX_RETENTION_DAYS = int(os.getenv('OUTBOX_RETENTION_DAYS', '7'))
+
+# ✅ 寄信設定（預設印在 console；正式環境以 EMAIL_BACKEND／EMAIL_HOST 等設定 SMTP）
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False') == 'True'
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@mindcare.local')
+# 通知信中的預約連結（候補時段通知帶 ?slot=&hold_id=，以 hold_id 預約保證成功）
+BOOKING_URL = os.getenv('BOOKING_URL', 'http://localhost:3000/booking')
+
+# ✅ 時段即時狀態串流（SSE）：事件紀錄筆數（Last-Event-ID 可續傳的範圍）、心跳間隔、單次連線最長秒數
+SSE_EVENT_LOG_SIZE = int(os.getenv('SSE_EVENT_LOG_SIZE', '1000'))
+SSE_HEARTBEAT_SECONDS = int(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+SSE_MAX_STREAM_SECONDS = int(os.getenv('SSE_MAX_STREAM_SECONDS', '600'))
+# 多行程部署以 Redis pub/sub 轉送事件（需安裝 redis）；未設定時事件只在發生的行程內廣播（僅適用單一行程）
+SSE_BROKER_URL = os.getenv('SSE_BROKER_URL') or os.getenv('REDIS_URL', '')
+# WSGI 每條連線佔一個執行緒：每個行程同時最多幾條，超過回 503
+SSE_WSGI_MAX_STREAMS = int(os.getenv('SSE_WSGI_MAX_STREAMS', '16'))
+
+# ✅ 回應壓縮與快取：小於 COMPRESS_MIN_SIZE bytes 不壓縮；公開唯讀 API 的快取回應保留秒數
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '500'))
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', str(10 * 60)))
+
+# ✅ 首頁 bundle（/api/bundle/home/）：精選心理師人數、最新文章篇數
+HOME_FEATURED_THERAPISTS = int(os.getenv('HOME_FEATURED_THERAPISTS', '6'))
+HOME_LATEST_ARTICLES = int(os.getenv('HOME_LATEST_ARTICLES', '5'))
+
+# ✅ 心理師推薦（/api/therapists/recommendations/）：最近可預約時間的重新查詢間隔（秒）
+RECOMMENDATION_AVAILABILITY_TTL = int(os.getenv('RECOMMENDATION_AVAILABILITY_TTL', '60'))
+
+# ✅ 心理師每週排班（/api/therapists/me/schedule/）：每個時段的分鐘數、依排班建立未來幾天的時段
+SCHEDULE_SLOT_MINUTES = int(os.getenv('SCHEDULE_SLOT_MINUTES', '60'))
+SCHEDULE_HORIZON_DAYS = int(os.getenv('SCHEDULE_HORIZON_DAYS', '28'))
+# 單一時段的長度上限（分鐘）；重疊檢查只需查看開始時間在此範圍內的時段
+SLOT_MAX_MINUTES = int(os.getenv('SLOT_MAX_MINUTES', '240'))
+
+# ✅ 行事曆訂閱（/api/appointments/calendar/<token>.ics）：建議的輪詢間隔（分鐘）、
+#    快取保留秒數（內容異動時以版本號失效，可以放長）、超過此大小（bytes）的內容不快取本體
+ICAL_REFRESH_MINUTES = int(os.getenv('ICAL_REFRESH_MINUTES', '15'))
+ICAL_CACHE_TTL = int(os.getenv('ICAL_CACHE_TTL', str(24 * 60 * 60)))
+ICAL_CACHE_MAX_BYTES = int(os.getenv('ICAL_CACHE_MAX_BYTES', str(1024 * 1024)))
+
+# ✅ 增量同步（?updated_since=）：回傳的 next_since 往前重疊的秒數、刪除紀錄保留天數
+DELTA_SYNC_OVERLAP_SECONDS = int(os.getenv('DELTA_SYNC_OVERLAP_SECONDS', '5'))
+TOMBSTONE_RETENTION_DAYS = int(os.getenv('TOMBSTONE_RETENTION_DAYS', '30'))
+# 增量同步每頁最多幾筆（其餘以 ?cursor= 取得）
+DELTA_SYNC_PAGE_SIZE = int(os.getenv('DELTA_SYNC_PAGE_SIZE', '500'))
+# /api/therapists/slots/ 未指定心理師時 from／to 區間的上限（天）
+SLOT_LIST_MAX_DAYS = int(os.getenv('SLOT_LIST_MAX_DAYS', '31'))
 
 # ✅ 靜態檔案設定（管理頁面 / CSS）
 STATIC_URL = '/static/'
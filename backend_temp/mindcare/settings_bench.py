@@ -0,0 +1,19 @@
+"""
+基準測試／本機壓測用設定：改用 SQLite，不需要 MySQL。
+
+    python manage.py migrate --settings=mindcare.settings_bench
+    python manage.py seed_benchmark --settings=mindcare.settings_bench
+    python manage.py benchmark --settings=mindcare.settings_bench -o report.json
+"""
+from .settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('BENCH_SQLITE_PATH', os.path.join(BASE_DIR, 'bench.sqlite3')),
+        # 交易一開始就取得寫入鎖並等待，避免併發壓測時「讀後寫」升級鎖失敗（database is locked）
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 60},
+    }
+}
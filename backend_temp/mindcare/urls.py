@@ -9,5 +9,7 @@ urlpatterns = [
     path('api/assessments/', include('assessments.urls')),
     path('api/articles/', include('articles.urls')),
     path('api/', include('articles.urls')),
+    path('api/analytics/', include('analytics.urls')),      # 時段使用率、營收月報表（僅管理員）
+    path('api/', include('core.urls')),                       # /api/bundle/home/ 首頁 bundle、/api/_perf/ 效能彙整（僅管理員）
     path('api/auth/token/', obtain_auth_token),  # 登入 API
 ]
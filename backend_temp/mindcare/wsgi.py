@@ -0,0 +1,10 @@
+"""
+WSGI 進入點（gunicorn mindcare.wsgi:application）
+"""
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mindcare.settings')
+
+application = get_wsgi_application()
@@ -1,5 +1,38 @@
 from django.contrib import admin
-from .models import TherapistProfile, AvailableTime, Specialty, SpecialtyCategory
+from django.db import connection
+from django.db.models import Count
+from core.paginators import EstimatedCountPaginator
+from .models import TherapistProfile, AvailableTime, AvailableSlot, Specialty, SpecialtyCategory
+
+
+class ConsultationModeFilter(admin.SimpleListFilter):
+    """
+    諮詢模式篩選：選項直接取自 CONSULTATION_CHOICES，不需掃描所有心理師的 JSON 欄位
+    """
+    title = "諮詢模式"
+    parameter_name = 'consultation_mode'
+
+    def lookups(self, request, model_admin):
+        return TherapistProfile.CONSULTATION_CHOICES
+
+    def queryset(self, request, queryset):
+        mode = self.value()
+        if mode not in dict(TherapistProfile.CONSULTATION_CHOICES):
+            return queryset
+        if connection.features.supports_json_field_contains:
+            return queryset.filter(consultation_modes__contains=[mode])
+        # SQLite 不支援 JSON contains，改比對序列化後的文字
+        return queryset.filter(consultation_modes__icontains=f'"{mode}"')
+
+
+class SpecialtyListFilter(admin.RelatedFieldListFilter):
+    """專業領域篩選：選項顯示「分類 - 名稱」，一次 join 分類，避免每個選項各查一次"""
+    def field_choices(self, field, request, model_admin):
+        return [
+            (specialty.pk, str(specialty))
+            for specialty in Specialty.objects.select_related('category').order_by('category__name', 'name')
+        ]
+
 
 class AvailableTimeInline(admin.TabularInline):
     model = AvailableTime
@@ -12,9 +45,9 @@ class AvailableTimeInline(admin.TabularInline):
 class TherapistProfileAdmin(admin.ModelAdmin):
     list_display = (
         'name', 'title', 'license_number',
-        'get_consultation_modes', 'get_pricing_summary', 'created_at'
+        'get_consultation_modes', 'get_pricing_summary', 'next_available_at', 'created_at'
     )
-    list_filter = ('consultation_modes', 'specialties')
+    list_filter = (ConsultationModeFilter, ('specialties', SpecialtyListFilter))
     search_fields = ('name', 'specialties__name', 'specialties_text', 'license_number')
     ordering = ('-created_at',)
     inlines = [AvailableTimeInline]
@@ -68,15 +101,34 @@ class AvailableTimeAdmin(admin.ModelAdmin):
     autocomplete_fields = ('therapist',)  # 讓可預約時段更方便地選擇心理師
 
 
+@admin.register(AvailableSlot)
+class AvailableSlotAdmin(admin.ModelAdmin):
+    list_display = ('therapist', 'slot_time', 'ends_at', 'is_booked', 'held_until', 'updated_at')
+    list_filter = ('is_booked',)
+    search_fields = ('therapist__name',)
+    ordering = ('-slot_time',)
+    list_select_related = ('therapist',)
+    autocomplete_fields = ('therapist',)
+    readonly_fields = ('hold_id', 'held_until', 'held_by', 'updated_at')
+    # 時段數量大：估算總筆數，篩選時不另算全表筆數
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
 @admin.register(SpecialtyCategory)
 class SpecialtyCategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'description', 'get_specialties_count', 'created_at')
     search_fields = ('name', 'description')
     ordering = ('name',)
-    
+
+    def get_queryset(self, request):
+        # 以註記一次算出數量，避免每列各一次 COUNT
+        return super().get_queryset(request).annotate(specialties_count=Count('specialties'))
+
     def get_specialties_count(self, obj):
-        return obj.specialties.count()
+        return obj.specialties_count
     get_specialties_count.short_description = "專業領域數量"
+    get_specialties_count.admin_order_field = 'specialties_count'
 
 
 class SpecialtyInline(admin.TabularInline):
@@ -99,9 +151,13 @@ class SpecialtyAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(therapists_count=Count('therapists'))
+
     def get_therapists_count(self, obj):
-        return obj.therapists.count()
+        return obj.therapists_count
     get_therapists_count.short_description = "使用療師數量"
+    get_therapists_count.admin_order_field = 'therapists_count'
 
 
 # 在 SpecialtyCategoryAdmin 中加入 inline
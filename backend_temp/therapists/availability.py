@@ -0,0 +1,76 @@
+"""
+心理師的最近可預約時間（TherapistProfile.next_available_at）與未來 WINDOW_DAYS 天的空檔數（free_slots_14d）
+
+列表以 ?ordering=next_available_at 排序時直接使用這兩個欄位，不需對每位心理師查詢 AvailableSlot。
+- 預約、取消、時段新增／刪除／改期時由 appointments/signals.py 在交易提交後重算該心理師（schedule_refresh）
+- bulk_create 等不發出訊號的批次寫入後呼叫 refresh(therapist_ids)
+- 時間經過會讓欄位過期（最近時段變成過去、14 天視窗移動），需以 cron 定期執行
+  `python manage.py refresh_availability`
+
+只看 is_booked，不考慮結帳中的短暫保留（保留逾期不會發出事件，計入反而會讓欄位停在錯誤的值）。
+數值有變的心理師會一併更新 updated_at（增量同步才取得得到新值），並讓 VERSION_NAME 失效：
+只有內含這兩個欄位的回應快取（心理師列表／詳情、首頁）依賴它；搜尋建議、推薦矩陣等快照只依賴 therapists，
+不會因為每次預約而重建。數值沒變時不寫入、不失效。即時的時段狀態請用 /api/therapists/slots/ 或時段串流。
+"""
+from datetime import timedelta
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from core.response_cache import bump
+
+from .models import AvailableSlot, TherapistProfile
+
+WINDOW_DAYS = 14
+# 最近可預約時間／空檔數異動的快取版本名稱（core.response_cache 的 bump()／versions()）
+VERSION_NAME = 'therapists:availability'
+BATCH_SIZE = 500
+
+
+def compute(therapist_ids=None, now=None):
+    """心理師 id → (next_available_at, free_slots_14d)；沒有空檔的心理師不在結果中（1 次 GROUP BY 查詢）"""
+    now = now or timezone.now()
+    slots = AvailableSlot.objects.filter(slot_time__gt=now, is_booked=False)
+    if therapist_ids is not None:
+        slots = slots.filter(therapist_id__in=therapist_ids)
+    rows = (
+        slots.values('therapist_id')
+        .annotate(
+            next_slot=Min('slot_time'),
+            free=Count('id', filter=Q(slot_time__lt=now + timedelta(days=WINDOW_DAYS))),
+        )
+        .order_by()
+        .values_list('therapist_id', 'next_slot', 'free')
+    )
+    return {therapist_id: (next_slot, free) for therapist_id, next_slot, free in rows}
+
+
+def refresh(therapist_ids=None, now=None):
+    """重算並寫回指定心理師（None 為全部）；只更新數值有變的列，回傳更新筆數"""
+    now = now or timezone.now()
+    values = compute(therapist_ids, now)
+    profiles = TherapistProfile.objects.all()
+    if therapist_ids is not None:
+        profiles = profiles.filter(pk__in=therapist_ids)
+
+    changed = []
+    for pk, next_available_at, free_slots in profiles.values_list('pk', 'next_available_at', 'free_slots_14d'):
+        fresh = values.get(pk, (None, 0))
+        if (next_available_at, free_slots) != fresh:
+            changed.append(TherapistProfile(
+                pk=pk, next_available_at=fresh[0], free_slots_14d=fresh[1], updated_at=now,
+            ))
+    if changed:
+        # bulk_update 不觸發 auto_now 與訊號：updated_at 與快取失效需自行處理
+        TherapistProfile.objects.bulk_update(
+            changed, ['next_available_at', 'free_slots_14d', 'updated_at'], batch_size=BATCH_SIZE,
+        )
+        bump(VERSION_NAME)
+    return len(changed)
+
+
+def schedule_refresh(therapist_id):
+    """交易提交後重算單一心理師；不在預約交易中鎖定心理師資料列"""
+    transaction.on_commit(partial(refresh, [therapist_id]))
@@ -0,0 +1,27 @@
+"""
+時段即時狀態事件（/api/therapists/.../slots/stream/ 的 SSE 來源）
+
+事件類型：
+- added     新增時段
+- held      時段被保留（附 held_until，逾期即視為可預約，不另發事件）
+- booked    時段被預約
+- released  預約取消或保留提前釋放，時段重新開放
+"""
+from django.db import transaction
+
+from core.sse import EventHub
+
+slot_hub = EventHub('slots')
+
+
+def emit_slot_event(kind, slot, held_until=None):
+    """交易提交後才廣播，避免回滾的變更被推送出去"""
+    payload = {
+        'type': kind,
+        'slot': slot.pk,
+        'therapist': slot.therapist_id,
+        'slot_time': slot.slot_time,
+        'ends_at': slot.ends_at,
+        'held_until': held_until,
+    }
+    transaction.on_commit(lambda: slot_hub.publish(slot.therapist_id, 'slot', payload))
@@ -0,0 +1,263 @@
+"""
+批次匯入／同步心理師資料
+
+用法：
+    python manage.py import_therapists therapists.json
+    python manage.py import_therapists therapists.csv --dry-run
+
+- 以 license_number（證照字號）作為唯一鍵 upsert TherapistProfile
+- 專業領域名稱一次查詢解析成 name → id 對照表
+- 專業領域關聯直接對 M2M through table 做批次新增／刪除
+- 重複執行結果相同（idempotent），未變動的資料不會寫入
+"""
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.response_cache import bump
+from therapists.models import Specialty, TherapistProfile
+
+# 匯入時會比對／更新的欄位（created_at、user、photo 不由匯入檔控制）
+SYNC_FIELDS = (
+    'name', 'title', 'education', 'experience', 'beliefs',
+    'publications', 'consultation_modes', 'pricing', 'specialties_text',
+)
+LIST_FIELDS = ('publications', 'consultation_modes', 'specialties')
+BATCH_SIZE = 500
+
+
+class DryRunRollback(Exception):
+    """--dry-run 時用來回滾交易"""
+
+
+def _split_list(value):
+    """CSV 欄位中的清單：可為 JSON 陣列，或以 | 、 , 分隔的字串"""
+    if isinstance(value, list):
+        return value
+    value = (value or '').strip()
+    if not value:
+        return []
+    if value.startswith('['):
+        return json.loads(value)
+    for sep in ('|', '、', ','):
+        if sep in value:
+            return [v.strip() for v in value.split(sep) if v.strip()]
+    return [value]
+
+
+def _price(value):
+    """收費統一為數值：整數金額為 int，其餘為 float（"1200"、1200.0 與 1200 視為相同）"""
+    try:
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        return value
+    return int(amount) if amount == amount.to_integral_value() else float(amount)
+
+
+def _normalize_pricing(pricing):
+    return {mode: _price(price) for mode, price in (pricing or {}).items()}
+
+
+def _comparable(field, value):
+    # 資料庫中的收費可能是舊資料的字串或 float，比較前一併正規化，避免誤判為變動
+    return _normalize_pricing(value) if field == 'pricing' else value
+
+
+def _normalize_row(row):
+    """將 CSV / JSON 的一列資料整理成統一格式"""
+    data = {key: (val.strip() if isinstance(val, str) else val) for key, val in row.items() if key}
+    for field in LIST_FIELDS:
+        data[field] = _split_list(data.get(field))
+
+    pricing = data.get('pricing') or {}
+    if isinstance(pricing, str):
+        pricing = json.loads(pricing) if pricing else {}
+    # CSV 也可用 price_online / price_offline 欄位表示收費
+    for mode, _label in TherapistProfile.CONSULTATION_CHOICES:
+        price = data.pop(f'price_{mode}', None)
+        if price not in (None, ''):
+            pricing[mode] = price
+    data['pricing'] = _normalize_pricing(pricing)
+
+    if not data.get('specialties_text'):
+        data['specialties_text'] = '、'.join(data['specialties'])
+    for field in ('title', 'education', 'experience', 'beliefs'):
+        data.setdefault(field, '')
+    return data
+
+
+def load_rows(path, fmt=None):
+    """讀取 CSV 或 JSON 檔，回傳 dict 列表"""
+    fmt = fmt or path.suffix.lstrip('.').lower()
+    with path.open(encoding='utf-8-sig') as fh:
+        if fmt == 'json':
+            rows = json.load(fh)
+            if isinstance(rows, dict):
+                rows = rows.get('therapists', [])
+        elif fmt == 'csv':
+            rows = list(csv.DictReader(fh))
+        else:
+            raise CommandError(f"不支援的檔案格式：{fmt}（僅支援 csv / json）")
+    return [_normalize_row(row) for row in rows]
+
+
+class Command(BaseCommand):
+    help = '從 CSV / JSON 批次匯入或同步心理師資料（以 license_number 為唯一鍵）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV 或 JSON 檔案路徑')
+        parser.add_argument('--format', choices=['csv', 'json'], help='檔案格式（預設依副檔名判斷）')
+        parser.add_argument('--dry-run', action='store_true', help='只顯示差異，不寫入資料庫')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f"找不到檔案：{path}")
+
+        rows = load_rows(path, options['format'])
+        try:
+            with transaction.atomic():
+                report = self.sync(rows)
+                # 批次寫入不會發出 signal，需自行讓心理師列表的快取失效（dry-run 回滾時不會執行）
+                bump('therapists')
+                if options['dry_run']:
+                    raise DryRunRollback
+        except DryRunRollback:
+            self.stdout.write(self.style.WARNING('（dry-run：未寫入任何資料）'))
+
+        self.print_report(report, verbose=options['verbosity'] >= 2)
+
+    # ───────── 同步主流程 ─────────
+    def sync(self, rows):
+        report = {
+            'created': [], 'updated': [], 'unchanged': [],
+            'invalid': [], 'missing_specialties': set(),
+            'links_added': 0, 'links_removed': 0,
+        }
+
+        # 1) 驗證、去除重複的 license_number（以檔案中最後一筆為準）
+        incoming = {}
+        for index, data in enumerate(rows, start=1):
+            license_number = data.get('license_number')
+            if not license_number or not data.get('name'):
+                report['invalid'].append((index, 'name / license_number 為必填'))
+                continue
+            profile = TherapistProfile(
+                license_number=license_number,
+                **{field: data[field] for field in SYNC_FIELDS}
+            )
+            try:
+                profile.clean()
+            except ValidationError as exc:
+                report['invalid'].append((index, '; '.join(exc.messages)))
+                continue
+            incoming[license_number] = (profile, data['specialties'])
+
+        if not incoming:
+            return report
+
+        # 2) 一次查出所有專業領域 name → id
+        wanted_names = {name for _, names in incoming.values() for name in names}
+        specialty_ids = dict(
+            Specialty.objects.filter(name__in=wanted_names).values_list('name', 'id')
+        )
+        report['missing_specialties'] = wanted_names - specialty_ids.keys()
+
+        # 3) 一次查出既有資料，計算差異
+        existing = {
+            row['license_number']: row
+            for row in TherapistProfile.objects
+            .filter(license_number__in=incoming.keys())
+            .values('license_number', *SYNC_FIELDS)
+        }
+        to_write = []
+        for license_number, (profile, _names) in incoming.items():
+            current = existing.get(license_number)
+            if current is None:
+                report['created'].append(license_number)
+            elif any(_comparable(field, current[field]) != _comparable(field, getattr(profile, field))
+                     for field in SYNC_FIELDS):
+                report['updated'].append(license_number)
+            else:
+                report['unchanged'].append(license_number)
+                continue
+            to_write.append(profile)
+
+        # 4) upsert（僅寫入新增或變動的資料）
+        if to_write:
+            upsert_kwargs = {
+                'update_conflicts': True,
+                'update_fields': [*SYNC_FIELDS, 'updated_at'],
+                'batch_size': BATCH_SIZE,
+            }
+            # MySQL 的 ON DUPLICATE KEY UPDATE 不能指定衝突欄位
+            if connection.features.supports_update_conflicts_with_target:
+                upsert_kwargs['unique_fields'] = ['license_number']
+            TherapistProfile.objects.bulk_create(to_write, **upsert_kwargs)
+
+        # 5) upsert 後重新取得 license_number → id（MySQL 不會回傳主鍵）
+        therapist_ids = dict(
+            TherapistProfile.objects
+            .filter(license_number__in=incoming.keys())
+            .values_list('license_number', 'id')
+        )
+
+        # 6) 同步 M2M：比對 through table 既有關聯，批次新增／刪除
+        Through = TherapistProfile.specialties.through
+        desired = {
+            (therapist_ids[license_number], specialty_ids[name])
+            for license_number, (_profile, names) in incoming.items()
+            for name in names if name in specialty_ids
+        }
+        current_links = {
+            (therapist_id, specialty_id): link_id
+            for link_id, therapist_id, specialty_id in Through.objects
+            .filter(therapistprofile_id__in=therapist_ids.values())
+            .values_list('id', 'therapistprofile_id', 'specialty_id')
+        }
+        stale = [link_id for pair, link_id in current_links.items() if pair not in desired]
+        fresh = [
+            Through(therapistprofile_id=therapist_id, specialty_id=specialty_id)
+            for therapist_id, specialty_id in desired - current_links.keys()
+        ]
+        if stale:
+            Through.objects.filter(id__in=stale).delete()
+        if fresh:
+            Through.objects.bulk_create(fresh, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        report['links_added'] = len(fresh)
+        report['links_removed'] = len(stale)
+
+        # 專業領域有變動的心理師也視為「更新」（through table 的批次寫入不會發出 signal，需自行更新 updated_at）
+        id_to_license = {v: k for k, v in therapist_ids.items()}
+        touched_ids = {tid for tid, _sid in desired ^ current_links.keys()}
+        if touched_ids:
+            TherapistProfile.objects.filter(id__in=touched_ids).update(updated_at=timezone.now())
+        touched = {id_to_license[tid] for tid in touched_ids}
+        for license_number in touched.intersection(report['unchanged']):
+            report['unchanged'].remove(license_number)
+            report['updated'].append(license_number)
+
+        return report
+
+    # ───────── 輸出差異報告 ─────────
+    def print_report(self, report, verbose=False):
+        if verbose:
+            for label, key in (('+', 'created'), ('~', 'updated')):
+                for license_number in report[key]:
+                    self.stdout.write(f"  {label} {license_number}")
+        for index, reason in report['invalid']:
+            self.stdout.write(self.style.ERROR(f"  第 {index} 筆資料無效：{reason}"))
+        for name in sorted(report['missing_specialties']):
+            self.stdout.write(self.style.WARNING(f"  警告：找不到專業領域 '{name}'"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"新增 {len(report['created'])} 筆、更新 {len(report['updated'])} 筆、"
+            f"未變動 {len(report['unchanged'])} 筆、無效 {len(report['invalid'])} 筆；"
+            f"專業領域關聯 +{report['links_added']} / -{report['links_removed']}"
+        ))
@@ -0,0 +1,29 @@
+"""
+依每週排班（AvailableTime）補上未來 SCHEDULE_HORIZON_DAYS 天缺少的時段（therapists/schedule.py）
+
+    python manage.py materialize_slots
+    python manage.py materialize_slots --therapist 3 8
+
+只新增不刪除：手動新增的時段與已預約的時段不受影響。時間經過後同步範圍會往後移，
+部署後以 cron 每天執行一次：
+    10 0 * * * cd /srv/mindcare/backend_temp && python manage.py materialize_slots
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from therapists.schedule import materialize
+
+
+class Command(BaseCommand):
+    help = '依每週排班補上未來的可預約時段'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--therapist', type=int, nargs='+', help='只處理指定心理師')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        created = materialize(options['therapist'])
+        self.stdout.write(self.style.SUCCESS(
+            f"已新增 {created} 個時段（{time.perf_counter() - start:.2f}s）"
+        ))
@@ -0,0 +1,29 @@
+"""
+重算心理師的最近可預約時間與未來 14 天空檔數（therapists/availability.py）
+
+    python manage.py refresh_availability
+    python manage.py refresh_availability --therapist 3 8
+
+時間經過會讓欄位過期，部署後以 cron 每 10 分鐘執行一次：
+    */10 * * * * cd /srv/mindcare/backend_temp && python manage.py refresh_availability
+bulk_create、QuerySet.update() 等不發出訊號的批次寫入之後也應執行。
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from therapists.availability import refresh
+
+
+class Command(BaseCommand):
+    help = '重算心理師最近可預約時間與未來 14 天空檔數'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--therapist', type=int, nargs='+', help='只重算指定心理師')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        changed = refresh(options['therapist'])
+        self.stdout.write(self.style.SUCCESS(
+            f"已更新 {changed} 位心理師的可預約時間（{time.perf_counter() - start:.2f}s）"
+        ))
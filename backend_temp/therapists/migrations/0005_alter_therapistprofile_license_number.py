@@ -0,0 +1,52 @@
+# Generated by Django 5.1.7 on 2026-10-19 10:00
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def normalize_license_numbers(apps, schema_editor):
+    """
+    加上唯一限制前整理既有的證照字號：去除前後空白；
+    空白的改為 MISSING-<id>，重複的保留 id 最小的一筆，其餘加上 #<id> 後綴，事後再人工更正
+    """
+    TherapistProfile = apps.get_model('therapists', 'TherapistProfile')
+    max_length = TherapistProfile._meta.get_field('license_number').max_length
+
+    for pk, license_number in TherapistProfile.objects.values_list('pk', 'license_number'):
+        stripped = (license_number or '').strip()
+        if stripped != license_number:
+            TherapistProfile.objects.filter(pk=pk).update(license_number=stripped)
+
+    for pk in TherapistProfile.objects.filter(license_number='').values_list('pk', flat=True):
+        TherapistProfile.objects.filter(pk=pk).update(license_number=f'MISSING-{pk}')
+
+    duplicated = (
+        TherapistProfile.objects.values('license_number').annotate(total=Count('pk'))
+        .filter(total__gt=1).values_list('license_number', flat=True)
+    )
+    for license_number in list(duplicated):
+        pks = TherapistProfile.objects.filter(license_number=license_number).order_by('pk').values_list('pk', flat=True)
+        for pk in list(pks)[1:]:
+            suffix = f'#{pk}'
+            TherapistProfile.objects.filter(pk=pk).update(
+                license_number=license_number[:max_length - len(suffix)] + suffix,
+            )
+
+
+class Migration(migrations.Migration):
+    # 整理資料與加上唯一限制分開提交：PostgreSQL 不允許同一交易中更新資料列後再 ALTER TABLE
+    # （pending trigger events）；整理步驟可重複執行
+    atomic = False
+
+    dependencies = [
+        ('therapists', '0004_migrate_specialties_data'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_license_numbers, migrations.RunPython.noop, atomic=True),
+        migrations.AlterField(
+            model_name='therapistprofile',
+            name='license_number',
+            field=models.CharField(help_text='證照字號（唯一，批次匯入時作為比對鍵）', max_length=50, unique=True),
+        ),
+    ]
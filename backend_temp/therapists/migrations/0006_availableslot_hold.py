@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('therapists', '0005_alter_therapistprofile_license_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='availableslot',
+            name='held_until',
+            field=models.DateTimeField(blank=True, help_text='保留到期時間；過期後視為可預約', null=True),
+        ),
+        migrations.AddField(
+            model_name='availableslot',
+            name='hold_id',
+            field=models.UUIDField(blank=True, help_text='目前保留的識別碼', null=True, unique=True),
+        ),
+    ]
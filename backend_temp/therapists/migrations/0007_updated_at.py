@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:27
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    """既有心理師的 updated_at 以建立時間初始化"""
+    TherapistProfile = apps.get_model('therapists', 'TherapistProfile')
+    TherapistProfile.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('therapists', '0006_availableslot_hold'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='availableslot',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='therapistprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='availableslot',
+            index=models.Index(fields=['therapist', 'updated_at'], name='slot_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='availableslot',
+            index=models.Index(fields=['updated_at'], name='slot_updated_idx'),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
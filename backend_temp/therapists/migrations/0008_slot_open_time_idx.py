@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('therapists', '0007_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='availableslot',
+            index=models.Index(fields=['slot_time', 'is_booked'], name='slot_open_time_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:45
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+
+def backfill_availability(apps, schema_editor):
+    """以現有時段初始化（同 therapists.availability.refresh，之後由訊號與 refresh_availability 維護）"""
+    TherapistProfile = apps.get_model('therapists', 'TherapistProfile')
+    AvailableSlot = apps.get_model('therapists', 'AvailableSlot')
+    now = timezone.now()
+    rows = (
+        AvailableSlot.objects.filter(slot_time__gt=now, is_booked=False)
+        .values('therapist_id')
+        .annotate(next_slot=Min('slot_time'), free=Count('id', filter=Q(slot_time__lt=now + timedelta(days=14))))
+        .order_by()
+        .values_list('therapist_id', 'next_slot', 'free')
+    )
+    profiles = [
+        TherapistProfile(pk=therapist_id, next_available_at=next_slot, free_slots_14d=free)
+        for therapist_id, next_slot, free in rows
+    ]
+    TherapistProfile.objects.bulk_update(profiles, ['next_available_at', 'free_slots_14d'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('therapists', '0008_slot_open_time_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='therapistprofile',
+            name='free_slots_14d',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='未來 14 天未被預約的時段數'),
+        ),
+        migrations.AddField(
+            model_name='therapistprofile',
+            name='next_available_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='最近一個未被預約的時段（沒有為 NULL）', null=True),
+        ),
+        migrations.RunPython(backfill_availability, migrations.RunPython.noop),
+    ]
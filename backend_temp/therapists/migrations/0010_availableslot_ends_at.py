@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 21:05
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_ends_at(apps, schema_editor):
+    """既有時段以預設時長補上結束時間（單一 UPDATE）"""
+    AvailableSlot = apps.get_model('therapists', 'AvailableSlot')
+    minutes = getattr(settings, 'SCHEDULE_SLOT_MINUTES', 60)
+    AvailableSlot.objects.update(ends_at=F('slot_time') + timedelta(minutes=minutes))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('therapists', '0009_next_available'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='availableslot',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, null=True, help_text='結束時間（不填為開始時間加上預設時長）'),
+        ),
+        migrations.RunPython(backfill_ends_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='availableslot',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, help_text='結束時間（不填為開始時間加上預設時長）'),
+        ),
+    ]
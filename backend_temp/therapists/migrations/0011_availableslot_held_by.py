@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('therapists', '0010_availableslot_ends_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='availableslot',
+            name='held_by',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='保留者（user:<id> 或 anon:<IP>），用於限制每個用戶端同時持有的保留數', max_length=100),
+        ),
+    ]
@@ -1,7 +1,9 @@
+from datetime import timedelta
 from decimal import Decimal
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -63,7 +65,7 @@ class TherapistProfile(models.Model):
     # 基本欄位
     name            = models.CharField(max_length=100, help_text="姓名")
     title           = models.CharField(max_length=100, help_text="頭銜，如：諮商所督導")
-    license_number  = models.CharField(max_length=50, help_text="證照字號")
+    license_number  = models.CharField(max_length=50, unique=True, help_text="證照字號（唯一，批次匯入時作為比對鍵）")
     education       = models.TextField(help_text="學歷 / 證書")
     experience      = models.TextField(help_text="經歷描述")
     specialties     = models.ManyToManyField(
@@ -81,6 +83,16 @@ class TherapistProfile(models.Model):
     publications    = models.JSONField(default=list, help_text="文章列表（字串陣列）")
     photo           = models.ImageField(upload_to='therapists/', null=True, blank=True)
     created_at      = models.DateTimeField(auto_now_add=True)
+    # 增量同步（?updated_since=）；時段設定、專業領域異動時一併更新（見 core/signals.py）
+    updated_at      = models.DateTimeField(auto_now=True, db_index=True)
+    # 最近可預約時間與未來 14 天空檔數；由 therapists/availability.py 維護，供 ?ordering=next_available_at 使用
+    next_available_at = models.DateTimeField(
+        null=True, blank=True, editable=False, db_index=True,
+        help_text="最近一個未被預約的時段（沒有為 NULL）"
+    )
+    free_slots_14d  = models.PositiveIntegerField(default=0, editable=False, help_text="未來 14 天未被預約的時段數")
+    # 重設行事曆訂閱網址時加一，讓舊網址失效（見 appointments/calendar.py）
+    calendar_token_version = models.PositiveIntegerField(default=0, editable=False)
 
     # 諮詢模式 & 收費
     CONSULTATION_CHOICES = [('online','線上'), ('offline','實體')]
@@ -162,14 +174,88 @@ class AvailableTime(models.Model):
 # ═══════════════════════════════════════════════════════════════════
 #  AvailableSlot  (實際某天某時段；被預約後 is_booked=True)
 # ═══════════════════════════════════════════════════════════════════
+# 時段預設時長與長度上限（分鐘）
+SLOT_MINUTES = getattr(settings, 'SCHEDULE_SLOT_MINUTES', 60)
+SLOT_MAX_MINUTES = getattr(settings, 'SLOT_MAX_MINUTES', 240)
+
+
+def default_slot_end(slot_time):
+    return slot_time + timedelta(minutes=SLOT_MINUTES)
+
+
+class AvailableSlotQuerySet(models.QuerySet):
+    def unheld(self, now=None):
+        """沒有保留，或保留已過期（過期的保留不需清除，下一次保留／預約時直接覆蓋）"""
+        now = now or timezone.now()
+        return self.filter(models.Q(held_until__isnull=True) | models.Q(held_until__lte=now))
+
+    def available(self, now=None):
+        """未來、未被預約、也沒有有效保留的時段"""
+        now = now or timezone.now()
+        return self.filter(is_booked=False, slot_time__gt=now).unheld(now)
+
+    def overlapping(self, start, end):
+        """
+        與 [start, end) 重疊的時段（相接不算重疊）。
+        時段長度不超過 SLOT_MAX_MINUTES，重疊者的開始時間必在 (start − 上限, end) 之間：
+        搭配心理師條件走 (therapist, slot_time) 索引的範圍掃描，不需另建區間索引
+        """
+        lower = start - timedelta(minutes=SLOT_MAX_MINUTES)
+        return self.filter(slot_time__gt=lower, slot_time__lt=end, ends_at__gt=start)
+
+
 class AvailableSlot(models.Model):
     therapist = models.ForeignKey(TherapistProfile, on_delete=models.CASCADE)
-    slot_time = models.DateTimeField()
+    slot_time = models.DateTimeField()  # 開始時間
+    # 結束時間；未指定時為開始時間 + SLOT_MINUTES（見 save()），長度不超過 SLOT_MAX_MINUTES
+    ends_at = models.DateTimeField(blank=True, help_text="結束時間（不填為開始時間加上預設時長）")
     is_booked = models.BooleanField(default=False)
+    # 結帳期間的短暫保留（POST /api/appointments/holds/）
+    hold_id = models.UUIDField(null=True, blank=True, unique=True, help_text="目前保留的識別碼")
+    held_until = models.DateTimeField(null=True, blank=True, help_text="保留到期時間；過期後視為可預約")
+    held_by = models.CharField(
+        max_length=100, blank=True, default='', db_index=True,
+        help_text="保留者（user:<id> 或 anon:<IP>），用於限制每個用戶端同時持有的保留數",
+    )
+    # 增量同步；以 update() 改變狀態時需一併設定（auto_now 只在 save() 時生效）
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = AvailableSlotQuerySet.as_manager()
 
     class Meta:
         ordering = ['therapist', 'slot_time']
         unique_together = ('therapist','slot_time')
+        indexes = [
+            # ?therapist=&updated_since=
+            models.Index(fields=['therapist', 'updated_at'], name='slot_sync_idx'),
+            models.Index(fields=['updated_at'], name='slot_updated_idx'),
+            # 可預約時段：slot_time > now AND is_booked=False ORDER BY slot_time（預約、保留、壓測挑選時段）
+            # slot_time 放前面：SQLite／PostgreSQL 上 is_booked=False 會編譯成 NOT is_booked，無法當索引前綴
+            models.Index(fields=['slot_time', 'is_booked'], name='slot_open_time_idx'),
+        ]
+
+    def clean(self):
+        super().clean()
+        if self.slot_time is None or self.therapist_id is None:
+            return
+        ends_at = self.ends_at or default_slot_end(self.slot_time)
+        if ends_at <= self.slot_time:
+            raise ValidationError({"ends_at": "結束時間必須晚於開始時間"})
+        if ends_at - self.slot_time > timedelta(minutes=SLOT_MAX_MINUTES):
+            raise ValidationError({"ends_at": f"時段長度不可超過 {SLOT_MAX_MINUTES} 分鐘"})
+        conflict = (
+            AvailableSlot.objects.filter(therapist_id=self.therapist_id)
+            .overlapping(self.slot_time, ends_at).exclude(pk=self.pk).first()
+        )
+        if conflict is not None:
+            raise ValidationError(f"與既有時段重疊：{timezone.localtime(conflict.slot_time):%Y-%m-%d %H:%M}")
+
+    def save(self, *args, **kwargs):
+        if self.ends_at is None and self.slot_time is not None:
+            self.ends_at = default_slot_end(self.slot_time)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'ends_at'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.therapist.name} @ {self.slot_time}"
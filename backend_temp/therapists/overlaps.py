@@ -0,0 +1,59 @@
+"""
+時段重疊檢查
+
+- 資料庫內的單筆檢查：AvailableSlotQuerySet.overlapping()（模型驗證、預約時使用）
+- IntervalIndex：排班展開時段時在記憶體內檢查（therapists/schedule.py），依開始時間排序後二分搜尋
+- therapist_overlaps()：稽核既有資料（python manage.py audit_slot_overlaps），
+  以視窗函數在單一查詢中找出重疊，不做兩兩比較
+
+三者都利用同一個前提：時段長度不超過 SLOT_MAX_MINUTES，與 [start, end) 重疊的時段
+開始時間必在 (start − 上限, end) 之間，只需檢查這個範圍。
+"""
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+from django.db.models import F, Max, Window
+from django.db.models.expressions import RowRange
+
+from .models import SLOT_MAX_MINUTES, AvailableSlot
+
+MAX_LENGTH = timedelta(minutes=SLOT_MAX_MINUTES)
+
+
+class IntervalIndex:
+    """依開始時間排序的 [start, end) 區間；add() 維持排序"""
+
+    def __init__(self, intervals=()):
+        self.intervals = sorted(intervals)
+        self.starts = [start for start, _end in self.intervals]
+
+    def overlaps(self, start, end):
+        low = bisect_right(self.starts, start - MAX_LENGTH)
+        high = bisect_left(self.starts, end)
+        return any(other_end > start for _other_start, other_end in self.intervals[low:high])
+
+    def add(self, start, end):
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.intervals.insert(position, (start, end))
+
+
+def therapist_overlaps(therapist_ids=None):
+    """
+    與同一心理師較早開始的時段重疊的時段（每組重疊回報較晚開始的一筆）。
+    依心理師分區、開始時間排序，視窗函數取得「前面所有時段的最晚結束時間」，晚於本時段開始即重疊。
+    """
+    slots = AvailableSlot.objects.all()
+    if therapist_ids is not None:
+        slots = slots.filter(therapist_id__in=therapist_ids)
+    return (
+        slots.annotate(previous_end=Window(
+            Max('ends_at'),
+            partition_by=[F('therapist_id')],
+            order_by=[F('slot_time').asc(), F('id').asc()],
+            frame=RowRange(start=None, end=-1),
+        ))
+        .filter(previous_end__gt=F('slot_time'))
+        .order_by('therapist_id', 'slot_time')
+        .values_list('id', 'therapist_id', 'slot_time', 'ends_at', 'previous_end')
+    )
@@ -0,0 +1,209 @@
+"""
+依測驗結果推薦心理師（GET /api/therapists/recommendations/）
+
+評分 = 專業領域契合度、最近可預約時間、價格三項加權：
+- 專業領域：PROFILES 定義各量表、風險等級對應的專業領域與權重，
+  契合度 = 心理師具備的專業領域權重和 / 全部權重和（0–1）
+- 可預約時間：最近一個可預約時段距今的天數，每 AVAILABILITY_HALF_LIFE_DAYS 天減半；沒有時段為 0
+- 價格：在所有心理師的價格區間中越便宜越高（0–1）
+諮詢方式與價格區間為硬性條件，不符合的心理師直接排除。
+
+心理師特徵以欄位陣列常駐記憶體（FeatureMatrix），專業領域以位元遮罩表示（one-hot 壓成 int），
+每次請求只做一輪線性掃描 + heapq 取前 k 名，不查詢資料庫：
+- 心理師、專業領域、收費異動時（response_cache 的 therapists 版本改變）重建
+- 最近可預約時間讀取 TherapistProfile.next_available_at（見 therapists/availability.py），
+  每 RECOMMENDATION_AVAILABILITY_TTL 秒（預設 60）重新查詢一次
+"""
+import heapq
+from typing import NamedTuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.snapshots import VersionedSnapshot
+
+from .models import Specialty, TherapistProfile
+
+AVAILABILITY_TTL = getattr(settings, 'RECOMMENDATION_AVAILABILITY_TTL', 60)
+AVAILABILITY_HALF_LIFE_DAYS = 7
+DEFAULT_K = 5
+MAX_K = 20
+
+WEIGHTS = {'specialty': 0.6, 'availability': 0.25, 'price': 0.15}
+# 高風險：盡快能見到心理師比價格重要
+URGENT_WEIGHTS = {'specialty': 0.5, 'availability': 0.4, 'price': 0.1}
+
+# (量表代碼, 風險等級) → 相關專業領域與權重；urgent 為需優先安排的高風險等級
+PROFILES = {
+    ('WHO5', '需要關注'): {
+        'urgent': True,
+        'specialties': {'憂鬱症治療': 1.0, '認知行為治療': 0.6, '正念治療': 0.4, '成人諮商': 0.3},
+    },
+    ('WHO5', '中度關注'): {
+        'urgent': False,
+        'specialties': {'認知行為治療': 0.6, '正念治療': 0.6, '焦慮症治療': 0.4, '人本主義治療': 0.3},
+    },
+    ('WHO5', '良好'): {
+        'urgent': False,
+        'specialties': {'人本主義治療': 0.4, '正念治療': 0.4, '成人諮商': 0.3},
+    },
+    ('BSRS5', '重度'): {
+        'urgent': True,
+        'specialties': {'自傷防治': 1.0, '憂鬱症治療': 0.8, '創傷治療': 0.5, '焦慮症治療': 0.5},
+    },
+    ('BSRS5', '中度'): {
+        'urgent': False,
+        'specialties': {'憂鬱症治療': 0.8, '焦慮症治療': 0.8, '認知行為治療': 0.5, '失眠治療': 0.4},
+    },
+    ('BSRS5', '輕度'): {
+        'urgent': False,
+        'specialties': {'焦慮症治療': 0.6, '失眠治療': 0.5, '正念治療': 0.5, '認知行為治療': 0.4},
+    },
+    ('BSRS5', '正常'): {
+        'urgent': False,
+        'specialties': {'人本主義治療': 0.4, '正念治療': 0.4, '成人諮商': 0.3},
+    },
+}
+
+MODES = [mode for mode, _label in TherapistProfile.CONSULTATION_CHOICES]
+
+
+class FeatureMatrix(NamedTuple):
+    """第 i 位心理師的特徵在各欄位的第 i 個元素"""
+    ids: list
+    names: list
+    titles: list
+    photos: list
+    prices: dict         # mode → 各心理師該模式價格（未提供該模式為 None）
+    min_prices: list     # 各心理師最低價格（未設定收費為 None）
+    specialty_masks: list
+    specialty_bits: dict   # 專業領域名稱 → 位元
+    price_range: tuple     # 所有心理師價格的 (最低, 最高)
+
+
+def _price(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def build_features():
+    """3 次查詢：啟用中的專業領域、心理師與專業領域的關聯、心理師"""
+    specialty_bits = {}
+    bit_of = {}
+    for specialty_id, name in Specialty.objects.filter(is_active=True).order_by('id').values_list('id', 'name'):
+        bit_of[specialty_id] = specialty_bits[name] = 1 << len(specialty_bits)
+
+    masks = {}
+    links = TherapistProfile.specialties.through.objects.values_list('therapistprofile_id', 'specialty_id')
+    for therapist_id, specialty_id in links:
+        masks[therapist_id] = masks.get(therapist_id, 0) | bit_of.get(specialty_id, 0)
+
+    ids, names, titles, photos, min_prices, specialty_masks = [], [], [], [], [], []
+    prices = {mode: [] for mode in MODES}
+    rows = TherapistProfile.objects.order_by('id').values_list(
+        'id', 'name', 'title', 'photo', 'consultation_modes', 'pricing',
+    )
+    for therapist_id, name, title, photo, consultation_modes, pricing in rows:
+        offered = {mode: _price((pricing or {}).get(mode)) for mode in consultation_modes or () if mode in MODES}
+        offered = {mode: price for mode, price in offered.items() if price is not None}
+        ids.append(therapist_id)
+        names.append(name)
+        titles.append(title)
+        photos.append(photo or None)
+        for mode in MODES:
+            prices[mode].append(offered.get(mode))
+        min_prices.append(min(offered.values()) if offered else None)
+        specialty_masks.append(masks.get(therapist_id, 0))
+
+    known = [price for price in min_prices if price is not None]
+    all_prices = [price for column in prices.values() for price in column if price is not None]
+    price_range = (min(known), max(all_prices)) if known else (0.0, 0.0)
+    return FeatureMatrix(
+        ids, names, titles, photos, prices, min_prices, specialty_masks, specialty_bits, price_range,
+    )
+
+
+def load_next_available():
+    """心理師 id → (最近一個可預約時段, 其 epoch 秒數)；讀取反正規化欄位，不掃描時段表"""
+    rows = TherapistProfile.objects.exclude(next_available_at=None).values_list('id', 'next_available_at')
+    return {therapist_id: (next_slot, next_slot.timestamp()) for therapist_id, next_slot in rows}
+
+
+features = VersionedSnapshot(build_features, ('therapists',))
+availability = VersionedSnapshot(load_next_available, ('therapists',), ttl=AVAILABILITY_TTL)
+
+
+class Recommendation(NamedTuple):
+    score: float
+    index: int
+    price: float
+    specialty: float
+    available: float
+    price_score: float
+    next_available_at: object
+
+
+def recommend(profile=None, mode=None, price_min=None, price_max=None, k=DEFAULT_K, now=None):
+    """
+    profile 為 PROFILES 中的項目（None 表示沒有測驗結果，只依可預約時間與價格排序）；
+    回傳 (FeatureMatrix, 依分數排序的 Recommendation 列表)
+    """
+    matrix = features.get()
+    next_slots = availability.get()
+    now = now or timezone.now()
+
+    weights = URGENT_WEIGHTS if profile and profile['urgent'] else WEIGHTS
+    wanted = [
+        (matrix.specialty_bits[name], weight)
+        for name, weight in (profile['specialties'].items() if profile else ())
+        if name in matrix.specialty_bits
+    ]
+    total_weight = sum(weight for _bit, weight in wanted) or 1.0
+    wanted_mask = sum(bit for bit, _weight in wanted)
+    lowest, highest = matrix.price_range
+    spread = highest - lowest
+    price_column = matrix.prices[mode] if mode else matrix.min_prices
+    half_life_seconds = AVAILABILITY_HALF_LIFE_DAYS * 86400
+    now_ts = now.timestamp()
+    # 契合度只取決於具備哪些推薦專業領域（最多 2^len(wanted) 種組合），每種組合只算一次
+    specialty_of = {}
+
+    scored = []
+    for index, therapist_id in enumerate(matrix.ids):
+        price = price_column[index]
+        if price is None:
+            continue
+        if (price_min is not None and price < price_min) or (price_max is not None and price > price_max):
+            continue
+        mask = matrix.specialty_masks[index] & wanted_mask
+        specialty = specialty_of.get(mask)
+        if specialty is None:
+            specialty = specialty_of[mask] = sum(weight for bit, weight in wanted if mask & bit) / total_weight
+        next_slot, next_ts = next_slots.get(therapist_id, (None, None))
+        if next_slot is None:
+            available = 0.0
+        else:
+            available = 0.5 ** (max(0.0, next_ts - now_ts) / half_life_seconds)
+        price_score = (highest - price) / spread if spread else 1.0
+        score = (
+            weights['specialty'] * specialty
+            + weights['availability'] * available
+            + weights['price'] * price_score
+        )
+        # 同分時 id 較小者優先
+        scored.append((score, -index, price, specialty, available, price_score, next_slot))
+    top = heapq.nlargest(k, scored)
+    return matrix, [
+        Recommendation(score, -negative_index, *rest) for score, negative_index, *rest in top
+    ]
+
+
+def matched_specialties(matrix, index, profile):
+    """第 index 位心理師具備的推薦專業領域（依權重排序）"""
+    if not profile:
+        return []
+    mask = matrix.specialty_masks[index]
+    ranked = sorted(profile['specialties'].items(), key=lambda item: -item[1])
+    return [name for name, _weight in ranked if mask & matrix.specialty_bits.get(name, 0)]
@@ -0,0 +1,231 @@
+"""
+心理師每週排班（AvailableTime）的整批取代，以及與未來時段（AvailableSlot）的同步
+
+PUT /api/therapists/me/schedule/ 以新的每週排班取代全部設定：
+1. validate_intervals()：同一天的區間依開始時間排序後掃描一次，重疊即拒絕（相接的區間可以）
+2. 與既有排班比對 (星期, 開始, 結束)，只 bulk 新增／刪除有差異的列
+3. reconcile()：展開未來 SCHEDULE_HORIZON_DAYS 天應有的時段（每 SCHEDULE_SLOT_MINUTES 分鐘一個），
+   與現有時段以集合比對：缺的 bulk_create，多出且未被預約、沒有有效保留的以一個 DELETE 刪除；
+   已預約（或保留中）的時段一律不動，不在新排班內的以 booked_outside 回報；
+   排班時段與保留下來的時段重疊時不建立（IntervalIndex），以 overlapping 回報
+
+批次新增（bulk_create）不逐筆發出訊號，訊號原本的連帶處理（月報表、最近可預約時間、
+時段事件與候補配對）由 _slots_changed() 以集合一次完成；新增時段訊號處理時需一併更新這裡。
+刪除以 QuerySet.delete() 進行，連帶處理與單筆刪除相同，由 post_delete 訊號完成。
+
+時間經過後同步範圍會往後移，需以 cron 每天執行 `python manage.py materialize_slots` 補上時段（只新增不刪除）。
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from analytics.facts import apply_slots_bulk
+from appointments.models import WaitlistEntry
+from appointments.waitlist import offer_slot
+from core.response_cache import bump
+
+from .availability import schedule_refresh
+from .events import emit_slot_event
+from .models import SLOT_MINUTES, AvailableSlot, AvailableTime, TherapistProfile
+from .overlaps import IntervalIndex
+
+HORIZON_DAYS = getattr(settings, 'SCHEDULE_HORIZON_DAYS', 28)
+BATCH_SIZE = 500
+
+WEEKDAY_INDEX = {day: index for index, (day, _label) in enumerate(AvailableTime.WEEK_DAYS)}
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def validate_intervals(times):
+    """
+    times 為 (day_of_week, start_time, end_time)；回傳錯誤訊息列表（空表示通過）。
+    每天排序後與前一個區間的結束時間比較，O(n log n)。
+    """
+    errors = []
+    by_day = defaultdict(list)
+    for day, start, end in times:
+        if _minutes(end) - _minutes(start) < SLOT_MINUTES:
+            errors.append(f'{day} {start:%H:%M}-{end:%H:%M} 需至少 {SLOT_MINUTES} 分鐘')
+            continue
+        by_day[day].append((start, end))
+    for day, intervals in by_day.items():
+        intervals.sort()
+        previous_start, previous_end = intervals[0]
+        for start, end in intervals[1:]:
+            if start < previous_end:
+                errors.append(
+                    f'{day} {previous_start:%H:%M}-{previous_end:%H:%M} 與 {start:%H:%M}-{end:%H:%M} 重疊'
+                )
+            if end > previous_end:
+                previous_start, previous_end = start, end
+    return errors
+
+
+def _window(now):
+    """時段同步的範圍：(現在, 今天起第 HORIZON_DAYS 天的午夜)，以當地時間計算"""
+    today = timezone.localdate(now)
+    end = timezone.make_aware(datetime.combine(today + timedelta(days=HORIZON_DAYS), datetime.min.time()))
+    return today, end
+
+
+def expand(times, now):
+    """排班在同步範圍內應有的時段開始時間（集合）"""
+    today, _end = _window(now)
+    step = timedelta(minutes=SLOT_MINUTES)
+    by_weekday = defaultdict(list)
+    for day, start, end in times:
+        by_weekday[WEEKDAY_INDEX[day]].append((start, end))
+
+    slot_times = set()
+    for offset in range(HORIZON_DAYS):
+        date = today + timedelta(days=offset)
+        for start, end in by_weekday.get(date.weekday(), ()):
+            slot_time = timezone.make_aware(datetime.combine(date, start))
+            last = timezone.make_aware(datetime.combine(date, end)) - step
+            while slot_time <= last:
+                if slot_time > now:
+                    slot_times.add(slot_time)
+                slot_time += step
+    return slot_times
+
+
+def _delete_slots(slot_ids):
+    """
+    以 ORM 刪除未被預約的時段：候補名單對舊 offer 的參照依 on_delete 設為 NULL，
+    月報表、刪除紀錄與最近可預約時間由各時段的 post_delete 訊號處理
+    """
+    return AvailableSlot.objects.filter(pk__in=slot_ids).delete()
+
+
+def _slots_changed(therapist_id, created):
+    """
+    比照 appointments／analytics 對單筆新增時段的訊號處理，以集合一次完成：
+    月報表依月份加總、最近可預約時間重算一次；新增的時段推送事件並配對候補名單
+    """
+    apply_slots_bulk(therapist_id, [slot.slot_time for slot in created])
+    # 沒有候補（含 offer 逾期待退回的）就不逐一配對
+    waitlisted = created and WaitlistEntry.objects.filter(
+        therapist_id=therapist_id, status__in=('waiting', 'offered'),
+    ).exists()
+    for slot in created:
+        emit_slot_event('added', slot)
+        if waitlisted:
+            transaction.on_commit(partial(offer_slot, slot))
+    schedule_refresh(therapist_id)
+
+
+def _lock(therapist_id):
+    """鎖住心理師資料列：同一位心理師的排班更新與時段補建依序執行（避免同時 bulk_create 同一時段）"""
+    TherapistProfile.objects.select_for_update().filter(pk=therapist_id).first()
+
+
+def reconcile(therapist_id, times, now=None, prune=True):
+    """
+    讓同步範圍內的未來時段與排班一致；prune=False 只補上缺少的時段（cron 使用）。
+    需在交易中、已持有 _lock() 時呼叫。
+    回傳 {'created': n, 'deleted': n, 'booked_outside': [不在排班內的已預約／保留中時段],
+          'overlapping': [與保留的時段重疊而未建立的排班時段]}
+    """
+    now = now or timezone.now()
+    _today, end = _window(now)
+    wanted = expand(times, now)
+    existing = AvailableSlot.objects.filter(therapist_id=therapist_id, slot_time__gt=now, slot_time__lt=end)
+    existing_times = set(existing.values_list('slot_time', flat=True))
+
+    deleted = []
+    if prune:
+        # 鎖住要刪除的時段，避免與預約的條件式 UPDATE 交錯而刪掉剛被預約的時段；
+        # appointment__isnull 以 LEFT OUTER JOIN 查詢，PostgreSQL 不允許鎖外部連接可為 NULL 的一側，只鎖時段本身
+        free = existing.available(now).filter(appointment__isnull=True).select_for_update(of=('self',))
+        deleted = [(pk, slot_time) for pk, slot_time in free.values_list('pk', 'slot_time') if slot_time not in wanted]
+        if deleted:
+            _delete_slots([pk for pk, _slot_time in deleted])
+
+    # 保留下來的時段（含手動新增、不同長度的）與排班時段重疊時不建立，避免同一心理師出現重疊時段
+    removed_ids = {pk for pk, _slot_time in deleted}
+    kept = IntervalIndex(
+        (slot_time, ends_at)
+        for pk, slot_time, ends_at in AvailableSlot.objects.filter(therapist_id=therapist_id)
+        .overlapping(now, end).values_list('pk', 'slot_time', 'ends_at')
+        if pk not in removed_ids
+    )
+    step = timedelta(minutes=SLOT_MINUTES)
+    missing, overlapping = [], []
+    for slot_time in sorted(wanted - existing_times):
+        if kept.overlaps(slot_time, slot_time + step):
+            overlapping.append(slot_time)
+            continue
+        kept.add(slot_time, slot_time + step)
+        missing.append(AvailableSlot(therapist_id=therapist_id, slot_time=slot_time, ends_at=slot_time + step))
+    AvailableSlot.objects.bulk_create(missing, batch_size=BATCH_SIZE)
+    # 重新取得新增的時段（MySQL 不會回傳主鍵）；時段事件與候補配對都需要 id
+    created = list(AvailableSlot.objects.filter(
+        therapist_id=therapist_id, slot_time__in=[slot.slot_time for slot in missing],
+    )) if missing else []
+    if created:
+        _slots_changed(therapist_id, created)
+
+    removed_times = {slot_time for _pk, slot_time in deleted}
+    booked_outside = sorted(existing_times - wanted - removed_times) if prune else []
+    return {
+        'created': len(created), 'deleted': len(deleted),
+        'booked_outside': booked_outside, 'overlapping': overlapping,
+    }
+
+
+@transaction.atomic
+def replace_schedule(therapist, times, now=None):
+    """
+    以 times（已通過 validate_intervals 的 (day_of_week, start_time, end_time)）取代心理師的每週排班，
+    並同步未來時段；回傳變更摘要
+    """
+    _lock(therapist.pk)
+    wanted = set(times)
+    current = {
+        (day, start, end): pk
+        for pk, day, start, end in AvailableTime.objects.filter(therapist=therapist)
+        .values_list('pk', 'day_of_week', 'start_time', 'end_time')
+    }
+    removed = [pk for key, pk in current.items() if key not in wanted]
+    added = [
+        AvailableTime(therapist=therapist, day_of_week=day, start_time=start, end_time=end)
+        for day, start, end in sorted(wanted - current.keys())
+    ]
+    if removed:
+        AvailableTime.objects.filter(pk__in=removed).delete()
+    if added:
+        AvailableTime.objects.bulk_create(added, batch_size=BATCH_SIZE)
+        # bulk_create 不發出訊號：比照 core/signals.py 讓心理師列表快取失效並更新 updated_at
+        TherapistProfile.objects.filter(pk=therapist.pk).update(updated_at=timezone.now())
+        bump('therapists')
+
+    slots = reconcile(therapist.pk, wanted, now)
+    return {
+        'times': {'added': len(added), 'removed': len(removed), 'unchanged': len(current) - len(removed)},
+        'slots': slots,
+    }
+
+
+def materialize(therapist_ids=None, now=None):
+    """依排班補上同步範圍內缺少的時段（不刪除）；回傳新增的時段數"""
+    now = now or timezone.now()
+    times = defaultdict(list)
+    rows = AvailableTime.objects.values_list('therapist_id', 'day_of_week', 'start_time', 'end_time')
+    if therapist_ids is not None:
+        rows = rows.filter(therapist_id__in=therapist_ids)
+    for therapist_id, day, start, end in rows:
+        times[therapist_id].append((day, start, end))
+
+    created = 0
+    for therapist_id, therapist_times in times.items():
+        with transaction.atomic():
+            _lock(therapist_id)
+            created += reconcile(therapist_id, therapist_times, now, prune=False)['created']
+    return created
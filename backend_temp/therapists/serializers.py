@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import TherapistProfile, AvailableTime, Specialty, SpecialtyCategory
+from .models import TherapistProfile, AvailableTime, AvailableSlot, Specialty, SpecialtyCategory
+from .schedule import validate_intervals
 
 
 class SpecialtyCategorySerializer(serializers.ModelSerializer):
@@ -19,6 +20,21 @@ class SpecialtySerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'category', 'category_name', 'description', 'is_active')
 
 
+class SpecialtyBriefSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Specialty
+        fields = ('id', 'name')
+
+
+class SpecialtyCategoryTreeSerializer(serializers.ModelSerializer):
+    """分類與其下啟用中的專業領域（首頁 bundle 使用，specialties 需預先以 Prefetch 篩選）"""
+    specialties = SpecialtyBriefSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = SpecialtyCategory
+        fields = ('id', 'name', 'description', 'specialties')
+
+
 class AvailableTimeSerializer(serializers.ModelSerializer):
     """
     將心理師時段設定轉為 JSON。
@@ -27,11 +43,33 @@ class AvailableTimeSerializer(serializers.ModelSerializer):
         model = AvailableTime
         fields = ('id', 'day_of_week', 'start_time', 'end_time')
 
+class WeeklyScheduleSerializer(serializers.Serializer):
+    """
+    整批取代的每週排班（PUT /api/therapists/me/schedule/）；同一天的區間不可重疊
+    """
+    times = AvailableTimeSerializer(many=True)
+
+    def validate_times(self, value):
+        errors = validate_intervals([(row['day_of_week'], row['start_time'], row['end_time']) for row in value])
+        if errors:
+            raise serializers.ValidationError(errors)
+        return value
+
+class AvailableSlotSerializer(serializers.ModelSerializer):
+    """
+    可預約時段；held_until 晚於現在代表保留中（保留到期不會更新 updated_at，用戶端需自行比較時間）
+    """
+    class Meta:
+        model = AvailableSlot
+        fields = ('id', 'therapist', 'slot_time', 'ends_at', 'is_booked', 'held_until', 'updated_at')
+        read_only_fields = fields
+
+
 class TherapistProfileSerializer(serializers.ModelSerializer):
     """
     將心理師個人簡介與時段設定轉為 JSON，提供前台讀取。
     """
-    user_id = serializers.ReadOnlyField(source='user.id')
+    user_id = serializers.ReadOnlyField()
     available_times = AvailableTimeSerializer(many=True, read_only=True)
     
     # 關聯式專業領域
@@ -54,5 +92,8 @@ class TherapistProfileSerializer(serializers.ModelSerializer):
             'available_times',
             'consultation_modes',
             'pricing',
+            'next_available_at',    # 最近可預約時間（見 therapists/availability.py）
+            'free_slots_14d',       # 未來 14 天空檔數
             'created_at',
+            'updated_at',
         )
@@ -0,0 +1,106 @@
+"""
+心理師、專業領域、分類名稱的即時建議（GET /api/therapists/suggest/?q=）
+
+搜尋框每次輸入都呼叫，不走 ?search= 的多欄位 icontains 查詢，改用常駐記憶體的 n-gram 索引：
+- 名稱正規化（NFKC、不分大小寫、連續空白合併）後，以第一個字元、前兩個字元建立前綴索引，
+  以每個字元、每兩個相鄰字元建立子字串索引（中文名稱沒有分詞，以 bigram 比對任意子字串）
+- 查詢時取查詢字串中倒排列表最短的一個 n-gram，逐一確認名稱包含查詢字串
+- 排序：完全相同 > 前綴相符 > 包含；同一級依 心理師 > 專業領域 > 分類、名稱長度、名稱。
+  建立索引時先依此順序排列項目，倒排列表維持遞增，取滿 limit 筆即可停止
+
+心理師、專業領域、分類異動時（response_cache 的 therapists 版本改變）重建，請求本身不查詢資料庫。
+"""
+import re
+import unicodedata
+from typing import NamedTuple
+
+from core.snapshots import VersionedSnapshot
+
+from .models import Specialty, SpecialtyCategory, TherapistProfile
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+MAX_QUERY_LENGTH = 50
+
+# 同一級相符時的順序
+KINDS = ('therapist', 'specialty', 'category')
+
+_SPACES = re.compile(r'\s+')
+
+
+def normalize(text):
+    return _SPACES.sub(' ', unicodedata.normalize('NFKC', text).casefold()).strip()
+
+
+class SuggestIndex(NamedTuple):
+    kinds: list
+    ids: list
+    labels: list
+    keys: list        # 正規化後的名稱
+    exact: dict       # 正規化名稱 → 項目
+    prefixes: dict    # 前 1、2 個字元 → 項目
+    grams: dict       # 每個字元、每兩個相鄰字元 → 項目
+
+
+def _entries():
+    """3 次查詢；已停用的專業領域不列入"""
+    yield from (('therapist', pk, name) for pk, name in TherapistProfile.objects.values_list('pk', 'name'))
+    yield from (
+        ('specialty', pk, name)
+        for pk, name in Specialty.objects.filter(is_active=True).values_list('pk', 'name')
+    )
+    yield from (('category', pk, name) for pk, name in SpecialtyCategory.objects.values_list('pk', 'name'))
+
+
+def build_index():
+    entries = sorted(
+        ((kind, pk, label, normalize(label)) for kind, pk, label in _entries()),
+        key=lambda entry: (KINDS.index(entry[0]), len(entry[3]), entry[3], entry[1]),
+    )
+    index = SuggestIndex([], [], [], [], {}, {}, {})
+    for kind, pk, label, key in entries:
+        if not key:
+            continue
+        index.kinds.append(kind)
+        index.ids.append(pk)
+        index.labels.append(label)
+        index.keys.append(key)
+        position = len(index.keys) - 1
+        index.exact.setdefault(key, []).append(position)
+        for prefix in {key[:1], key[:2]}:
+            index.prefixes.setdefault(prefix, []).append(position)
+        for gram in set(key) | {key[i:i + 2] for i in range(len(key) - 1)}:
+            index.grams.setdefault(gram, []).append(position)
+    return index
+
+
+index = VersionedSnapshot(build_index, ('therapists',))
+
+
+def suggest(query, limit=DEFAULT_LIMIT):
+    """回傳 [(kind, id, label), ...]，最多 limit 筆"""
+    query = normalize(query[:MAX_QUERY_LENGTH])
+    if not query:
+        return []
+    suggestions = index.get()
+    keys = suggestions.keys
+
+    found = list(suggestions.exact.get(query, ()))[:limit]
+    seen = set(found)
+    if len(found) < limit:
+        for position in suggestions.prefixes.get(query[:2], ()):
+            if position not in seen and keys[position].startswith(query):
+                found.append(position)
+                seen.add(position)
+                if len(found) == limit:
+                    break
+    if len(found) < limit:
+        grams = [query[i:i + 2] for i in range(len(query) - 1)] or [query]
+        postings = [suggestions.grams.get(gram, ()) for gram in grams]
+        for position in min(postings, key=len):
+            if position not in seen and query in keys[position]:
+                found.append(position)
+                seen.add(position)
+                if len(found) == limit:
+                    break
+    return [(suggestions.kinds[p], suggestions.ids[p], suggestions.labels[p]) for p in found]
@@ -0,0 +1,139 @@
+from datetime import datetime, time, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from appointments.holds import acquire_hold, claim_slot
+from appointments.models import Appointment, WaitlistEntry
+from core.models import Tombstone
+from core.response_cache import versions
+
+from .models import AvailableSlot, AvailableTime, TherapistProfile
+from .availability import VERSION_NAME as AVAILABILITY_VERSION, refresh
+from .schedule import expand, reconcile
+
+User = get_user_model()
+
+
+class ReconcileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.therapist = TherapistProfile.objects.create(
+            name='心理師', title='諮商心理師', license_number='T-1', education='', experience='', beliefs='',
+            consultation_modes=['online'], pricing={'online': 1500},
+        )
+        self.user = User.objects.create(username='client@example.com', email='client@example.com')
+        self.now = timezone.now()
+        self.tomorrow = timezone.localdate(self.now) + timedelta(days=1)
+        self.day = AvailableTime.WEEK_DAYS[self.tomorrow.weekday()][0]
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(datetime.combine(self.tomorrow, time(hour, minute)))
+
+    def schedule(self, start, end):
+        return [(self.day, time(start), time(end))]
+
+    def slot(self, slot_time):
+        return AvailableSlot.objects.get(therapist=self.therapist, slot_time=slot_time)
+
+    def test_creates_missing_slots(self):
+        times = self.schedule(9, 12)
+        result = reconcile(self.therapist.pk, times, self.now)
+        self.assertEqual(result['created'], len(expand(times, self.now)))
+        self.assertEqual(reconcile(self.therapist.pk, times, self.now)['created'], 0)
+
+    def test_new_slots_are_offered_without_returned_pks(self):
+        """MySQL 的 bulk_create 不回傳主鍵：新增時段的事件與候補配對仍需取得 id"""
+        original = QuerySet.bulk_create
+
+        def bulk_create_without_pks(queryset, objs, *args, **kwargs):
+            created = original(queryset, objs, *args, **kwargs)
+            for obj in created:
+                obj.pk = None
+            return created
+
+        entry = WaitlistEntry.objects.create(user=self.user, therapist=self.therapist, consultation_type='online')
+        with mock.patch.object(QuerySet, 'bulk_create', bulk_create_without_pks), \
+                mock.patch('therapists.schedule.emit_slot_event') as emit, \
+                self.captureOnCommitCallbacks(execute=True):
+            result = reconcile(self.therapist.pk, self.schedule(9, 10), self.now)
+
+        self.assertGreater(result['created'], 0)
+        self.assertTrue(all(call.args[1].pk for call in emit.call_args_list))
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'offered')
+        self.assertEqual(entry.offered_slot.slot_time, min(expand(self.schedule(9, 10), self.now)))
+
+    def test_keeps_booked_and_held_slots_outside_schedule(self):
+        reconcile(self.therapist.pk, self.schedule(9, 12), self.now)
+        booked, held, free = self.slot(self.at(10)), self.slot(self.at(11)), self.slot(self.at(9))
+        claim_slot(booked)
+        Appointment.objects.create(user=self.user, therapist=self.therapist, slot=booked, consultation_type='online')
+        acquire_hold(held)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = reconcile(self.therapist.pk, self.schedule(9, 10), self.now)
+        self.assertEqual(result['booked_outside'], [self.at(10), self.at(11)])
+        self.assertEqual(AvailableSlot.objects.filter(pk__in=[booked.pk, held.pk]).count(), 2)
+        self.assertTrue(Appointment.objects.filter(slot=booked).exists())
+        self.assertTrue(AvailableSlot.objects.filter(pk=free.pk).exists())
+
+        # 其餘不在排班內的空時段都被刪除，並留下刪除紀錄
+        remaining = AvailableSlot.objects.filter(therapist=self.therapist).exclude(pk__in=[booked.pk, held.pk])
+        self.assertEqual(set(remaining.values_list('slot_time', flat=True)), expand(self.schedule(9, 10), self.now))
+        self.assertEqual(Tombstone.objects.filter(resource='therapists.availableslot').count(), result['deleted'])
+
+    def test_deleted_slot_clears_waitlist_offer(self):
+        reconcile(self.therapist.pk, self.schedule(9, 11), self.now)
+        slot = self.slot(self.at(10))
+        entry = WaitlistEntry.objects.create(
+            user=self.user, therapist=self.therapist, consultation_type='online', status='offered', offered_slot=slot,
+        )
+        reconcile(self.therapist.pk, self.schedule(9, 10), self.now)
+        self.assertFalse(AvailableSlot.objects.filter(pk=slot.pk).exists())
+        entry.refresh_from_db()
+        self.assertIsNone(entry.offered_slot)
+
+    def test_skips_schedule_slots_overlapping_booked_slot(self):
+        manual = AvailableSlot.objects.create(
+            therapist=self.therapist, slot_time=self.at(9, 30), ends_at=self.at(10, 30),
+        )
+        claim_slot(manual)
+        Appointment.objects.create(user=self.user, therapist=self.therapist, slot=manual, consultation_type='online')
+
+        result = reconcile(self.therapist.pk, self.schedule(9, 12), self.now)
+        self.assertEqual(result['overlapping'], [self.at(9), self.at(10)])
+        self.assertFalse(AvailableSlot.objects.filter(therapist=self.therapist, slot_time=self.at(9)).exists())
+        self.assertTrue(AvailableSlot.objects.filter(therapist=self.therapist, slot_time=self.at(11)).exists())
+        self.assertTrue(AvailableSlot.objects.filter(pk=manual.pk, is_booked=True).exists())
+
+
+class AvailabilityRefreshTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.therapist = TherapistProfile.objects.create(
+            name='心理師', title='諮商心理師', license_number='T-1', education='', experience='', beliefs='',
+            consultation_modes=['online'], pricing={'online': 1500},
+        )
+
+    def test_change_bumps_only_availability_version(self):
+        slot_time = timezone.now() + timedelta(days=1)
+        AvailableSlot.objects.create(
+            therapist=self.therapist, slot_time=slot_time, ends_at=slot_time + timedelta(hours=1),
+        )
+        before = versions(['therapists', AVAILABILITY_VERSION])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(refresh([self.therapist.pk]), 1)
+        after = versions(['therapists', AVAILABILITY_VERSION])
+        self.assertEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+
+        self.therapist.refresh_from_db()
+        self.assertEqual(self.therapist.next_available_at, slot_time)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(refresh([self.therapist.pk]), 0)
+        self.assertEqual(versions(['therapists', AVAILABILITY_VERSION]), after)
@@ -1,9 +1,31 @@
+from django.conf import settings
+from django.urls import path
+from core.async_views import AsyncReadView
 from rest_framework.routers import DefaultRouter
-from .views import TherapistProfileViewSet, SpecialtyViewSet, SpecialtyCategoryViewSet
+from .views import (
+    TherapistProfileViewSet, SpecialtyViewSet, SpecialtyCategoryViewSet, AvailableSlotViewSet,
+    RecommendationView, SuggestView, WeeklyScheduleView, therapist_slot_stream, slot_stream,
+)
 
 router = DefaultRouter()
 router.register(r'profiles', TherapistProfileViewSet, basename='therapist-profile')
 router.register(r'specialties', SpecialtyViewSet, basename='specialty')
 router.register(r'specialty-categories', SpecialtyCategoryViewSet, basename='specialty-category')
+router.register(r'slots', AvailableSlotViewSet, basename='available-slot')
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('recommendations/', RecommendationView.as_view(), name='therapist-recommendations'),
+    path('suggest/', SuggestView.as_view(), name='therapist-suggest'),
+    path('me/schedule/', WeeklyScheduleView.as_view(), name='therapist-schedule'),
+    path('profiles/<int:pk>/slots/stream/', therapist_slot_stream, name='therapist-slot-stream'),
+    path('slots/stream/', slot_stream, name='slot-stream'),
+] + router.urls
+
+if settings.ASYNC_READ_VIEWS:
+    # ASGI 模式：公開唯讀 API 改用 async view（輸出與 router 的同步版本相同）
+    urlpatterns = [
+        path('profiles/', AsyncReadView.as_view(view_class=TherapistProfileViewSet)),
+        path('profiles/<int:pk>/', AsyncReadView.as_view(view_class=TherapistProfileViewSet, detail=True)),
+        path('specialties/', AsyncReadView.as_view(view_class=SpecialtyViewSet)),
+        path('specialties/<int:pk>/', AsyncReadView.as_view(view_class=SpecialtyViewSet, detail=True)),
+    ] + urlpatterns
@@ -1,15 +1,59 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.http import Http404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET
 from rest_framework import viewsets
-from rest_framework.permissions import AllowAny
-from .models import TherapistProfile, Specialty, SpecialtyCategory
-from .serializers import TherapistProfileSerializer, SpecialtySerializer, SpecialtyCategorySerializer
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from appointments.permissions import IsTherapistOwner
+from assessments.models import Response as AssessmentResponse
+from core.delta import DeltaSyncMixin
+from core.response_cache import CachedResponseMixin
+from . import recommendations, schedule, suggest
+from .availability import VERSION_NAME as AVAILABILITY_VERSION
+from .events import slot_hub
+from .models import AvailableSlot, AvailableTime, TherapistProfile, Specialty, SpecialtyCategory
+from .serializers import (
+    AvailableSlotSerializer, AvailableTimeSerializer, TherapistProfileSerializer, SpecialtySerializer,
+    SpecialtyCategorySerializer, WeeklyScheduleSerializer,
+)
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 
-class TherapistProfileViewSet(viewsets.ReadOnlyModelViewSet):
+# /api/therapists/slots/ 未指定心理師時，from／to 日期區間的上限（天）
+SLOT_LIST_MAX_DAYS = getattr(settings, 'SLOT_LIST_MAX_DAYS', 31)
+
+
+class NullsLastOrderingFilter(OrderingFilter):
+    """nulls_last_fields 中的欄位不論升降冪都把 NULL 排在最後（沒有空檔的心理師排在最後）"""
+    nulls_last_fields = ('next_available_at',)
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if not ordering:
+            return queryset
+        return queryset.order_by(*[self.expression(field) for field in ordering])
+
+    def expression(self, field):
+        name = field.lstrip('-')
+        if name not in self.nulls_last_fields:
+            return field
+        return F(name).desc(nulls_last=True) if field.startswith('-') else F(name).asc(nulls_last=True)
+
+
+class TherapistProfileViewSet(CachedResponseMixin, DeltaSyncMixin, viewsets.ReadOnlyModelViewSet):
     """
     心理師資料 ReadOnly API
     - GET /api/therapists/          取得所有心理師資料與時段列表
     - GET /api/therapists/{id}/     取得單一心理師介紹與時段
+    - GET /api/therapists/?ordering=next_available_at   依最近可預約時間排序（見 therapists/availability.py）
+    - 支援增量同步：?updated_since=（見 core/delta.py）
     """
     queryset = TherapistProfile.objects.prefetch_related(
         'available_times', 
@@ -17,9 +61,11 @@ class TherapistProfileViewSet(viewsets.ReadOnlyModelViewSet):
     ).all().order_by('-created_at')
     serializer_class = TherapistProfileSerializer
     permission_classes = [AllowAny]
+    # 回應快取（見 core/response_cache.py）；內含最近可預約時間，另依賴其版本
+    cache_dependencies = ('therapists', AVAILABILITY_VERSION)
 
     # 加入搜尋、篩選和排序功能
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, SearchFilter, NullsLastOrderingFilter]
     
     # 篩選條件
     filterset_fields = [
@@ -39,11 +85,12 @@ class TherapistProfileViewSet(viewsets.ReadOnlyModelViewSet):
     ]
     
     # 可排序欄位
-    ordering_fields = ['created_at', 'name', 'title']  # 支援按建立時間、姓名、頭銜排序
+    # 支援按建立時間、姓名、頭銜、最近可預約時間、未來 14 天空檔數排序
+    ordering_fields = ['created_at', 'name', 'title', 'next_available_at', 'free_slots_14d']
     ordering = ['-created_at']  # 預設按創建時間倒序排序
 
 
-class SpecialtyCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class SpecialtyCategoryViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """
     專業領域分類 ReadOnly API
     - GET /api/therapists/specialty-categories/       取得所有專業領域分類
@@ -52,9 +99,10 @@ class SpecialtyCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = SpecialtyCategory.objects.all().order_by('name')
     serializer_class = SpecialtyCategorySerializer
     permission_classes = [AllowAny]
+    cache_dependencies = ('therapists',)
 
 
-class SpecialtyViewSet(viewsets.ReadOnlyModelViewSet):
+class SpecialtyViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """
     專業領域 ReadOnly API
     - GET /api/therapists/specialties/           取得所有專業領域
@@ -64,9 +112,222 @@ class SpecialtyViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Specialty.objects.select_related('category').filter(is_active=True).order_by('category__name', 'name')
     serializer_class = SpecialtySerializer
     permission_classes = [AllowAny]
+    cache_dependencies = ('therapists',)
     
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['category', 'is_active']
     search_fields = ['name', 'description', 'category__name']
     ordering_fields = ['name', 'category__name', 'created_at']
     ordering = ['category__name', 'name']
+
+
+class AvailableSlotViewSet(DeltaSyncMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    可預約時段 ReadOnly API（只列出未來的時段）
+    - GET /api/therapists/slots/?therapist={id}                       取得心理師的時段與預約／保留狀態
+    - GET /api/therapists/slots/?from=2025-01-01&to=2025-01-07        所有心理師在日期區間內的時段（含兩端）
+    - GET /api/therapists/slots/?therapist={id}&updated_since=...     只取得變動與刪除的時段
+    列表需指定 therapist，或不超過 SLOT_LIST_MAX_DAYS 天的 from／to 區間，不提供全部時段。
+    """
+    serializer_class = AvailableSlotSerializer
+    permission_classes = [AllowAny]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['therapist']
+
+    def get_queryset(self):
+        return AvailableSlot.objects.filter(slot_time__gt=timezone.now()).order_by('slot_time')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action != 'list':
+            return queryset
+        params = self.request.query_params
+        start, end = self.date_param(params, 'from'), self.date_param(params, 'to')
+        if (start is None) != (end is None):
+            raise ValidationError({'detail': 'from 與 to 需同時指定'})
+        if start is not None:
+            if end < start or (end - start).days + 1 > SLOT_LIST_MAX_DAYS:
+                raise ValidationError({'detail': f'from／to 區間需在 1 到 {SLOT_LIST_MAX_DAYS} 天之間'})
+            queryset = queryset.filter(
+                slot_time__gte=timezone.make_aware(datetime.combine(start, time.min)),
+                slot_time__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+            )
+        elif not params.get('therapist'):
+            raise ValidationError({'detail': f'請指定 therapist，或不超過 {SLOT_LIST_MAX_DAYS} 天的 from／to 日期區間'})
+        return queryset
+
+    @staticmethod
+    def date_param(params, name):
+        value = params.get(name)
+        if not value:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise ValidationError({name: '日期格式錯誤，請使用 YYYY-MM-DD'})
+        return parsed
+
+    def filter_tombstones(self, tombstones):
+        therapist = self.request.query_params.get('therapist')
+        if therapist and therapist.isdigit():
+            return tombstones.filter(therapist_ref=int(therapist))
+        return tombstones
+
+
+class RecommendationView(APIView):
+    """
+    依測驗結果推薦心理師（見 therapists/recommendations.py）
+    - GET /api/therapists/recommendations/?mode=online&price_min=1000&price_max=2000&k=5
+    - 測驗依據：?test=BSRS5&risk_level=中度（作答完成時的回應附有此連結）；
+      未指定時使用登入者最近一次的作答，都沒有則只依可預約時間與價格排序
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        params = request.query_params
+        basis, profile = self.resolve_profile(request)
+        mode = params.get('mode') or None
+        if mode is not None and mode not in recommendations.MODES:
+            raise ValidationError({'mode': f"mode 只能是 {', '.join(recommendations.MODES)}"})
+        price_min = self.number(params, 'price_min')
+        price_max = self.number(params, 'price_max')
+        k = self.number(params, 'k') or recommendations.DEFAULT_K
+        k = max(1, min(int(k), recommendations.MAX_K))
+
+        matrix, ranked = recommendations.recommend(profile, mode, price_min, price_max, k)
+        storage = TherapistProfile._meta.get_field('photo').storage
+        results = []
+        for item in ranked:
+            index = item.index
+            photo = matrix.photos[index]
+            results.append({
+                'id': matrix.ids[index],
+                'name': matrix.names[index],
+                'title': matrix.titles[index],
+                'photo': request.build_absolute_uri(storage.url(photo)) if photo else None,
+                'consultation_modes': [m for m in recommendations.MODES if matrix.prices[m][index] is not None],
+                'price': item.price,
+                'matched_specialties': recommendations.matched_specialties(matrix, index, profile),
+                'next_available_at': item.next_available_at,
+                'score': round(item.score, 4),
+                'scores': {
+                    'specialty': round(item.specialty, 4),
+                    'availability': round(item.available, 4),
+                    'price': round(item.price_score, 4),
+                },
+            })
+        return Response({'basis': basis, 'results': results})
+
+    def resolve_profile(self, request):
+        """回傳 (basis, PROFILES 項目)；basis 說明推薦依據的量表、風險等級與來源"""
+        test = request.query_params.get('test')
+        risk_level = request.query_params.get('risk_level')
+        source = 'query'
+        if not (test or risk_level) and request.user.is_authenticated:
+            latest = (
+                AssessmentResponse.objects.filter(user=request.user)
+                .exclude(risk_level='').order_by('-created_at')
+                .values_list('test__code', 'risk_level').first()
+            )
+            if latest:
+                test, risk_level = latest
+                source = 'latest_response'
+        if not (test or risk_level):
+            return None, None
+        profile = recommendations.PROFILES.get((test, risk_level))
+        if profile is None:
+            raise ValidationError({'risk_level': f'無法辨識的測驗結果：{test} {risk_level}'})
+        return {'test': test, 'risk_level': risk_level, 'source': source}, profile
+
+    @staticmethod
+    def number(params, name):
+        value = params.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValidationError({name: f'{name} 必須是數字'})
+        if number < 0:
+            raise ValidationError({name: f'{name} 不可為負數'})
+        return number
+
+
+class SuggestView(APIView):
+    """
+    搜尋框即時建議（見 therapists/suggest.py）
+    - GET /api/therapists/suggest/?q=焦慮&limit=8
+    - 只回傳類型、id 與名稱；心理師以 /api/therapists/profiles/{id}/ 取得完整資料，
+      專業領域、分類可帶入 ?specialties=、?specialties__category= 篩選心理師列表
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        limit = request.query_params.get('limit', '')
+        if limit and not limit.isdigit():
+            raise ValidationError({'limit': 'limit 必須是正整數'})
+        limit = max(1, min(int(limit or suggest.DEFAULT_LIMIT), suggest.MAX_LIMIT))
+        results = [
+            {'type': kind, 'id': pk, 'label': label}
+            for kind, pk, label in suggest.suggest(query, limit)
+        ]
+        return Response({'query': query, 'results': results})
+
+
+class WeeklyScheduleView(APIView):
+    """
+    心理師本人的每週排班（見 therapists/schedule.py）
+    - GET /api/therapists/me/schedule/   目前的排班
+    - PUT /api/therapists/me/schedule/   整批取代：{"times": [{"day_of_week": "monday", "start_time": "09:00", "end_time": "12:00"}, ...]}
+      並同步未來 SCHEDULE_HORIZON_DAYS 天的時段；已預約的時段不會被刪除
+    """
+    permission_classes = [IsAuthenticated, IsTherapistOwner]
+
+    def get_therapist(self):
+        return TherapistProfile.objects.get(user=self.request.user)
+
+    def render(self, therapist, **extra):
+        times = sorted(
+            AvailableTime.objects.filter(therapist=therapist),
+            key=lambda row: (schedule.WEEKDAY_INDEX[row.day_of_week], row.start_time),
+        )
+        return Response({
+            'times': AvailableTimeSerializer(times, many=True).data,
+            'slot_minutes': schedule.SLOT_MINUTES,
+            'horizon_days': schedule.HORIZON_DAYS,
+            **extra,
+        })
+
+    def get(self, request):
+        return self.render(self.get_therapist())
+
+    def put(self, request):
+        serializer = WeeklyScheduleSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        times = [(row['day_of_week'], row['start_time'], row['end_time']) for row in serializer.validated_data['times']]
+        therapist = self.get_therapist()
+        changes = schedule.replace_schedule(therapist, times)
+        return self.render(therapist, changes=changes)
+
+
+# ───────── 時段即時狀態（Server-Sent Events） ─────────
+@require_GET
+def therapist_slot_stream(request, pk):
+    """
+    GET /api/therapists/profiles/{id}/slots/stream/
+    推送該心理師的時段 added／held／booked／released 事件（text/event-stream，支援 Last-Event-ID 續傳）
+    """
+    if not TherapistProfile.objects.filter(pk=pk).exists():
+        raise Http404
+    return slot_hub.response(request, topics={pk})
+
+
+@require_GET
+def slot_stream(request):
+    """
+    GET /api/therapists/slots/stream/?therapists=1,2,3
+    心理師列表頁使用的多工串流；未指定 therapists 時推送所有心理師的時段事件
+    """
+    ids = request.GET.get('therapists')
+    topics = {int(value) for value in ids.split(',') if value.strip().isdigit()} if ids else None
+    return slot_hub.response(request, topics=topics)
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class UsersConfig(AppConfig):
+    name = 'users'
+
+    def ready(self):
+        # 註冊身分驗證快取的失效訊號
+        from . import signals  # noqa: F401
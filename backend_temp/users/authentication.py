@@ -0,0 +1,190 @@
+"""
+快取版身分驗證：熱請求不需要任何 SQL 查詢
+
+- CachedTokenAuthentication：DRF Token（Authorization: Token <key>）
+- CachedJWTAuthentication：SimpleJWT（Authorization: Bearer <jwt>），心理師／管理員後台使用；
+  簽章驗證本身不查資料庫，使用者同樣從快取取得
+
+快取內容：
+- 使用者：只存 AUTH_CACHE_FIELDS（id、is_active、角色、token_version），不含密碼雜湊、身分證雜湊等欄位；
+  request.user 的其他欄位存取時才查詢資料庫。每次請求都讀 Django cache（TOKEN_AUTH_SHARED_TTL 秒，跨行程共用），
+  停用、變更角色後所有行程立即生效
+- token → (user_id, token_version)：行程內 LRU（容量 TOKEN_AUTH_LOCAL_CACHE_SIZE，TTL TOKEN_AUTH_LOCAL_TTL 秒）
+  → Django cache。token_version 與使用者快取不符時視為已撤銷，重新向資料庫確認
+
+失效（users.signals、users.models.UserQuerySet）：
+- 使用者 save()、delete()、QuerySet.update()／bulk_update() 變更 AUTH_CACHE_FIELDS 時清除使用者快取
+- Token 刪除（登出、重新產生）時 token_version 加一：其他行程 LRU 內的舊 token 與已簽發的 JWT（ver claim）一併失效
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import AUTH_CACHE_FIELDS
+
+LOCAL_CACHE_SIZE = getattr(settings, 'TOKEN_AUTH_LOCAL_CACHE_SIZE', 10_000)
+LOCAL_TTL = getattr(settings, 'TOKEN_AUTH_LOCAL_TTL', 30)
+SHARED_TTL = getattr(settings, 'TOKEN_AUTH_SHARED_TTL', 300)
+VERSION_CLAIM = 'ver'
+
+
+class LocalTTLCache:
+    """執行緒安全、有容量上限的 LRU，每筆資料各自有到期時間"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local = LocalTTLCache(LOCAL_CACHE_SIZE, LOCAL_TTL)
+
+
+def _token_cache_key(key):
+    # 不把 token 原文當作快取 key
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()[:40]
+
+
+def _user_cache_key(user_id):
+    return f'auth:u:{user_id}'
+
+
+def _cached(cache_key, loader):
+    """行程內 LRU → 共用快取 → loader（查資料庫）；loader 回傳 None 表示不存在，不快取"""
+    value = _local.get(cache_key)
+    if value is not None:
+        return value
+    value = cache.get(cache_key)
+    if value is None:
+        value = loader()
+        if value is None:
+            return None
+        cache.set(cache_key, value, SHARED_TTL)
+    _local.set(cache_key, value)
+    return value
+
+
+def get_cached_user(user_id):
+    """依 id 取得使用者：只有 AUTH_CACHE_FIELDS 已載入，其他欄位為延遲載入"""
+    User = get_user_model()
+    # from_db() 依欄位定義順序對應值
+    field_names = [field.attname for field in User._meta.concrete_fields if field.attname in AUTH_CACHE_FIELDS]
+    cache_key = _user_cache_key(user_id)
+    row = cache.get(cache_key)
+    if row is None:
+        row = User.objects.filter(pk=user_id).values_list(*field_names).first()
+        if row is None:
+            return None
+        cache.set(cache_key, row, SHARED_TTL)
+    return User.from_db(DEFAULT_DB_ALIAS, field_names, row)
+
+
+def invalidate_token(key):
+    cache_key = _token_cache_key(key)
+    _local.delete(cache_key)
+    cache.delete(cache_key)
+
+
+def invalidate_user(user_id):
+    cache.delete(_user_cache_key(user_id))
+
+
+def invalidate_users(user_ids):
+    cache.delete_many([_user_cache_key(user_id) for user_id in user_ids])
+
+
+class VersionedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """簽發的 JWT 帶 token_version（ver claim），版本變更後舊的 JWT 不再有效"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """與 TokenAuthentication 相同的行為，但 token → user 由快取解析"""
+
+    def authenticate_credentials(self, key):
+        model = self.get_model()
+        user = None
+        for _attempt in range(2):
+            entry = _cached(
+                _token_cache_key(key),
+                lambda: model.objects.filter(key=key).values_list('user_id', 'user__token_version').first(),
+            )
+            if entry is None:
+                break
+            user = get_cached_user(entry[0])
+            if user is None or user.token_version == entry[1]:
+                break
+            # 版本不符：token 可能已被刪除（其他行程的 LRU 尚未失效），清除後向資料庫確認一次
+            invalidate_token(key)
+            user = None
+        if user is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        # request.auth 提供未查詢資料庫的 Token instance
+        return (user, model(key=key, user=user))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """SimpleJWT 驗證；JWT 為簽章式無狀態 token，使用者改由快取取得"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError as exc:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from exc
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise exceptions.AuthenticationFailed(_('User not found'), code='user_not_found')
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if validated_token.get(VERSION_CLAIM, 0) != user.token_version:
+            raise InvalidToken(_('Token is invalid or expired'))
+        return user
@@ -1,8 +1,44 @@
 import hashlib
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+from functools import partial
+
+from django.contrib.auth.models import AbstractUser, UserManager as DjangoUserManager
+from django.db import models, transaction
 from django.contrib.auth.hashers import make_password, check_password
 
+# 身分驗證快取的使用者欄位（見 users/authentication.py）；變更這些欄位時需清除快取
+AUTH_CACHE_FIELDS = ('id', 'is_active', 'is_staff', 'is_superuser', 'token_version')
+AUTH_CACHE_FIELDS_SET = frozenset(AUTH_CACHE_FIELDS)
+
+
+def _invalidate_auth_cache(user_ids):
+    # users.authentication 匯入 DRF／SimpleJWT，需在 app 載入完成後才能匯入
+    from .authentication import invalidate_users
+    invalidate_users(user_ids)
+    transaction.on_commit(partial(invalidate_users, user_ids))
+
+
+class UserQuerySet(models.QuerySet):
+    """QuerySet.update()／bulk_update() 不發出訊號：變更身分驗證快取的欄位（停用、角色等）時自行清除快取"""
+
+    def update(self, **kwargs):
+        if not AUTH_CACHE_FIELDS_SET.intersection(kwargs):
+            return super().update(**kwargs)
+        user_ids = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        _invalidate_auth_cache(user_ids)
+        return rows
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if AUTH_CACHE_FIELDS_SET.intersection(fields):
+            _invalidate_auth_cache([obj.pk for obj in objs])
+        return rows
+
+
+class UserManager(DjangoUserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
     """
     自訂使用者模型：
@@ -24,6 +60,13 @@ class User(AbstractUser):
         help_text="SHA256 salted hash of ID number"
     )
 
+    # Token 刪除時加一，讓已簽發的 token／JWT 失效（見 users/authentication.py）
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+    # 重設行事曆訂閱網址時加一，讓舊網址失效（見 appointments/calendar.py）
+    calendar_token_version = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = UserManager()
+
     def set_id_number(self, raw_id: str):
         """設定身分證雜湊值（只呼叫一次或更新時）"""
         # make_password 內會自動加 salt
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token, invalidate_user
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Token 刪除（登出、重新產生）後立即失效；token_version 加一讓其他行程快取的舊 token、已簽發的 JWT 一併失效"""
+    invalidate_token(instance.key)
+    # QuerySet.update() 會清除使用者快取（見 users.models.UserQuerySet）
+    get_user_model().objects.filter(pk=instance.user_id).update(token_version=F('token_version') + 1)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    """使用者資料變更（含停用 is_active=False）或刪除後，清除快取的使用者"""
+    invalidate_user(instance.pk)
@@ -1,10 +1,14 @@
 from django.urls import path
-# ※ 移除前台註冊與 token 路由（register/token/token/refresh）
+# ※ 移除前台註冊路由；JWT 僅供心理師／管理員後台登入
 # from .views import RegisterView
-# from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+
+from .authentication import VersionedTokenObtainPairSerializer
 
 app_name = 'users'
 
 urlpatterns = [
-    # 註冊與登入改由預約流程自動處理
+    # 一般用戶的註冊與登入改由預約流程自動處理
+    path('jwt/', TokenObtainPairView.as_view(serializer_class=VersionedTokenObtainPairSerializer), name='jwt-obtain'),
+    path('jwt/refresh/', TokenRefreshView.as_view(), name='jwt-refresh'),
 ]
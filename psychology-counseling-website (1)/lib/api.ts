@@ -8,6 +8,9 @@ export const API_ENDPOINTS = {
     profiles: '/api/therapists/profiles/',
     specialties: '/api/therapists/specialties/',
     categories: '/api/therapists/specialty-categories/',
+    recommendations: '/api/therapists/recommendations/',
+    suggest: '/api/therapists/suggest/',
+    mySchedule: '/api/therapists/me/schedule/',
   },
   // 預約相關
   appointments: {
@@ -16,6 +19,9 @@ export const API_ENDPOINTS = {
     query: '/api/appointments/query/',
     confirm: '/api/appointments/{id}/confirm/',
     selectTime: '/api/appointments/{id}/select_time/',
+    series: '/api/appointments/series/',
+    calendar: '/api/appointments/calendar/',
+    calendarReset: '/api/appointments/calendar/reset/',
   },
   // 測驗相關
   assessments: {
@@ -28,6 +34,10 @@ export const API_ENDPOINTS = {
   articles: {
     list: '/api/articles/',
     detail: '/api/articles/{id}/',
+  },
+  // 首頁（精選心理師、專業領域、最新文章、測驗一次取得）
+  bundle: {
+    home: '/api/bundle/home/',
   }
 }
 
@@ -60,6 +70,11 @@ class ApiClient {
       if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status}`)
       }
+
+      // DELETE 成功時回傳 204，沒有內容
+      if (response.status === 204) {
+        return undefined as T
+      }
       
       return await response.json()
     } catch (error) {
@@ -130,6 +145,8 @@ export interface TherapistProfile {
   available_times: AvailableTime[]
   consultation_modes: string[]
   pricing: Record<string, number>
+  next_available_at: string | null  // 最近可預約時間；可用 ordering: 'next_available_at' 排序
+  free_slots_14d: number
   created_at: string
 }
 
@@ -162,6 +179,7 @@ export const therapistService = {
     search?: string
     specialties?: string
     specialties__category?: string 
+    ordering?: string  // 例如 'next_available_at'、'-free_slots_14d'
   }): Promise<TherapistProfile[]> {
     return apiClient.get<TherapistProfile[]>(API_ENDPOINTS.therapists.profiles, params)
   },
@@ -179,5 +197,185 @@ export const therapistService = {
   // 獲取專業領域分類
   async getCategories(): Promise<SpecialtyCategory[]> {
     return apiClient.get<SpecialtyCategory[]>(API_ENDPOINTS.therapists.categories)
+  },
+
+  // 依測驗結果推薦心理師（未帶 test／risk_level 時使用登入者最近一次的作答）
+  async getRecommendations(params?: {
+    test?: string
+    risk_level?: string
+    mode?: 'online' | 'offline'
+    price_min?: number
+    price_max?: number
+    k?: number
+  }): Promise<RecommendationResult> {
+    const query = Object.fromEntries(
+      Object.entries(params ?? {})
+        .filter(([, value]) => value !== undefined)
+        .map(([key, value]) => [key, String(value)])
+    )
+    return apiClient.get<RecommendationResult>(API_ENDPOINTS.therapists.recommendations, query)
+  },
+
+  // 搜尋框即時建議（心理師、專業領域、分類名稱，只回傳 id 與名稱）
+  async suggest(q: string, limit?: number): Promise<SuggestResult> {
+    const params: Record<string, string> = { q }
+    if (limit !== undefined) params.limit = String(limit)
+    return apiClient.get<SuggestResult>(API_ENDPOINTS.therapists.suggest, params)
+  },
+
+  // 心理師本人的每週排班（需以心理師帳號登入）
+  async getMySchedule(): Promise<WeeklySchedule> {
+    return apiClient.get<WeeklySchedule>(API_ENDPOINTS.therapists.mySchedule)
+  },
+
+  // 整批取代每週排班，並同步未來的可預約時段（已預約的時段不會被刪除）
+  async replaceMySchedule(times: Omit<AvailableTime, 'id'>[]): Promise<WeeklySchedule> {
+    return apiClient.put<WeeklySchedule>(API_ENDPOINTS.therapists.mySchedule, { times })
+  },
+}
+
+export interface WeeklySchedule {
+  times: AvailableTime[]
+  slot_minutes: number
+  horizon_days: number
+  changes?: {
+    times: { added: number; removed: number; unchanged: number }
+    slots: { created: number; deleted: number; booked_outside: string[]; overlapping: string[] }
+  }
+}
+
+export interface SuggestResult {
+  query: string
+  results: { type: 'therapist' | 'specialty' | 'category'; id: number; label: string }[]
+}
+
+export interface TherapistRecommendation {
+  id: number
+  name: string
+  title: string
+  photo: string | null
+  consultation_modes: ('online' | 'offline')[]
+  price: number
+  matched_specialties: string[]
+  next_available_at: string | null
+  score: number
+  scores: { specialty: number; availability: number; price: number }
+}
+
+export interface RecommendationResult {
+  basis: { test: string; risk_level: string; source: 'query' | 'latest_response' } | null
+  results: TherapistRecommendation[]
+}
+
+export interface ArticleSummary {
+  id: number
+  title: string
+  excerpt: string
+  tags: string[]
+  author: number | null
+  published_at: string
+  updated_at: string
+}
+
+export interface AssessmentTest {
+  code: string
+  name: string
+  description: string
+}
+
+export interface HomeBundle {
+  featured_therapists: TherapistProfile[]
+  specialty_categories: (SpecialtyCategory & { specialties: { id: number; name: string }[] })[]
+  latest_articles: ArticleSummary[]
+  tests: AssessmentTest[]
+}
+
+export interface AppointmentSeries {
+  id: number
+  therapist: string
+  therapist_id: number
+  consultation_type: 'online' | 'offline'
+  interval_weeks: number
+  appointments: {
+    id: number
+    slot: number
+    slot_time: string
+    ends_at: string
+    price: string | null
+    status: string
+  }[]
+  created_at: string
+  // 建立時（allow_partial）略過的時間與原因
+  skipped?: { slot_time: string; reason: 'unavailable' | 'therapist_conflict' | 'user_conflict' }[]
+}
+
+export const appointmentSeriesService = {
+  // 週期預約：first_slot 起每隔 interval_weeks 週的相同時間，共 occurrences 次
+  // 預設任一次無法預約即整批失敗（400，unavailable 列出原因）；allow_partial 時只預約可預約的部分
+  async create(data: {
+    email: string
+    id_number: string
+    first_slot: number
+    occurrences: number
+    interval_weeks?: number
+    consultation_type: 'online' | 'offline'
+    allow_partial?: boolean
+    hold_id?: string
+  }): Promise<AppointmentSeries> {
+    return apiClient.post<AppointmentSeries>(API_ENDPOINTS.appointments.series, data)
+  },
+
+  // 本人的週期預約（需登入）
+  async list(): Promise<AppointmentSeries[]> {
+    return apiClient.get<AppointmentSeries[]>(API_ENDPOINTS.appointments.series)
+  },
+
+  // 尚未開始的各次預約整批改到 first_slot 起的新時間
+  async reschedule(id: number, firstSlot: number): Promise<AppointmentSeries> {
+    return apiClient.post<AppointmentSeries>(`${API_ENDPOINTS.appointments.series}${id}/reschedule/`, { first_slot: firstSlot })
+  },
+
+  // 取消尚未開始的各次預約
+  async cancel(id: number): Promise<void> {
+    return apiClient.delete<void>(`${API_ENDPOINTS.appointments.series}${id}/`)
+  },
+}
+
+export interface CalendarLinks {
+  client: string
+  therapist?: string | null
+}
+
+export const calendarService = {
+  // 登入者的行事曆訂閱網址（心理師帳號另有 therapist）
+  async getLinks(): Promise<CalendarLinks> {
+    return apiClient.get<CalendarLinks>(API_ENDPOINTS.appointments.calendar)
+  },
+
+  // 未登入的個案以 email + 身分證號取得訂閱網址
+  async getClientLink(email: string, idNumber: string): Promise<CalendarLinks> {
+    return apiClient.post<CalendarLinks>(API_ENDPOINTS.appointments.calendar, { email, id_number: idNumber })
+  },
+
+  // 網址外流時重設（舊網址立即失效）；kind 省略時 client 與 therapist 都重設
+  async resetLinks(kind?: 'client' | 'therapist'): Promise<CalendarLinks> {
+    return apiClient.post<CalendarLinks>(API_ENDPOINTS.appointments.calendarReset, kind ? { kind } : {})
+  },
+
+  // 未登入的個案以 email + 身分證號重設訂閱網址
+  async resetClientLink(email: string, idNumber: string): Promise<CalendarLinks> {
+    return apiClient.post<CalendarLinks>(API_ENDPOINTS.appointments.calendarReset, { email, id_number: idNumber })
+  },
+
+  // 行事曆 App 訂閱用的 webcal:// 網址
+  toWebcal(url: string): string {
+    return url.replace(/^https?:\/\//, 'webcal://')
+  },
+}
+
+export const homeService = {
+  // 首頁資料一次取得（取代分別請求心理師、專業領域、分類、文章、測驗）
+  async getHomeBundle(): Promise<HomeBundle> {
+    return apiClient.get<HomeBundle>(API_ENDPOINTS.bundle.home)
   }
-}
\ No newline at end of file
+}